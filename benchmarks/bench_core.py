@@ -0,0 +1,191 @@
+"""
+Banc de performance du cœur TOTP, pour chaque algorithme de l'interface.
+
+    python benchmarks/bench_core.py [--output resultats.json] [--baseline reference.json]
+                                    [--tolerance 0.25] [--quick] [--algorithms sha1,sha256]
+
+Vérifie d'abord les vecteurs de test des RFC 6238 (annexe B) et 4226 (annexe D), puis mesure,
+pour chaque algorithme et chaque nombre de chiffres (6 et 8) :
+
+- single : un code avec une clé précompilée (TOTPKey.at) ;
+- cold : décodage Base32 + précompilation + un code (generate_totp_secret) ;
+- warm : un code via une clé déjà en cache (CodeCache.generate) ;
+- batch : un code dans un lot de BATCH_SIZE clés (generate_batch) ;
+- verify_wN : une vérification refusée (pire cas) dans une fenêtre de ±N périodes ;
+- uri : l'analyse d'une URI otpauth://.
+
+Toutes les mesures sont en nanosecondes par opération (meilleure de plusieurs
+répétitions). Les résultats sont écrits en JSON ; avec --baseline, le script
+échoue (code de sortie 1) si une mesure dépasse la référence de plus de
+--tolerance, si un algorithme n'est plus supporté ou si un vecteur est faux.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src import algorithms
+from src.batch import generate_batch
+from src.cache import CodeCache
+from src.hotp import hotp
+from src.totp import TOTPKey, generate_totp_secret
+from src.uri import parse_uri
+from src.verify import verify
+from tests.vectors import RFC4226_SEED, RFC4226_VECTORS, RFC6238_SEEDS, RFC6238_VECTORS
+
+SECRET = 'JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP'
+TIMESTAMP = 1_700_000_000
+DIGITS = (6, 8)
+WINDOWS = (0, 1, 3)
+BATCH_SIZE = 1000
+
+
+def check_vectors() -> list:
+    """Retourne la liste des vecteurs RFC 6238 et RFC 4226 en échec (vide si tout est correct)."""
+    failures = []
+    key = TOTPKey(RFC4226_SEED)
+    for counter, code in enumerate(RFC4226_VECTORS):
+        got = hotp(key, counter)
+        if got != code:
+            failures.append(f"HOTP compteur {counter} : {got} au lieu de {code}")
+    for timestamp, algo, code in RFC6238_VECTORS:
+        got = TOTPKey(RFC6238_SEEDS[algo], algo, 8).at(timestamp)
+        if got != code:
+            failures.append(f"{algo} @ {timestamp} : {got} au lieu de {code}")
+    return failures
+
+
+def per_call_ns(statement, repeat: int, min_time: float, number: int = None) -> float:
+    """
+    Meilleur temps par appel (ns) d'une fonction sans argument ; le nombre
+    d'appels par répétition est calibré pour durer au moins `min_time` secondes.
+    """
+    timer = timeit.Timer(statement)
+    if number is None:
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 4
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+
+def bench_algorithm(algo: str, digits: int, repeat: int, min_time: float, batch_size: int) -> dict:
+    """Mesure toutes les opérations pour un couple (algorithme, chiffres)."""
+    key = TOTPKey.from_secret(SECRET, algo, digits)
+    cache = CodeCache(maxsize=16, clock=lambda: TIMESTAMP)
+    cache.generate(SECRET, algo, digits, 30, TIMESTAMP)
+    keys = [TOTPKey(os.urandom(20), algo, digits) for _ in range(batch_size)]
+    uri = f'otpauth://totp/Banc:compte%40exemple?secret={SECRET}&issuer=Banc&algorithm={algo}&digits={digits}'
+    wrong = '0' * digits if key.at(TIMESTAMP) != '0' * digits else '1' * digits
+
+    def measure(statement, number=None):
+        return per_call_ns(statement, repeat, min_time, number)
+
+    results = {
+        'single': measure(lambda: key.at(TIMESTAMP)),
+        'cold': measure(lambda: generate_totp_secret(SECRET, algo, digits)),
+        'warm': measure(lambda: cache.generate(SECRET, algo, digits, 30, TIMESTAMP)),
+        'batch': measure(lambda: generate_batch(keys, TIMESTAMP), 1) / batch_size,
+        'uri': measure(lambda: parse_uri(uri)),
+    }
+    for window in WINDOWS:
+        results[f'verify_w{window}'] = measure(lambda: verify(key, wrong, window, TIMESTAMP))
+    return results
+
+
+def run(algorithms, repeat: int, min_time: float, batch_size: int) -> dict:
+    """Exécute le banc complet et retourne le document JSON des résultats."""
+    results = {}
+    unsupported = {}
+    for algo in algorithms:
+        try:
+            TOTPKey.from_secret(SECRET, algo)
+        except ValueError as e:
+            unsupported[algo] = str(e) or type(e).__name__
+            print(f"{algo:<12} non supporté : {unsupported[algo]}")
+            continue
+        for digits in DIGITS:
+            name = f'{algo}/{digits}'
+            results[name] = bench_algorithm(algo, digits, repeat, min_time, batch_size)
+            print(f"{name:<14} " + ' '.join(f"{op}={ns:,.0f}" for op, ns in results[name].items()))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'algorithms': list(algorithms),
+            'repeat': repeat,
+            'min_time': min_time,
+            'batch_size': batch_size,
+        },
+        'unit': 'ns/op',
+        'results': results,
+        'unsupported': unsupported,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Retourne les régressions de `current` par rapport à `baseline`, sur les algorithmes mesurés."""
+    measured = set(current['meta']['algorithms'])
+    regressions = []
+    for name, operations in baseline.get('results', {}).items():
+        if name.split('/')[0] not in measured:
+            continue
+        if name not in current['results']:
+            reason = current['unsupported'].get(name.split('/')[0], 'absent des résultats')
+            regressions.append(f"{name} : {reason}")
+            continue
+        for op, reference in operations.items():
+            value = current['results'][name].get(op)
+            if value is not None and value > reference * (1 + tolerance):
+                regressions.append(f"{name} {op} : {value:,.0f} ns > {reference:,.0f} ns (+{value / reference - 1:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+    parser.add_argument('--baseline', help="Fichier JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Ralentissement relatif toléré (0.25 = 25 %%)")
+    parser.add_argument('--algorithms', help="Liste d'algorithmes séparés par des virgules (par défaut : ceux de l'interface)")
+    parser.add_argument('--quick', action='store_true', help="Moins de répétitions et des lots plus petits")
+    args = parser.parse_args(argv)
+
+    failures = check_vectors()
+    for failure in failures:
+        print(f"ÉCHEC : vecteur {failure}")
+    if failures:
+        return 1
+    print(f"Vecteurs RFC 6238 / 4226 : {len(RFC6238_VECTORS) * len(RFC6238_SEEDS) + len(RFC4226_VECTORS)} corrects")
+
+    names = args.algorithms.split(',') if args.algorithms else algorithms.CANDIDATES
+    if args.quick:
+        current = run(names, 3, 0.01, 100)
+    else:
+        current = run(names, 7, 0.1, BATCH_SIZE)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"ÉCHEC : régression {regression}")
+        if regressions:
+            return 1
+        print(f"Aucune régression par rapport à {args.baseline} (tolérance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Contrôle du temps de recherche par frappe dans l'index des comptes.
+
+    python benchmarks/bench_search.py [--accounts 100000] [--budget-ms 1.0]
+
+Construit un index de comptes synthétiques (émetteurs courants et noms
+aléatoires), puis simule la saisie de requêtes caractère par caractère et
+mesure chaque frappe. Échoue (code de sortie 1) si la médiane dépasse le
+budget.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.search import PrefixIndex
+
+ISSUERS = ('Google', 'GitHub', 'Amazon Web Services', 'Société Générale', 'Microsoft', 'Dropbox', 'Okta')
+QUERIES = ('github', 'amazon web', 'soc gen', 'okta bob', 'micro ali', 'drop carol')
+
+
+def accounts(count: int, seed: int = 0):
+    """Comptes synthétiques : un émetteur parmi quelques centaines, un nom unique."""
+    rng = random.Random(seed)
+    issuers = list(ISSUERS) + [''.join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(500)]
+    for index in range(count):
+        name = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        yield f"account-{index}", (rng.choice(issuers), f"{name}{index}@example.com")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--budget-ms', type=float, default=1.0, help="Médiane maximale tolérée par frappe (ms)")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.add_many(accounts(args.accounts))
+    print(f"index : {args.accounts} comptes en {time.perf_counter() - start:.2f} s")
+
+    timings = []
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            typed = query[:end]
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                found = index.search(typed)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best * 1000)
+            print(f"{typed!r:<14} {len(found):>7} résultats  {best * 1e6:8.1f} µs")
+
+    median = statistics.median(timings)
+    print(f"frappe : médiane {median:.3f} ms | max {max(timings):.3f} ms")
+    if median > args.budget_ms:
+        print(f"ÉCHEC : médiane {median:.3f} ms > budget {args.budget_ms:.3f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Contrôle de non-régression du temps de démarrage de la CLI.
+
+    python benchmarks/bench_startup.py [--budget-ms 40] [--runs 20]
+
+Mesure le meilleur temps de `python -m src.cli generate` moins celui d'un
+interpréteur vide, et échoue (code de sortie 1) si ce surcoût dépasse le
+budget ou si un module lourd (toga, pyperclip, numpy, vues) est importé.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORBIDDEN = ('toga', 'pyperclip', 'numpy', 'src.views', 'src.batch')
+COMMAND = ['-m', 'src.cli', 'generate', 'JBSWY3DPEHPK3PXP']
+
+
+def best_time(arguments: list, runs: int) -> float:
+    """Retourne le meilleur temps (en secondes) de `runs` lancements."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def imported_modules(arguments: list) -> set:
+    """Retourne les modules importés par une commande, d'après -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=ROOT, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return {line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines() if '|' in line}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=40.0, help="Surcoût maximal toléré (ms)")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    baseline = best_time(['-c', 'pass'], args.runs)
+    cli = best_time(COMMAND, args.runs)
+    overhead_ms = (cli - baseline) * 1000
+    print(f"interpréteur : {baseline * 1000:.1f} ms | cli : {cli * 1000:.1f} ms | surcoût : {overhead_ms:.1f} ms")
+
+    failed = False
+    heavy = sorted(m for m in imported_modules(COMMAND) if m.split('.')[0] in FORBIDDEN or m in FORBIDDEN)
+    if heavy:
+        print(f"ÉCHEC : modules lourds importés au démarrage : {', '.join(heavy)}")
+        failed = True
+    if overhead_ms > args.budget_ms:
+        print(f"ÉCHEC : surcoût de démarrage {overhead_ms:.1f} ms > budget {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
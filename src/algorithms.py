@@ -0,0 +1,84 @@
+import hashlib
+import hmac
+
+# Algorithmes proposés dans l'interface (liste déroulante de la fenêtre principale)
+CANDIDATES = (
+    'sha3_512', 'blake2s', 'sm3', 'md5-sha1', 'shake_128', 'sha384', 'sha512_224', 'sha3_384', 'blake2b',
+    'sha1', 'sha256', 'sha512_256', 'sha3_256', 'sha3_224', 'md5', 'sha224', 'sha512', 'ripemd160', 'shake_256',
+)
+
+
+class Algorithm:
+    """Algorithme de hachage utilisable avec HMAC, et ses tailles de bloc et de condensat."""
+
+    __slots__ = ('name', 'digestmod', 'digest_size', 'block_size')
+
+    def __init__(self, name: str, digestmod, digest_size: int, block_size: int):
+        self.name = name
+        self.digestmod = digestmod
+        self.digest_size = digest_size
+        self.block_size = block_size
+
+    def __repr__(self):
+        return f"Algorithm({self.name!r}, digest_size={self.digest_size}, block_size={self.block_size})"
+
+
+def _probe(name: str):
+    """
+    Vérifie qu'un algorithme fonctionne avec HMAC sur cette installation.
+
+    Le constructeur hashlib est préféré ; à défaut (sm3, ripemd160, md5-sha1...),
+    le nom est transmis tel quel à OpenSSL.
+
+    :return: (Algorithm, None) si l'algorithme est utilisable, (None, raison) sinon
+    """
+    digestmod = getattr(hashlib, name, None) or name
+    try:
+        h = hmac.new(b'probe', b'', digestmod)
+        digest = h.digest()
+    except (ValueError, TypeError) as e:
+        return None, str(e) if str(e) and str(e) != 'no reason supplied' else "inutilisable avec HMAC"
+    if not digest or len(digest) != h.digest_size:
+        # Fonctions à sortie variable (shake_*) : pas de condensat de taille fixe
+        return None, "condensat de taille variable"
+    return Algorithm(name, digestmod, h.digest_size, h.block_size), None
+
+
+def _build():
+    registry = {}
+    unsupported = {}
+    names = list(CANDIDATES) + sorted(set(hashlib.algorithms_available) - set(CANDIDATES))
+    for name in names:
+        algorithm, reason = _probe(name.lower())
+        if algorithm is None:
+            unsupported[name.lower()] = reason
+        else:
+            registry[algorithm.name] = algorithm
+    return registry, unsupported
+
+
+# Table construite une seule fois à l'import
+REGISTRY, UNSUPPORTED = _build()
+# Algorithmes de l'interface réellement utilisables, dans l'ordre de CANDIDATES
+SUPPORTED = tuple(name for name in CANDIDATES if name in REGISTRY)
+
+
+def get(algo: str) -> Algorithm:
+    """
+    Retourne l'algorithme correspondant au nom (insensible à la casse).
+
+    :raise ValueError: si l'algorithme est inconnu ou inutilisable avec HMAC
+    """
+    algorithm = REGISTRY.get(algo) if isinstance(algo, str) else None
+    if algorithm is None:
+        name = str(algo).lower()
+        algorithm = REGISTRY.get(name)
+        if algorithm is None:
+            reason = UNSUPPORTED.get(name)
+            detail = f" ({reason})" if reason else ""
+            raise ValueError(f"Algorithme de hachage non supporté : {algo}{detail}")
+    return algorithm
+
+
+def is_supported(algo: str) -> bool:
+    return str(algo).lower() in REGISTRY
@@ -19,6 +19,12 @@ class TOTPApp(toga.App):
     def startup(self):
         self.main_window = main_window.MainWindow('TOTP Generator', self)
         self.main_window.show()
+        self.on_exit = self.exit_handler
+
+    def exit_handler(self, app, **kwargs):
+        """Efface le presse-papier et arrête les services avant de quitter"""
+        self.main_window.shutdown()
+        return True
 
 if __name__ == '__main__':
     app = TOTPApp(
@@ -0,0 +1,103 @@
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : repli en Python pur
+    np = None
+
+from src import metrics
+from src.totp import as_key, digests_at, truncate
+
+
+def truncate_many(digests: bytes, digest_size: int, digits):
+    """
+    Applique la troncature dynamique à un tampon contigu de condensats HMAC.
+
+    :param digests: Les condensats concaténés (digest_size octets chacun)
+    :param digest_size: La taille d'un condensat
+    :param digits: Le nombre de chiffres (entier commun ou séquence par condensat)
+    :return: Les codes sous forme de tableau uint32 (numpy.ndarray ou array.array)
+    """
+    count = len(digests) // digest_size
+    # Sous 19 octets (md5), la fenêtre de 4 octets peut dépasser la fin du
+    # condensat : le repli scalaire reproduit alors exactement truncate()
+    if np is None or digest_size < 19:
+        if isinstance(digits, int):
+            digits = [digits] * count
+        chunks = (digests[i:i + digest_size] for i in range(0, len(digests), digest_size))
+        codes = array('I', map(truncate, chunks, digits))
+        return codes if np is None else np.array(codes, dtype=np.uint32)
+
+    rows = np.frombuffer(digests, dtype=np.uint8).reshape(count, digest_size)
+    offsets = (rows[:, -1] & 0x0F).astype(np.intp)
+    window = np.take_along_axis(rows, offsets[:, None] + np.arange(4), axis=1).astype(np.uint64)
+    codes = ((window[:, 0] & 0x7F) << 24) | (window[:, 1] << 16) | (window[:, 2] << 8) | window[:, 3]
+    moduli = np.power(np.uint64(10), np.asarray(digits, dtype=np.uint64))
+    return (codes % moduli).astype(np.uint32)
+
+
+def _truncate_grouped(digests: list, digits: list):
+    """Tronque des condensats de tailles éventuellement différentes, dans l'ordre."""
+    if np is None:
+        return array('I', map(truncate, digests, digits))
+
+    groups = {}
+    for index, digest in enumerate(digests):
+        group = groups.get(len(digest))
+        if group is None:
+            group = groups[len(digest)] = []
+        group.append(index)
+
+    if len(groups) == 1:
+        # Cas courant : un seul algorithme, les condensats sont déjà contigus
+        return truncate_many(b''.join(digests), len(digests[0]), digits)
+
+    codes = np.empty(len(digests), dtype=np.uint32)
+    for digest_size, indexes in groups.items():
+        codes[indexes] = truncate_many(b''.join([digests[i] for i in indexes]), digest_size,
+                                       [digits[i] for i in indexes])
+    return codes
+
+
+def generate_batch(secrets, timestamp: float = None, algo: str = 'sha1', digits: int = 6, period: int = 30,
+                   as_array: bool = False):
+    """
+    Génère les codes TOTP d'un lot de clés pour un même horodatage.
+
+    :param secrets: Les clés secrètes Base32 ou des TOTPKey précompilées
+    :param timestamp: L'horodatage commun (par défaut : l'heure actuelle)
+    :param algo: L'algorithme utilisé pour les clés fournies en Base32
+    :param digits: Le nombre de chiffres pour les clés fournies en Base32
+    :param period: La période pour les clés fournies en Base32
+    :param as_array: Retourner un tableau uint32 plutôt qu'une liste de chaînes
+    :return: Les codes, dans l'ordre des clés fournies
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    observer = metrics.active()
+    try:
+        keys = [as_key(secret, algo, digits, period) for secret in secrets]
+    except Exception as e:
+        if observer is not None:
+            observer.error('batch', e)
+        raise
+    if not keys:
+        if as_array:
+            return np.empty(0, dtype=np.uint32) if np is not None else array('I')
+        return []
+
+    key_digits = [key.digits for key in keys]
+    digests = digests_at(keys, timestamp)
+    start = time.perf_counter()
+    codes = _truncate_grouped(digests, key_digits)
+    if observer is not None:
+        observer.observe('totp_batch_seconds', time.perf_counter() - start, stage='truncate')
+    if as_array:
+        return codes
+
+    values = codes.tolist()
+    if min(key_digits) == max(key_digits):
+        fmt = '%0{}d'.format(key_digits[0])
+        return [fmt % value for value in values]
+    return ['%0*d' % pair for pair in zip(key_digits, values)]
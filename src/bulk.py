@@ -0,0 +1,183 @@
+import csv
+import itertools
+import json
+import time
+
+from src.batch import generate_batch
+from src.totp import TOTPKey
+from src.uri import parse_uri
+
+INPUT_FORMATS = ('lines', 'csv', 'jsonl')
+OUTPUT_FORMATS = ('text', 'csv', 'jsonl')
+
+
+def _text(value: str):
+    """
+    Retourne la valeur, ou une ValueError si elle porte des octets non UTF-8
+    (flux ouvert avec errors='surrogateescape').
+    """
+    try:
+        value.encode('utf-8')
+    except UnicodeEncodeError:
+        return ValueError("Encodage invalide : UTF-8 attendu")
+    return value
+
+
+def read_rows(stream, fmt: str = 'lines'):
+    """
+    Lit les entrées une par une depuis un flux texte.
+
+    - lines : une URI otpauth:// (ou une clé Base32) par ligne
+    - csv   : colonne `uri` (ou `secret`) si l'en-tête existe, sinon la première colonne
+    - jsonl : un objet par ligne avec un champ `uri` (ou `secret`), ou une chaîne JSON
+
+    Une ligne mal formée (CSV invalide, octets non UTF-8 lorsque le flux est
+    ouvert avec errors='surrogateescape') produit une erreur pour cette
+    seule ligne.
+
+    :return: Un itérateur de (numéro de ligne, valeur ou exception)
+    """
+    if fmt == 'lines':
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if line:
+                yield number, _text(line)
+    elif fmt == 'csv':
+        reader = csv.reader(stream)
+        column = 0
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # Le lecteur repart de la ligne suivante
+                yield reader.line_num, ValueError(f"CSV invalide : {e}")
+                continue
+            if not row:
+                continue
+            header = [cell.strip().lower() for cell in row]
+            if reader.line_num == 1 and ('uri' in header or 'secret' in header):
+                column = header.index('uri') if 'uri' in header else header.index('secret')
+                continue
+            if column >= len(row):
+                yield reader.line_num, ValueError("Colonne manquante")
+            else:
+                yield reader.line_num, _text(row[column].strip())
+    elif fmt == 'jsonl':
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, ValueError("JSON invalide")
+                continue
+            if isinstance(record, dict):
+                record = record.get('uri') or record.get('secret')
+            if not isinstance(record, str):
+                yield number, ValueError("Champ uri manquant")
+            else:
+                yield number, _text(record.strip())
+    else:
+        raise ValueError(f"Format d'entrée inconnu : {fmt}")
+
+
+def parse_entry(value: str, algo: str = 'sha1', digits: int = 6, period: int = 30):
+    """Retourne (clé, émetteur, nom) pour une URI otpauth:// ou une clé Base32."""
+    if value[:10].lower() == 'otpauth://':
+        record = parse_uri(value)
+        if record.type != 'totp':
+            raise ValueError("Seules les URI otpauth://totp/ sont prises en charge")
+        return record.to_key(), record.issuer, record.name
+    return TOTPKey.from_secret(value, algo, digits, period), '', ''
+
+
+class _Writer:
+    """
+    Écrit les résultats au fil de l'eau dans le format demandé. Le format
+    text produit une ligne par entrée, dans l'ordre : numéro de ligne,
+    libellé (émetteur:nom, ou -) et code, ou ERREUR suivi du message ;
+    les formats csv et jsonl ne portent que les codes.
+    """
+
+    def __init__(self, out, fmt: str):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Format de sortie inconnu : {fmt}")
+        self.out = out
+        self.fmt = fmt
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.writer(out, lineterminator='\n')
+            self._csv.writerow(['line', 'issuer', 'name', 'code'])
+
+    def write(self, rows: list):
+        """:param rows: Les (numéro de ligne, émetteur, nom, code, erreur) ; code vaut None en cas d'erreur"""
+        if self.fmt == 'text':
+            self.out.write(''.join(
+                f"{line}\tERREUR\t{error}\n" if code is None else
+                f"{line}\t{':'.join(filter(None, (issuer, name))) or '-'}\t{code}\n"
+                for line, issuer, name, code, error in rows
+            ))
+        elif self.fmt == 'csv':
+            self._csv.writerows(row[:4] for row in rows if row[3] is not None)
+        else:
+            self.out.write(''.join(
+                json.dumps({'line': line, 'issuer': issuer, 'name': name, 'code': code}) + '\n'
+                for line, issuer, name, code, _ in rows if code is not None
+            ))
+
+
+def stream_codes(stream, out, fmt: str = 'lines', out_fmt: str = 'text', errors=None, batch_size: int = 1024,
+                 at: float = None, algo: str = 'sha1', digits: int = 6, period: int = 30) -> dict:
+    """
+    Génère les codes d'une liste de comptes en flux : les entrées sont lues
+    par lots de `batch_size`, chaque lot est évalué à un horodatage commun et
+    écrit immédiatement, de sorte que la mémoire reste constante.
+
+    :param stream: Le flux d'entrée (fichier texte ou sys.stdin)
+    :param out: Le flux de sortie
+    :param fmt: Le format d'entrée (lines, csv, jsonl)
+    :param out_fmt: Le format de sortie (text, csv, jsonl)
+    :param errors: Le flux recevant les lignes en erreur (JSONL), ou None pour les ignorer
+    :param batch_size: Le nombre d'entrées évaluées par lot
+    :param at: L'horodatage à utiliser (par défaut : l'heure actuelle, relue à chaque lot)
+    :param algo: L'algorithme utilisé pour les clés Base32 brutes
+    :param digits: Le nombre de chiffres pour les clés Base32 brutes
+    :param period: La période pour les clés Base32 brutes
+    :return: Les compteurs {'rows', 'codes', 'errors'}
+    """
+    writer = _Writer(out, out_fmt)
+    stats = {'rows': 0, 'codes': 0, 'errors': 0}
+    rows = read_rows(stream, fmt)
+
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk:
+            break
+        stats['rows'] += len(chunk)
+
+        results, keys = [], []
+        for number, value in chunk:
+            try:
+                if isinstance(value, Exception):
+                    raise value
+                key, issuer, name = parse_entry(value, algo, digits, period)
+            except ValueError as e:
+                stats['errors'] += 1
+                if errors is not None:
+                    errors.write(json.dumps({'line': number, 'error': str(e)}) + '\n')
+                results.append((number, '', '', None, str(e)))
+                continue
+            results.append([number, issuer, name, len(keys), None])
+            keys.append(key)
+
+        if keys:
+            codes = generate_batch(keys, time.time() if at is None else at)
+            for row in results:
+                if row[4] is None:
+                    row[3] = codes[row[3]]
+            stats['codes'] += len(codes)
+        writer.write(results)
+    return stats
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.totp import RAW_KEY_TYPES, TOTPKey, as_key, key_fingerprint, normalize_secret
+
+
+def secret_fingerprint(secret_key, algo: str = 'sha1', digits: int = 6, period: int = 30) -> bytes:
+    """
+    Empreinte SHA-256 d'une clé et de ses paramètres, calculée sans décoder
+    la clé : le texte Base32 est ramené à sa forme canonique avec les règles
+    de decode_secret (normalize_secret), les octets bruts sont pris tels
+    quels (comme TOTPKey.fingerprint).
+    """
+    if isinstance(secret_key, RAW_KEY_TYPES):
+        return key_fingerprint(secret_key, algo, digits, period)
+    normalized = normalize_secret(secret_key)
+    return hashlib.sha256(f'b32:{algo.lower()}:{int(digits)}:{int(period)}:{normalized}'.encode('utf-8')).digest()
+
+
+class CodeCache:
+    """
+    Cache LRU borné des codes générés, indexé par (empreinte, algorithme,
+    chiffres, compteur). Une entrée expire dès que son compteur est dépassé
+    (plus une marge optionnelle de `grace` périodes).
+
+    Les secrets passés à generate sont indexés par un condensat BLAKE2b à
+    clé aléatoire, propre au cache : ni le secret ni une empreinte
+    exploitable hors du processus ne sont conservés, et un succès coûte
+    moins qu'un calcul HMAC.
+    """
+
+    def __init__(self, maxsize: int = 1024, grace: int = 0, clock=time.time):
+        """
+        :param maxsize: Le nombre maximal d'entrées conservées
+        :param grace: Le nombre de périodes pendant lesquelles une entrée reste valide après son compteur
+        :param clock: La source de temps utilisée pour l'expiration
+        """
+        if maxsize <= 0:
+            raise ValueError("La taille du cache doit être positive")
+        self.maxsize = maxsize
+        self.grace = grace
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._secret_hash = hashlib.blake2b(key=os.urandom(16), digest_size=16)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Retourne les compteurs du cache."""
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def clear(self):
+        """Vide le cache sans réinitialiser les compteurs."""
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, entry: tuple, now: float):
+        with self._lock:
+            cached = self._entries.get(entry)
+            if cached is not None:
+                code, expires = cached
+                if now < expires:
+                    self._entries.move_to_end(entry)
+                    self.hits += 1
+                    return code
+                del self._entries[entry]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def _store(self, entry: tuple, code: str, expires: float, now: float):
+        with self._lock:
+            self._entries[entry] = (code, expires)
+            self._entries.move_to_end(entry)
+            # Les entrées les plus anciennes sont en tête : purge des expirées
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if now < oldest[1]:
+                    break
+                self._entries.popitem(last=False)
+                self.expirations += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def code_at(self, key: TOTPKey, counter: int, now: float = None, grace: int = None) -> str:
+        """
+        Retourne le code d'une clé précompilée pour un compteur, depuis le cache si possible.
+
+        :param key: La TOTPKey précompilée
+        :param counter: Le compteur
+        :param now: L'horodatage de référence pour l'expiration (par défaut : l'horloge du cache)
+        :param grace: La marge d'expiration en périodes (par défaut : celle du cache)
+        :return: Le code sous forme de chaîne de caractères
+        """
+        if now is None:
+            now = self.clock()
+        entry = (key.fingerprint, key.algo, key.digits, counter)
+        code = self._lookup(entry, now)
+        if code is None:
+            code = key.code_at(counter)
+            margin = self.grace if grace is None else grace
+            self._store(entry, code, key.t0 + (counter + 1 + margin) * key.period, now)
+        return code
+
+    def generate(self, secret_key: str, algo: str = 'sha1', digits: int = 6, period: int = 30,
+                 at: float = None) -> str:
+        """
+        Équivalent mis en cache de generate_totp_secret : la clé n'est décodée
+        qu'en cas d'absence dans le cache, puis effacée.
+
+        :param secret_key: La clé secrète en Base32, ses octets bruts ou une TOTPKey précompilée
+        :param algo: L'algorithme de hachage à utiliser (sha1, sha256, sha512)
+        :param digits: Le nombre de chiffres de la clé TOTP (par défaut : 6)
+        :param period: La période de temps pour la clé TOTP (par défaut : 30 secondes)
+        :param at: L'horodatage du code (par défaut : l'horloge du cache)
+        :return: La clé TOTP sous forme de chaîne de caractères
+        """
+        if not isinstance(algo, str):
+            raise TypeError(f"L'algorithme doit être une chaîne de caractères, pas {type(algo).__name__}")
+        period = int(period)
+        if period <= 0:
+            raise ValueError("La période doit être positive")
+        now = self.clock() if at is None else at
+        if isinstance(secret_key, TOTPKey):
+            return self.code_at(secret_key, secret_key.counter_at(now), now)
+        if isinstance(secret_key, str):
+            material = secret_key.encode('utf-8')
+        elif isinstance(secret_key, RAW_KEY_TYPES):
+            material = secret_key
+        else:
+            # Enregistrement exposant to_key() : la clé construite est effacée après usage
+            with as_key(secret_key, algo, digits, period) as key:
+                return self.code_at(key, key.counter_at(now), now)
+
+        h = self._secret_hash.copy()
+        h.update(material)
+        counter = int(now // period)
+        entry = (h.digest(), algo, digits, period, counter)
+        code = self._lookup(entry, now)
+        if code is None:
+            key = None
+            try:
+                key = as_key(secret_key, algo, digits, period)
+                code = key.code_at(counter)
+            except ValueError:
+                raise
+            except Exception as e:
+                raise ValueError(f"Erreur lors de la génération du code TOTP: {str(e)}")
+            finally:
+                # Les octets bruts appartiennent à l'appelant : seule une clé décodée ici est effacée
+                if key is not None and isinstance(secret_key, str):
+                    key.wipe()
+            self._store(entry, code, (counter + 1 + self.grace) * period, now)
+        return code
@@ -0,0 +1,287 @@
+"""
+Point d'entrée en ligne de commande, sans interface graphique.
+
+    python -m src.cli generate <secret|otpauth://...> [--counter N]
+    python -m src.cli verify <secret|otpauth://...> <code> [--counter N]
+    python -m src.cli batch [fichier|-]
+    python -m src.cli provision <nombre> [--format uri|jsonl|vault] [--workers N]
+    python -m src.cli import [fichier|-] [--format uri|jsonl|vault]
+    python -m src.cli vault init|add|code|list|remove|compact <coffre> ...
+
+Seuls des modules de la bibliothèque standard sont importés au démarrage ;
+l'analyse d'URI, le calcul par lots, la lecture en flux (CSV/JSONL) et
+l'import des exports de migration sont chargés à la demande.
+"""
+import argparse
+import sys
+import time
+
+from src.totp import TOTPKey
+
+
+def _key_from(value: str, args):
+    """
+    Construit la clé depuis une clé Base32 ou une URI otpauth://.
+
+    :return: (clé, compteur HOTP) ; le compteur vaut None pour une clé TOTP
+    """
+    value = value.strip()
+    if value[:10].lower() == 'otpauth://':
+        from src.uri import parse_uri
+        record = parse_uri(value)
+        counter = record.counter if record.type == 'hotp' else None
+        if args.counter is not None and counter is not None:
+            counter = args.counter
+        return record.to_key(), counter
+    return TOTPKey.from_secret(value, args.algo, args.digits, args.period), args.counter
+
+
+def _timestamp(args) -> float:
+    return time.time() if args.at is None else args.at
+
+
+def cmd_generate(args) -> int:
+    key, counter = _key_from(args.secret, args)
+    if counter is not None:
+        from src.hotp import hotp
+        print(hotp(key, counter))
+    else:
+        print(key.at(_timestamp(args)))
+    return 0
+
+
+def cmd_verify(args) -> int:
+    key, counter = _key_from(args.secret, args)
+    if counter is not None:
+        from src.hotp import verify_hotp
+        following = verify_hotp(key, args.code, counter, args.window)
+        if following is None:
+            print("invalide")
+            return 1
+        print(f"valide (compteur suivant {following})")
+        return 0
+
+    from src.verify import verify
+    offset = verify(key, args.code, args.window, _timestamp(args))
+    if offset is None:
+        print("invalide")
+        return 1
+    print(f"valide (décalage {offset:+d})")
+    return 0
+
+
+def cmd_batch(args) -> int:
+    from src.bulk import stream_codes
+    # Les octets non UTF-8 sont conservés pour être signalés ligne par ligne (voir bulk.read_rows)
+    if args.file in (None, '-'):
+        stream = sys.stdin
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(errors='surrogateescape')
+    else:
+        stream = open(args.file, 'r', encoding='utf-8', errors='surrogateescape', newline='')
+    errors = open(args.errors, 'w', encoding='utf-8') if args.errors else None
+    try:
+        stats = stream_codes(stream, sys.stdout, args.format, args.output_format, errors, args.batch_size,
+                             args.at, args.algo, args.digits, args.period)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if errors is not None:
+            errors.close()
+    if stats['errors']:
+        print(f"{stats['errors']} ligne(s) en erreur sur {stats['rows']}", file=sys.stderr)
+    return 0
+
+
+def cmd_provision(args) -> int:
+    from src.provision import provision
+    vault = out = None
+    if args.format == 'vault':
+        if not args.vault:
+            raise ValueError("--vault est requis pour le format vault")
+        from src.vault import Vault
+        vault = Vault(args.vault, _vault_password())
+    else:
+        out = sys.stdout if args.output in (None, '-') else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = provision(args.count, out, args.format, args.issuer, args.name_format, args.start, args.algo,
+                          args.digits, args.period, args.size, args.block_size, args.workers, not args.no_verify,
+                          vault)
+    finally:
+        if vault is not None:
+            vault.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    rate = stats['secrets'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"{stats['secrets']} secret(s) en {stats['seconds']:.2f} s ({rate:,.0f}/s)", file=sys.stderr)
+    return 0
+
+
+def cmd_import(args) -> int:
+    import json
+    from src.migration import iter_accounts
+    vault = out = None
+    if args.format == 'vault':
+        if not args.vault:
+            raise ValueError("--vault est requis pour le format vault")
+        from src.vault import Vault, VaultRecord
+        vault = Vault(args.vault, _vault_password())
+    else:
+        out = sys.stdout if args.output in (None, '-') else open(args.output, 'w', encoding='utf-8')
+    stream = sys.stdin if args.file in (None, '-') else open(args.file, 'r', encoding='utf-8')
+    imported = 0
+    pending = []
+    try:
+        for index, account in enumerate(iter_accounts(stream), args.start):
+            imported += 1
+            if vault is not None:
+                account_id = args.account_format.format(index=index, issuer=account.issuer, name=account.name)
+                pending.append(VaultRecord.from_uri(account_id, account))
+                if len(pending) >= args.batch_size:
+                    vault.put_many(pending)
+                    pending.clear()
+            elif args.format == 'jsonl':
+                out.write(json.dumps(account.as_dict(), ensure_ascii=False) + '\n')
+            else:
+                out.write(account.to_uri() + '\n')
+        if pending:
+            vault.put_many(pending)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if vault is not None:
+            vault.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    print(f"{imported} compte(s) importé(s)", file=sys.stderr)
+    return 0
+
+
+def _vault_password() -> str:
+    """Mot de passe du coffre : variable TOTP_VAULT_PASSWORD, sinon saisie masquée."""
+    import os
+    password = os.environ.get('TOTP_VAULT_PASSWORD')
+    if password is None:
+        import getpass
+        password = getpass.getpass("Mot de passe du coffre : ")
+    return password
+
+
+def cmd_vault(args) -> int:
+    from src.vault import Vault, VaultRecord
+    if args.action == 'init':
+        Vault.create(args.path, _vault_password()).close()
+        return 0
+
+    with Vault(args.path, _vault_password()) as vault:
+        if args.action == 'add':
+            from src.uri import parse_uri
+            if args.value.strip()[:10].lower() == 'otpauth://':
+                record = VaultRecord.from_uri(args.account, parse_uri(args.value))
+            else:
+                record = VaultRecord(args.account, args.value, args.algo, args.digits, args.period)
+            record.to_key()  # Valide la clé avant de l'enregistrer
+            vault.put(record)
+        elif args.action == 'remove':
+            try:
+                vault.delete(args.account)
+            except KeyError:
+                raise ValueError(f"Compte inconnu : {args.account}")
+        elif args.action == 'code':
+            try:
+                record = vault.get(args.account)
+            except KeyError:
+                raise ValueError(f"Compte inconnu : {args.account}")
+            print(record.to_key().at(_timestamp(args)))
+        elif args.action == 'list':
+            for record in vault.records():
+                print(f"{record.account_id}\t{record.issuer}\t{record.name}")
+        elif args.action == 'compact':
+            vault.compact()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description="Générateur TOTP en ligne de commande")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--algo', default='sha1', help="Algorithme de hachage (défaut : sha1)")
+    common.add_argument('--digits', type=int, default=6, help="Nombre de chiffres (défaut : 6)")
+    common.add_argument('--period', type=int, default=30, help="Période en secondes (défaut : 30)")
+    common.add_argument('--at', type=float, help="Horodatage Unix à utiliser à la place de l'heure actuelle")
+    common.add_argument('--counter', type=int, help="Compteur HOTP (RFC 4226) ; remplace celui d'une URI otpauth://hotp/")
+
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', parents=[common], help="Affiche le code courant")
+    generate.add_argument('secret', help="Clé Base32 ou URI otpauth://")
+    generate.set_defaults(func=cmd_generate)
+
+    verify = commands.add_parser('verify', parents=[common], help="Vérifie un code")
+    verify.add_argument('secret', help="Clé Base32 ou URI otpauth://")
+    verify.add_argument('code', help="Code à vérifier")
+    verify.add_argument('--window', type=int, default=1,
+                        help="Tolérance en périodes, ou compteurs au-delà du compteur attendu en HOTP (défaut : 1)")
+    verify.set_defaults(func=cmd_verify)
+
+    batch = commands.add_parser('batch', parents=[common], help="Génère les codes d'un fichier de comptes")
+    batch.add_argument('file', nargs='?', help="Fichier d'entrée (défaut : entrée standard)")
+    batch.add_argument('--format', default='lines', choices=['lines', 'csv', 'jsonl'], help="Format d'entrée")
+    batch.add_argument('--output-format', default='text', choices=['text', 'csv', 'jsonl'], help="Format de sortie")
+    batch.add_argument('--errors', help="Fichier JSONL recevant les lignes en erreur")
+    batch.add_argument('--batch-size', type=int, default=1024, help="Entrées évaluées par lot (défaut : 1024)")
+    batch.set_defaults(func=cmd_batch)
+
+    provision = commands.add_parser('provision', parents=[common], help="Crée des secrets en masse")
+    provision.add_argument('count', type=int, help="Nombre de secrets à créer")
+    provision.add_argument('--format', default='uri', choices=['uri', 'jsonl', 'vault'], help="Format de sortie")
+    provision.add_argument('--output', help="Fichier de sortie (défaut : sortie standard)")
+    provision.add_argument('--vault', help="Coffre recevant les comptes (format vault)")
+    provision.add_argument('--issuer', default='', help="Émetteur inscrit dans les URI")
+    provision.add_argument('--name-format', default='user{index}', help="Modèle du nom de compte (défaut : user{index})")
+    provision.add_argument('--start', type=int, default=0, help="Numéro du premier compte")
+    provision.add_argument('--size', type=int, default=20, help="Taille des secrets en octets (défaut : 20)")
+    provision.add_argument('--block-size', type=int, default=4096, help="Secrets tirés par bloc (défaut : 4096)")
+    provision.add_argument('--workers', type=int, default=1, help="Nombre de processus (défaut : 1)")
+    provision.add_argument('--no-verify', action='store_true', help="Désactive l'auto-vérification des secrets")
+    provision.set_defaults(func=cmd_provision)
+
+    migrate = commands.add_parser('import', help="Importe un export otpauth-migration:// (Google Authenticator)")
+    migrate.add_argument('file', nargs='?', help="Fichier contenant les URI d'export (défaut : entrée standard)")
+    migrate.add_argument('--format', default='uri', choices=['uri', 'jsonl', 'vault'], help="Format de sortie")
+    migrate.add_argument('--output', help="Fichier de sortie (défaut : sortie standard)")
+    migrate.add_argument('--vault', help="Coffre recevant les comptes (format vault)")
+    migrate.add_argument('--account-format', default='import{index}',
+                         help="Modèle de l'identifiant dans le coffre ({index}, {issuer}, {name} ; défaut : import{index})")
+    migrate.add_argument('--start', type=int, default=0, help="Numéro du premier compte")
+    migrate.add_argument('--batch-size', type=int, default=1024, help="Comptes écrits par lot dans le coffre (défaut : 1024)")
+    migrate.set_defaults(func=cmd_import)
+
+    vault = commands.add_parser('vault', help="Gère un coffre de comptes chiffré")
+    actions = vault.add_subparsers(dest='action', required=True)
+    for action, text in (('init', "Crée un coffre vide"), ('list', "Liste les comptes"),
+                         ('compact', "Réécrit le coffre sans les données obsolètes")):
+        sub = actions.add_parser(action, help=text)
+        sub.add_argument('path', help="Fichier du coffre")
+    add = actions.add_parser('add', parents=[common], help="Ajoute ou remplace un compte")
+    add.add_argument('path', help="Fichier du coffre")
+    add.add_argument('account', help="Identifiant du compte")
+    add.add_argument('value', help="Clé Base32 ou URI otpauth://")
+    for action, text in (('code', "Affiche le code d'un compte"), ('remove', "Supprime un compte")):
+        sub = actions.add_parser(action, parents=[common], help=text)
+        sub.add_argument('path', help="Fichier du coffre")
+        sub.add_argument('account', help="Identifiant du compte")
+    vault.set_defaults(func=cmd_vault)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, OSError, RuntimeError) as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
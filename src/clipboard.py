@@ -0,0 +1,340 @@
+import asyncio
+import sys
+import threading
+
+# Durée par défaut avant l'effacement automatique d'un code copié (secondes)
+DEFAULT_TTL = 30.0
+# Durée d'affichage de la confirmation de copie (secondes)
+NOTICE_DURATION = 2.0
+
+
+class ClipboardBackend:
+    """Accès à un presse-papier : copy() et paste() ; clear() n'efface que le texte attendu."""
+
+    name = 'backend'
+
+    def copy(self, text: str):
+        raise NotImplementedError
+
+    def paste(self) -> str:
+        raise NotImplementedError
+
+    def clear(self, expected: str = None):
+        """
+        Vide le presse-papier, seulement s'il contient encore `expected` (si
+        donné) : un texte copié entre-temps par l'utilisateur est conservé.
+        """
+        if expected is None or self.paste() == expected:
+            self.copy('')
+
+
+class FakeClipboard(ClipboardBackend):
+    """Presse-papier en mémoire, pour les tests et les environnements sans affichage."""
+
+    name = 'fake'
+
+    def __init__(self, text: str = ''):
+        self.text = text
+        self.history = []
+
+    def copy(self, text: str):
+        self.text = text
+        self.history.append(text)
+
+    def paste(self) -> str:
+        return self.text
+
+
+class GtkClipboard(ClipboardBackend):
+    """Presse-papier GTK, dans le processus (backend toga-gtk)."""
+
+    name = 'gtk'
+
+    def __init__(self):
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from gi.repository import Gdk, Gtk
+        self._clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+
+    def copy(self, text: str):
+        self._clipboard.set_text(text, -1)
+        self._clipboard.store()
+
+    def paste(self) -> str:
+        """Lecture bloquante (boucle GTK imbriquée) : à éviter depuis la boucle de l'interface."""
+        return self._clipboard.wait_for_text() or ''
+
+    def clear(self, expected: str = None):
+        if expected is None:
+            self.copy('')
+            return
+        # Lecture asynchrone : l'effacement programmé ne bloque pas la boucle
+        # en attendant le propriétaire du presse-papier
+        def received(clipboard, text, *data):
+            if text == expected:
+                self.copy('')
+        self._clipboard.request_text(received)
+
+
+class CocoaClipboard(ClipboardBackend):
+    """NSPasteboard, dans le processus (backend toga-cocoa)."""
+
+    name = 'cocoa'
+    TEXT_TYPE = 'public.utf8-plain-text'
+
+    def __init__(self):
+        from rubicon.objc import ObjCClass
+        self._pasteboard = ObjCClass('NSPasteboard').generalPasteboard
+
+    def copy(self, text: str):
+        self._pasteboard.clearContents()
+        if text:
+            self._pasteboard.setString(text, forType=self.TEXT_TYPE)
+
+    def paste(self) -> str:
+        text = self._pasteboard.stringForType(self.TEXT_TYPE)
+        return str(text) if text is not None else ''
+
+
+class WinFormsClipboard(ClipboardBackend):
+    """System.Windows.Forms.Clipboard, dans le processus (backend toga-winforms)."""
+
+    name = 'winforms'
+
+    def __init__(self):
+        from System.Windows.Forms import Clipboard
+        self._clipboard = Clipboard
+
+    def copy(self, text: str):
+        if text:
+            self._clipboard.SetText(text)
+        else:
+            self._clipboard.Clear()
+
+    def paste(self) -> str:
+        return str(self._clipboard.GetText() or '')
+
+
+class PyperclipClipboard(ClipboardBackend):
+    """
+    pyperclip : portable, mais lance un sous-processus (xclip, xsel...) à
+    chaque appel sous Linux ; à utiliser derrière un ThreadedClipboard.
+    """
+
+    name = 'pyperclip'
+
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def copy(self, text: str):
+        self._pyperclip.copy(text)
+
+    def paste(self) -> str:
+        return self._pyperclip.paste() or ''
+
+
+class ThreadedClipboard(ClipboardBackend):
+    """
+    Exécute les opérations d'un presse-papier lent sur un unique fil de
+    travail, démarré une fois : l'appelant ne bloque jamais. Chaque
+    opération fixe entièrement l'état du presse-papier, donc seule la
+    dernière opération en attente est exécutée (les précédentes sont
+    remplacées).
+    """
+
+    def __init__(self, backend: ClipboardBackend, on_error=None):
+        """
+        :param backend: Le presse-papier à appeler depuis le fil de travail
+        :param on_error: callback(exception) appelé depuis le fil de travail en cas d'échec
+        """
+        self.backend = backend
+        self.name = f"{backend.name} (thread)"
+        self.on_error = on_error
+        self._pending = None
+        self._text = ''
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='clipboard', daemon=True)
+        self._thread.start()
+
+    def _submit(self, operation):
+        with self._condition:
+            self._pending = operation
+            self._condition.notify()
+
+    def copy(self, text: str):
+        self._text = text
+        self._submit((self.backend.copy, text))
+
+    def paste(self) -> str:
+        """Retourne le dernier texte copié par ce processus (sans appel bloquant)."""
+        return self._text
+
+    def clear(self, expected: str = None):
+        if expected is not None and self._text != expected:
+            # Un autre texte a été copié depuis : rien à effacer, et surtout pas
+            # de remplacement de la copie encore en attente
+            return
+        self._text = ''
+        self._submit((self.backend.clear, expected))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Attend que l'opération en attente soit exécutée. :return: False si le délai a expiré"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None, timeout)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                operation = self._pending
+                if operation is None:
+                    return
+            function, argument = operation
+            try:
+                function(argument)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            with self._condition:
+                if self._pending is operation:
+                    self._pending = None
+                    self._condition.notify_all()
+
+
+# Presse-papier natif selon le backend Toga chargé
+NATIVE_BACKENDS = {
+    'toga_gtk': GtkClipboard,
+    'toga_cocoa': CocoaClipboard,
+    'toga_winforms': WinFormsClipboard,
+}
+
+
+def native_backend():
+    """Retourne le presse-papier natif du backend Toga en cours d'utilisation, ou None."""
+    for module, backend in NATIVE_BACKENDS.items():
+        if module in sys.modules:
+            try:
+                return backend()
+            except Exception:
+                return None
+    return None
+
+
+def default_backend(on_error=None):
+    """
+    Choisit le presse-papier : l'API native du backend Toga, sinon pyperclip
+    derrière un fil de travail, sinon None.
+    """
+    backend = native_backend()
+    if backend is not None:
+        return backend
+    try:
+        return ThreadedClipboard(PyperclipClipboard(), on_error)
+    except ImportError:
+        return None
+
+
+class ClipboardService:
+    """
+    Copie des codes sans bloquer l'interface : le presse-papier est effacé
+    automatiquement après `ttl` secondes (s'il contient toujours le code),
+    et la confirmation est une notification non modale, regroupée lorsque
+    plusieurs copies se suivent.
+    """
+
+    def __init__(self, backend: ClipboardBackend, loop=None, ttl: float = DEFAULT_TTL, on_notice=None,
+                 notice_duration: float = NOTICE_DURATION):
+        """
+        :param backend: Le presse-papier (voir default_backend ; FakeClipboard pour les tests)
+        :param loop: La boucle asyncio (par défaut : la boucle courante à la première copie)
+        :param ttl: Le délai d'effacement automatique en secondes (0 ou None : jamais)
+        :param on_notice: callback(message) affichant la confirmation ; appelé avec '' pour la masquer
+        :param notice_duration: La durée d'affichage de la confirmation
+        """
+        self.backend = backend
+        self.loop = loop
+        self.ttl = ttl
+        self.on_notice = on_notice
+        self.notice_duration = notice_duration
+        self.copies = 0
+        self._copied = None
+        self._expiry = None
+        self._notice = None
+        self._notice_pending = False
+        self._hide = None
+
+    def copy(self, text: str, ttl: float = None):
+        """
+        Copie un texte et programme son effacement.
+
+        :param text: Le texte à copier
+        :param ttl: Le délai d'effacement pour cette copie (par défaut : celui du service)
+        """
+        if self.backend is None:
+            raise RuntimeError("Aucun presse-papier disponible")
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        self.backend.copy(text)
+        self._copied = text
+        self.copies += 1
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        ttl = self.ttl if ttl is None else ttl
+        if ttl:
+            self._expiry = self.loop.call_later(ttl, self._expire, text)
+        self._notify(ttl)
+
+    def _expire(self, text: str):
+        self._expiry = None
+        self._copied = None
+        self.backend.clear(text)
+
+    def clear(self):
+        """Efface immédiatement le dernier code copié (s'il est toujours dans le presse-papier)."""
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        if self._copied is not None:
+            self.backend.clear(self._copied)
+            self._copied = None
+
+    def close(self):
+        """Efface le code en attente et annule les rappels programmés (à la fermeture de l'application)."""
+        self.clear()
+        if self._hide is not None:
+            self._hide.cancel()
+            self._hide = None
+        if isinstance(self.backend, ThreadedClipboard):
+            self.backend.flush(1.0)
+
+    # -- Confirmation ---------------------------------------------------------
+
+    def _notify(self, ttl: float):
+        if self.on_notice is None:
+            return
+        self._notice = f"Code copié, effacé dans {ttl:g} s" if ttl else "Code copié"
+        # Plusieurs copies dans la même itération de la boucle : une seule notification
+        if not self._notice_pending:
+            self._notice_pending = True
+            self.loop.call_soon(self._show)
+
+    def _show(self):
+        self._notice_pending = False
+        self.on_notice(self._notice)
+        # Une copie pendant l'affichage prolonge la notification existante
+        if self._hide is not None:
+            self._hide.cancel()
+        self._hide = self.loop.call_later(self.notice_duration, self._hide_notice)
+
+    def _hide_notice(self):
+        self._hide = None
+        self.on_notice('')
@@ -0,0 +1,139 @@
+import heapq
+import itertools
+import time
+
+
+class SystemClock:
+    """Horloge murale (time.time) ; utilisable partout où une source de temps est attendue."""
+
+    def __call__(self) -> float:
+        return time.time()
+
+    def __repr__(self):
+        return "SystemClock()"
+
+
+class FrozenClock:
+    """Horloge arrêtée : retourne toujours le même horodatage (tests, lots à horodatage commun)."""
+
+    def __init__(self, timestamp: float):
+        self.timestamp = timestamp
+
+    def __call__(self) -> float:
+        return self.timestamp
+
+    def set(self, timestamp: float):
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"FrozenClock({self.timestamp!r})"
+
+
+class OffsetClock:
+    """
+    Horloge corrigée d'un décalage constant : par exemple l'écart mesuré
+    avec un serveur de référence, ou la dérive connue d'un appareil.
+    """
+
+    def __init__(self, offset: float = 0.0, source=time.time):
+        """
+        :param offset: Le décalage ajouté à la source (secondes)
+        :param source: L'horloge corrigée
+        """
+        self.offset = offset
+        self.source = source
+
+    @classmethod
+    def from_reference(cls, reference: float, source=time.time) -> 'OffsetClock':
+        """Construit l'horloge qui donnait `reference` à l'instant présent de la source."""
+        return cls(reference - source(), source)
+
+    def __call__(self) -> float:
+        return self.source() + self.offset
+
+    def __repr__(self):
+        return f"OffsetClock(offset={self.offset!r})"
+
+
+class _Timer:
+    __slots__ = ('when', 'callback', 'args', 'cancelled')
+
+    def __init__(self, when: float, callback, args: tuple):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SimulatedClock:
+    """
+    Horloge simulée : le temps n'avance que par advance() ou advance_to(),
+    instantanément. Elle porte ses propres minuteries (call_at, call_later) :
+    en avançant, chaque minuterie échue est déclenchée à son échéance exacte,
+    dans l'ordre, l'horloge indiquant alors cette échéance. Des milliers de
+    périodes s'enchaînent ainsi sans attendre le temps réel.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._timers = []
+        self._sequence = itertools.count()  # départage des échéances égales : ordre de programmation
+
+    def __call__(self) -> float:
+        return self.now
+
+    def __repr__(self):
+        return f"SimulatedClock({self.now!r})"
+
+    def call_at(self, when: float, callback, *args) -> _Timer:
+        """Programme callback(*args) à l'horodatage simulé `when`. :return: Une minuterie annulable (cancel)"""
+        timer = _Timer(when, callback, args)
+        heapq.heappush(self._timers, (when, next(self._sequence), timer))
+        return timer
+
+    def call_later(self, delay: float, callback, *args) -> _Timer:
+        return self.call_at(self.now + delay, callback, *args)
+
+    def pending(self) -> int:
+        """Retourne le nombre de minuteries programmées et non annulées."""
+        return sum(not timer.cancelled for _, _, timer in self._timers)
+
+    def advance_to(self, timestamp: float) -> int:
+        """
+        Avance jusqu'à `timestamp` en déclenchant les minuteries échues,
+        y compris celles qu'elles programment elles-mêmes avant cette limite.
+
+        :return: Le nombre de minuteries déclenchées
+        """
+        if timestamp < self.now:
+            raise ValueError("L'horloge simulée ne peut pas reculer")
+        fired = 0
+        timers = self._timers
+        while timers and timers[0][0] <= timestamp:
+            when, _, timer = heapq.heappop(timers)
+            if timer.cancelled:
+                continue
+            self.now = max(self.now, when)
+            timer.callback(*timer.args)
+            fired += 1
+        self.now = timestamp
+        return fired
+
+    def advance(self, seconds: float) -> int:
+        """Avance de `seconds` secondes. :return: Le nombre de minuteries déclenchées"""
+        return self.advance_to(self.now + seconds)
+
+
+def tick(clock=time.time) -> FrozenClock:
+    """
+    Lit une horloge une seule fois et retourne une horloge arrêtée sur cette
+    lecture : tous les calculs d'un même passage partagent alors le même
+    horodatage et ne peuvent pas chevaucher une limite de période.
+    """
+    return FrozenClock(clock())
+
+
+SYSTEM = SystemClock()
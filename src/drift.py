@@ -0,0 +1,263 @@
+import argparse
+import random
+import time
+from array import array
+from collections import deque
+
+from src.replay import ReplayGuard
+from src.totp import TOTPKey
+from src.verify import match_code, window_offsets
+
+# Décalage maximal mémorisé (en périodes) : un octet signé par compte
+MAX_DRIFT = 127
+
+
+def code_table(key: TOTPKey, first: int, last: int) -> dict:
+    """
+    Précalcule les codes d'une plage de compteurs.
+
+    :return: Un dictionnaire code -> compteurs [first, last] qui le produisent
+    """
+    table = {}
+    for counter in range(max(0, first), last + 1):
+        table.setdefault(key.code_at(counter), []).append(counter)
+    return table
+
+
+def estimate_offset(key: TOTPKey, submissions, search: int = 10, minimum: int = 2):
+    """
+    Estime le décalage d'horloge d'un appareil à partir de codes soumis : une
+    seule table couvre tous les compteurs plausibles des soumissions, puis
+    chaque code y est cherché en temps constant.
+
+    :param key: La TOTPKey du compte
+    :param submissions: Les couples (horodatage du serveur, code soumis) récents
+    :param search: Le décalage maximal recherché (en périodes, de part et d'autre)
+    :param minimum: Le nombre de codes distincts qui doivent s'accorder sur le même décalage
+    :return: Le décalage (en périodes) retenu, ou None si aucun n'est assez soutenu
+    """
+    # Un code soumis plusieurs fois (rejeu, nouvel essai) ne vote qu'une fois
+    distinct = {}
+    for timestamp, code in submissions:
+        distinct.setdefault(str(code).strip(), timestamp)
+    submissions = [(key.counter_at(timestamp), code) for code, timestamp in distinct.items()]
+    if not submissions:
+        return None
+    counters = [counter for counter, _ in submissions]
+    table = code_table(key, min(counters) - search, max(counters) + search)
+
+    votes = {}
+    for counter, code in submissions:
+        # Un même décalage ne compte qu'une fois par soumission
+        for offset in {found - counter for found in table.get(code, ()) if abs(found - counter) <= search}:
+            votes[offset] = votes.get(offset, 0) + 1
+    if not votes:
+        return None
+    best = max(votes.values())
+    if best < minimum:
+        return None
+    return min((offset for offset, count in votes.items() if count == best), key=abs)
+
+
+def resync_counter(key: TOTPKey, previous, code: str, at: float, search: int = 10):
+    """
+    Cherche le compteur d'un code refusé à partir d'un code refusé
+    précédent, comme la resynchronisation HOTP : le code courant doit
+    correspondre à un compteur C à moins de `search` périodes de l'heure de
+    vérification, et un code précédent, distinct, au compteur C - 1 (à moins
+    de `search` périodes de sa propre soumission).
+
+    :param key: La TOTPKey du compte
+    :param previous: Les couples (horodatage, code) refusés précédemment
+    :param code: Le code courant
+    :param at: L'horodatage de vérification
+    :param search: Le décalage maximal recherché (en périodes, de part et d'autre)
+    :return: Le compteur C le plus proche de l'heure de vérification, ou None
+    """
+    code = str(code).strip()
+    base = key.counter_at(at)
+    table = code_table(key, base - search - 1, base + search)
+    earlier = {}
+    for timestamp, submitted in previous:
+        submitted = str(submitted).strip()
+        if submitted != code:
+            earlier.setdefault(submitted, key.counter_at(timestamp))
+    for counter in sorted(table.get(code, ()), key=lambda found: abs(found - base)):
+        for submitted, submitted_at in earlier.items():
+            if counter - 1 in table.get(submitted, ()) and abs(counter - 1 - submitted_at) <= search:
+                return counter
+    return None
+
+
+class DriftTracker:
+    """
+    Compensation de la dérive d'horloge par compte (identifié par un index
+    dense) : le décalage appris est conservé dans un octet signé et la
+    vérification se fait dans une fenêtre étroite autour du compteur corrigé.
+
+    Lorsqu'un appareil dérive au-delà de la fenêtre, les codes refusés sont
+    gardés ; un nouveau décalage n'est adopté que sur deux codes distincts de
+    compteurs consécutifs (resync_counter), comme en HOTP. Un code répété ne
+    compte pas, et chaque code accepté passe par la protection anti-rejeu :
+    des codes anciens rejoués ne peuvent ni être acceptés ni déplacer la
+    fenêtre.
+    """
+
+    def __init__(self, capacity: int, window: int = 1, search: int = 10, history: int = 3, clock=time.time,
+                 replay: ReplayGuard = None):
+        """
+        :param capacity: Le nombre de comptes (index 0 à capacity - 1)
+        :param window: La fenêtre de vérification autour du compteur corrigé (en périodes)
+        :param search: Le décalage maximal recherché lors d'une resynchronisation
+        :param history: Le nombre de codes refusés conservés par compte
+        :param clock: La source de temps (horodatage Unix en secondes)
+        :param replay: La protection anti-rejeu des comptes (par défaut : un ReplayGuard local)
+        """
+        if window < 0 or search < 0 or history < 2:
+            raise ValueError("Paramètres de dérive invalides")
+        if replay is not None and len(replay) < capacity:
+            raise ValueError("La protection anti-rejeu doit couvrir tous les comptes")
+        self.window = window
+        self.search = min(search, MAX_DRIFT)
+        self.history = history
+        self.clock = clock
+        self.offsets = array('b', bytes(capacity))
+        self.replay = ReplayGuard(capacity) if replay is None else replay
+        self.resyncs = 0
+        self._rejected = {}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def offset(self, account_index: int) -> int:
+        """Retourne le décalage appris d'un compte (en périodes)."""
+        return self.offsets[account_index]
+
+    def _store(self, account_index: int, offset: int):
+        self.offsets[account_index] = max(-MAX_DRIFT, min(MAX_DRIFT, offset))
+
+    def verify(self, account_index: int, key: TOTPKey, code: str, at: float = None):
+        """
+        Vérifie un code en tenant compte du décalage appris.
+
+        :param account_index: L'index dense du compte
+        :param key: La TOTPKey du compte
+        :param code: Le code soumis
+        :param at: L'horodatage de vérification (par défaut : l'horloge)
+        :return: Le décalage total (en périodes) du code reconnu, ou None
+        """
+        now = self.clock() if at is None else at
+        code = str(code).strip()
+        learned = self.offsets[account_index]
+        base = key.counter_at(now)
+        counter = base + learned
+        matched = match_code(
+            ((offset, key.code_at(counter + offset)) for offset in window_offsets(self.window)
+             if counter + offset >= 0),
+            code,
+        )
+        if matched is not None:
+            if not self.replay.check_and_set(account_index, counter + matched):
+                return None
+            self._rejected.pop(account_index, None)
+            if matched:
+                self._store(account_index, learned + matched)
+            return learned + matched
+
+        pending = self._rejected.get(account_index)
+        if pending is None:
+            pending = self._rejected[account_index] = deque(maxlen=self.history)
+        if any(submitted == code for _, submitted in pending):
+            return None  # Un code répété n'apporte aucun nouvel indice
+        found = resync_counter(key, pending, code, now, self.search) if pending else None
+        pending.append((now, code))
+        if found is None or not self.replay.check_and_set(account_index, found):
+            return None
+        self._store(account_index, found - base)
+        del self._rejected[account_index]
+        self.resyncs += 1
+        return found - base
+
+    def reset(self, account_index: int):
+        """Oublie le décalage appris (le dernier compteur accepté reste protégé contre le rejeu)."""
+        self.offsets[account_index] = 0
+        self._rejected.pop(account_index, None)
+
+    def dump(self) -> bytes:
+        """Retourne les décalages appris (un octet signé par compte)."""
+        return self.offsets.tobytes()
+
+    @classmethod
+    def load(cls, data: bytes, **kwargs) -> 'DriftTracker':
+        """Recrée un suivi à partir de dump() ; les autres paramètres sont ceux du constructeur."""
+        tracker = cls(len(data), **kwargs)
+        tracker.offsets = array('b', data)
+        return tracker
+
+
+def simulate(accounts: int = 200, rounds: int = 48, seed: int = 0, window: int = 1, search: int = 10,
+             max_skew: float = 150.0, max_rate: float = 50e-6, interval: float = 3600.0,
+             retry_delay: float = 30.0, retries: int = 2, start: float = 1_700_000_000) -> dict:
+    """
+    Simulation déterministe : chaque appareil a un décalage initial et une
+    dérive (en secondes par seconde) tirés d'un générateur initialisé par
+    `seed`. À chaque tour, chaque utilisateur soumet le code affiché par son
+    appareil et réessaie avec le code suivant (après `retry_delay` secondes)
+    s'il est refusé.
+
+    :return: Les statistiques (acceptations avec et sans compensation, resynchronisations,
+        codes calculés par vérification, écart final entre décalage appris et réel)
+    """
+    rng = random.Random(seed)
+    keys = [TOTPKey(bytes(rng.getrandbits(8) for _ in range(20))) for _ in range(accounts)]
+    skews = [rng.uniform(-max_skew, max_skew) for _ in range(accounts)]
+    rates = [rng.uniform(-max_rate, max_rate) for _ in range(accounts)]
+    tracker = DriftTracker(accounts, window, search)
+    offsets = window_offsets(window)
+
+    stats = {'logins': 0, 'accepted_first_try': 0, 'accepted': 0, 'accepted_without_tracker': 0,
+             'submissions': 0, 'resyncs': 0, 'codes_per_verification': len(offsets), 'final_error': 0}
+    for round_index in range(rounds):
+        for index, key in enumerate(keys):
+            stats['logins'] += 1
+            now = start + round_index * interval + rng.uniform(0, interval / 2)
+            for attempt in range(retries + 1):
+                device = now + skews[index] + rates[index] * (now - start)
+                code = key.at(device)
+                stats['submissions'] += 1
+                if attempt == 0:
+                    counter = key.counter_at(now)
+                    if match_code([(o, key.code_at(counter + o)) for o in offsets if counter + o >= 0], code) is not None:
+                        stats['accepted_without_tracker'] += 1
+                if tracker.verify(index, key, code, now) is not None:
+                    stats['accepted'] += 1
+                    stats['accepted_first_try'] += attempt == 0
+                    break
+                now += retry_delay
+
+    end = start + rounds * interval
+    for index, key in enumerate(keys):
+        device = end + skews[index] + rates[index] * (end - start)
+        stats['final_error'] += abs(key.counter_at(device) - key.counter_at(end) - tracker.offset(index)) > window
+    stats['resyncs'] = tracker.resyncs
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation de la compensation de dérive d'horloge")
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=48)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--window', type=int, default=1)
+    parser.add_argument('--search', type=int, default=10)
+    parser.add_argument('--max-skew', type=float, default=150.0, help="Décalage initial maximal (secondes)")
+    parser.add_argument('--max-rate', type=float, default=50e-6, help="Dérive maximale (secondes par seconde)")
+    args = parser.parse_args(argv)
+
+    stats = simulate(args.accounts, args.rounds, args.seed, args.window, args.search, args.max_skew, args.max_rate)
+    for name, value in stats.items():
+        print(f"{name:<26} {value}")
+
+
+if __name__ == '__main__':
+    main()
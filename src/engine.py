@@ -0,0 +1,373 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+from src import metrics
+from src.totp import TOTPKey
+from src.verify import verify
+
+# Intervalle de surveillance des processus de validation (secondes)
+WORKER_CHECK_INTERVAL = 0.5
+
+
+def shard_for(account_id, shards: int) -> int:
+    """Retourne le shard d'un compte à partir d'un hachage stable (CRC32) de son identifiant."""
+    return zlib.crc32(str(account_id).encode('utf-8')) % shards
+
+
+def _build_key(params) -> TOTPKey:
+    """Construit une TOTPKey depuis une clé Base32 ou un dictionnaire de paramètres."""
+    if isinstance(params, str):
+        return TOTPKey.from_secret(params)
+    return TOTPKey.from_secret(
+        params['secret'],
+        params.get('algorithm', 'sha1'),
+        params.get('digits', 6),
+        params.get('period', 30),
+    )
+
+
+def _worker_main(shard, shards, accounts, loader, window, guard, tasks, results, buckets=None):
+    """
+    Boucle d'un processus de validation : les secrets du shard sont chargés et
+    précompilés une seule fois, puis seuls (compte, code) transitent.
+
+    Un compte invalide n'arrête pas le processus : il est signalé au parent
+    (message de lot None) et ses codes sont refusés. Une erreur de
+    chargement est signalée avant l'arrêt du processus.
+
+    Si le parent est instrumenté (buckets non nul), le processus mesure dans
+    son propre registre et l'envoie au parent sur demande (tâche de lot
+    None) et à l'arrêt ; le registre repart de zéro après chaque envoi.
+    """
+    # Un registre hérité du parent (fork) ne serait jamais relu
+    if buckets is not None:
+        observer = metrics.enable(metrics.Metrics(buckets))
+    else:
+        observer = None
+        metrics.disable()
+
+    def send_metrics():
+        if observer is not None:
+            results.put((None, shard, {'metrics': observer.state()}, None))
+            observer.reset()
+
+    try:
+        if loader is not None:
+            accounts = loader(shard, shards)
+    except Exception as e:
+        results.put((None, shard, {}, f"{type(e).__name__}: {e}"))
+        return
+    keys = {}
+    invalid = {}
+    for account_id, params in accounts.items():
+        try:
+            keys[account_id] = _build_key(params)
+        except Exception as e:
+            invalid[account_id] = f"{type(e).__name__}: {e}"
+    if invalid:
+        results.put((None, shard, {'invalid': invalid}, None))
+    indexes = {account_id: params['index'] for account_id, params in accounts.items()
+               if guard is not None and isinstance(params, dict) and 'index' in params}
+    del accounts
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            send_metrics()
+            break
+        batch_id, part, items, at = task
+        if batch_id is None:
+            send_metrics()
+            continue
+        try:
+            out = []
+            for account_id, code in items:
+                key = keys.get(account_id)
+                offset = None if key is None else verify(key, code, window, at)
+                index = indexes.get(account_id)
+                if offset is not None and index is not None:
+                    # Un code déjà accepté (même compteur ou antérieur) est un rejeu
+                    if not guard.check_and_set(index, key.counter_at(at) + offset):
+                        offset = None
+                out.append(offset)
+            results.put((batch_id, part, out, None))
+        except Exception as e:
+            results.put((batch_id, part, None, f"{type(e).__name__}: {e}"))
+
+
+class _PendingBatch:
+    __slots__ = ('future', 'results', 'positions', 'shards', 'remaining', 'start')
+
+    def __init__(self, size: int):
+        self.future = Future()
+        self.results = [None] * size
+        self.positions = {}
+        self.shards = {}
+        self.remaining = 0
+        self.start = time.perf_counter()
+
+
+class ValidationEngine:
+    """
+    Moteur de validation multi-processus : chaque processus possède un shard
+    de clés précompilées, et les requêtes sont routées par hachage stable de
+    l'identifiant de compte puis soumises par lots.
+
+    Les comptes dont la clé est invalide sont listés dans invalid_accounts
+    et leurs codes refusés. Si un processus s'arrête, les lots qui
+    l'attendent échouent (RuntimeError) au lieu de rester en suspens, tout
+    comme les lots soumis ensuite à son shard.
+
+    Si l'instrumentation est active à la création, les mesures des processus
+    sont fusionnées dans le registre du parent par collect_metrics() et à la
+    fermeture.
+    """
+
+    def __init__(self, accounts: dict = None, workers: int = None, window: int = 1, batch_size: int = 1024,
+                 loader=None, mp_context=None, replay_guard=None):
+        """
+        :param accounts: Les comptes {identifiant: clé Base32 ou dict(secret, algorithm, digits, period, index)}
+        :param workers: Le nombre de processus (par défaut : le nombre de cœurs)
+        :param window: La fenêtre de vérification en périodes
+        :param batch_size: Le nombre maximal de requêtes par message envoyé à un processus
+        :param loader: Fonction loader(shard, shards) -> comptes, appelée dans chaque processus à la place de `accounts`
+        :param mp_context: Le contexte multiprocessing à utiliser
+        :param replay_guard: Un ReplayGuard partagé ; les comptes dont les paramètres
+            contiennent un `index` dense refusent alors les codes rejoués
+        """
+        if replay_guard is not None and not replay_guard.shared:
+            raise ValueError("Le moteur de validation nécessite un ReplayGuard partagé")
+        if accounts is None and loader is None:
+            raise ValueError("Il faut fournir des comptes ou une fonction de chargement")
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        context = mp_context or multiprocessing.get_context()
+        observer = metrics.active()
+        buckets = observer.buckets if observer is not None else None
+        self._instrumented = buckets is not None
+
+        shards = [{} for _ in range(self.workers)]
+        if loader is None:
+            for account_id, params in accounts.items():
+                shards[shard_for(account_id, self.workers)][account_id] = params
+
+        self._results = context.Queue()
+        self._tasks = []
+        self._processes = []
+        for shard in range(self.workers):
+            tasks = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(shard, self.workers, shards[shard], loader, window, replay_guard, tasks, self._results,
+                      buckets),
+                daemon=True,
+            )
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+        del shards
+
+        self.invalid_accounts = {}
+        self._metrics_lock = threading.Lock()
+        self._metrics_waiting = set()
+        self._metrics_done = threading.Event()
+        self._dead = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name='totp-engine-collector', daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        """Reçoit les résultats des processus et complète les lots correspondants."""
+        while True:
+            try:
+                message = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if message is None:
+                break
+            batch_id, part, out, error = message
+            if batch_id is None:
+                # Message d'un processus : comptes invalides, mesures, ou échec du chargement
+                if 'invalid' in out:
+                    with self._lock:
+                        self.invalid_accounts.update(out['invalid'])
+                if 'metrics' in out:
+                    observer = metrics.active()
+                    if observer is not None:
+                        observer.merge(out['metrics'])
+                    self._metrics_received(part)
+                if error is not None:
+                    self._fail_shard(part, error)
+                continue
+            with self._lock:
+                pending = self._pending.get(batch_id)
+                if pending is None:
+                    continue
+                if error is not None:
+                    del self._pending[batch_id]
+                else:
+                    for position, result in zip(pending.positions.pop(part), out):
+                        pending.results[position] = result
+                    pending.remaining -= 1
+                    if pending.remaining:
+                        continue
+                    del self._pending[batch_id]
+            observer = metrics.active()
+            if observer is not None:
+                self._report(observer, pending, error)
+            if error is not None:
+                pending.future.set_exception(RuntimeError(f"Erreur dans un processus de validation: {error}"))
+            else:
+                pending.future.set_result(pending.results)
+
+    def _metrics_received(self, shard: int):
+        with self._lock:
+            self._metrics_waiting.discard(shard)
+            if not self._metrics_waiting:
+                self._metrics_done.set()
+
+    def collect_metrics(self, timeout: float = None) -> bool:
+        """
+        Fusionne dans le registre actif les mesures accumulées par les
+        processus depuis la dernière collecte (elles le sont aussi à la
+        fermeture). Sans effet si l'instrumentation était désactivée à la
+        création du moteur.
+
+        :param timeout: L'attente maximale des réponses (en secondes)
+        :return: True si tous les processus actifs ont répondu
+        """
+        if self._closed:
+            raise RuntimeError("Le moteur de validation est fermé")
+        if not self._instrumented:
+            return True
+        with self._metrics_lock:
+            with self._lock:
+                self._metrics_waiting = {shard for shard in range(self.workers) if shard not in self._dead}
+                self._metrics_done.clear()
+                if not self._metrics_waiting:
+                    return True
+                shards = list(self._metrics_waiting)
+            for shard in shards:
+                self._tasks[shard].put((None, None, None, None))
+            return self._metrics_done.wait(timeout)
+
+    def _check_workers(self):
+        if self._closed:
+            return
+        for shard, process in enumerate(self._processes):
+            if shard not in self._dead and not process.is_alive():
+                self._fail_shard(shard, f"processus arrêté (code de sortie {process.exitcode})")
+
+    def _fail_shard(self, shard: int, reason: str):
+        """Marque un shard comme arrêté et fait échouer les lots qui l'attendent."""
+        with self._lock:
+            self._dead.setdefault(shard, reason)
+            # Un processus arrêté n'enverra plus ses mesures
+            self._metrics_waiting.discard(shard)
+            if not self._metrics_waiting:
+                self._metrics_done.set()
+            failed = [batch_id for batch_id, pending in self._pending.items()
+                      if shard in pending.shards.values()]
+            failed = [self._pending.pop(batch_id) for batch_id in failed]
+        error = RuntimeError(f"Processus de validation {shard} indisponible : {reason}")
+        observer = metrics.active()
+        for pending in failed:
+            if observer is not None:
+                observer.inc('totp_errors_total', operation='engine', error='WorkerDied')
+            pending.future.set_exception(error)
+
+    @staticmethod
+    def _report(observer, pending: _PendingBatch, error):
+        observer.observe('totp_engine_batch_seconds', time.perf_counter() - pending.start)
+        if error is not None:
+            observer.inc('totp_errors_total', operation='engine', error=error.partition(':')[0])
+            return
+        accepted = sum(result is not None for result in pending.results)
+        observer.inc('totp_engine_verifications_total', accepted, result='accepted')
+        observer.inc('totp_engine_verifications_total', len(pending.results) - accepted, result='rejected')
+
+    def submit(self, requests, at: float = None) -> Future:
+        """
+        Soumet un lot de vérifications ; tout le lot partage le même horodatage.
+
+        :param requests: Les couples (identifiant de compte, code)
+        :param at: L'horodatage de vérification (par défaut : l'heure actuelle)
+        :return: Un Future dont le résultat est la liste des décalages (None si refusé)
+        """
+        if self._closed:
+            raise RuntimeError("Le moteur de validation est fermé")
+        if at is None:
+            at = time.time()
+        requests = list(requests)
+        pending = _PendingBatch(len(requests))
+        if not requests:
+            pending.future.set_result([])
+            return pending.future
+
+        routed = [([], []) for _ in range(self.workers)]
+        for position, (account_id, code) in enumerate(requests):
+            items, positions = routed[shard_for(account_id, self.workers)]
+            items.append((account_id, code))
+            positions.append(position)
+
+        messages = []
+        for shard, (items, positions) in enumerate(routed):
+            for start in range(0, len(items), self.batch_size):
+                part = len(messages)
+                pending.positions[part] = positions[start:start + self.batch_size]
+                pending.shards[part] = shard
+                messages.append((shard, part, items[start:start + self.batch_size]))
+        pending.remaining = len(messages)
+
+        batch_id = next(self._ids)
+        with self._lock:
+            dead = [shard for shard in set(pending.shards.values()) if shard in self._dead]
+            if dead:
+                pending.future.set_exception(RuntimeError(
+                    f"Processus de validation {dead[0]} indisponible : {self._dead[dead[0]]}"))
+                return pending.future
+            self._pending[batch_id] = pending
+        for shard, part, items in messages:
+            self._tasks[shard].put((batch_id, part, items, at))
+        return pending.future
+
+    def verify_many(self, requests, at: float = None, timeout: float = None) -> list:
+        """Version synchrone de submit."""
+        return self.submit(requests, at).result(timeout)
+
+    async def averify_many(self, requests, at: float = None) -> list:
+        """Version asyncio de submit."""
+        return await asyncio.wrap_future(self.submit(requests, at))
+
+    def verify(self, account_id, code: str, at: float = None):
+        """Vérifie un seul code ; préférer verify_many pour le débit."""
+        return self.verify_many([(account_id, code)], at)[0]
+
+    def close(self):
+        """Arrête les processus et le thread de collecte."""
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join()
+        self._results.put(None)
+        self._collector.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
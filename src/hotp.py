@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : repli en Python pur
+    np = None
+
+from src.batch import truncate_many
+from src.totp import TOTPKey
+from src.verify import match_code
+
+# Fenêtre de resynchronisation par défaut (RFC 4226, section 7.4)
+RESYNC_LOOK_AHEAD = 1000
+
+
+def hotp(key: TOTPKey, counter: int) -> str:
+    """
+    Calcule un code HOTP (RFC 4226) : même cœur HMAC/troncature que TOTP,
+    avec un compteur d'événements au lieu d'un compteur de temps.
+
+    :param key: La clé précompilée (la période est ignorée)
+    :param counter: Le compteur d'événements
+    """
+    if counter < 0:
+        raise ValueError("Le compteur HOTP doit être positif")
+    return key.code_at(counter)
+
+
+def codes_from(key: TOTPKey, first: int, count: int):
+    """
+    Calcule en un seul lot les codes des compteurs [first, first + count) :
+    les condensats sont accumulés dans un tampon contigu puis tronqués
+    ensemble (batch.truncate_many).
+
+    :return: Les codes sous forme d'entiers (tableau uint32)
+    """
+    base = key._hmac
+    digests = bytearray()
+    for counter in range(first, first + count):
+        h = base.copy()
+        h.update(counter.to_bytes(8, 'big'))
+        digests += h.digest()
+    return truncate_many(bytes(digests), key.digest_size, key.digits)
+
+
+def _code_value(key: TOTPKey, code: str):
+    """Convertit un code soumis en entier, ou None s'il n'a pas la forme attendue."""
+    code = str(code).strip()
+    if len(code) != key.digits or not code.isdigit():
+        return None
+    return int(code)
+
+
+def verify_hotp(key: TOTPKey, code: str, counter: int, look_ahead: int = 10):
+    """
+    Vérifie un code HOTP dans la fenêtre [counter, counter + look_ahead]
+    (comparaison en temps constant, voir verify.match_code).
+
+    :param key: La clé précompilée
+    :param code: Le code soumis
+    :param counter: Le prochain compteur attendu
+    :param look_ahead: Le nombre de compteurs tolérés au-delà du compteur attendu
+    :return: Le nouveau compteur à enregistrer (compteur reconnu + 1), ou None
+    """
+    if look_ahead < 0:
+        raise ValueError("La fenêtre HOTP doit être positive")
+    matched = match_code(((c, key.code_at(c)) for c in range(counter, counter + look_ahead + 1)), code)
+    return None if matched is None else matched + 1
+
+
+def resync(key: TOTPKey, first_code: str, second_code: str, counter: int, look_ahead: int = RESYNC_LOOK_AHEAD):
+    """
+    Resynchronise un jeton HOTP à partir de deux codes consécutifs : les
+    look_ahead + 1 codes suivant le compteur sont calculés en un seul lot,
+    puis la paire est recherchée sur l'ensemble du tableau.
+
+    :param key: La clé précompilée
+    :param first_code: Le premier code affiché par le jeton
+    :param second_code: Le code suivant
+    :param counter: Le dernier compteur connu
+    :param look_ahead: Le nombre de compteurs explorés
+    :return: Le nouveau compteur à enregistrer (après le second code), ou None
+    """
+    first, second = _code_value(key, first_code), _code_value(key, second_code)
+    if first is None or second is None or look_ahead < 1:
+        return None
+    codes = codes_from(key, counter, look_ahead + 1)
+    if np is not None:
+        found = np.flatnonzero((codes[:-1] == first) & (codes[1:] == second))
+        return int(found[0]) + counter + 2 if len(found) else None
+    for index in range(len(codes) - 1):
+        if codes[index] == first and codes[index + 1] == second:
+            return index + counter + 2
+    return None
+
+
+class CounterStore:
+    """
+    Compteurs HOTP persistants {identifiant: prochain compteur}. Chaque
+    avance est écrite de façon atomique (fichier temporaire, fsync puis
+    remplacement) avant d'être confirmée : un code accepté ne peut pas être
+    rejoué après un redémarrage.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Le fichier JSON des compteurs (créé au premier enregistrement)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._counters = {str(k): int(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            self._counters = {}
+
+    def __contains__(self, account_id):
+        return account_id in self._counters
+
+    def get(self, account_id: str, default: int = 0) -> int:
+        """Retourne le prochain compteur attendu d'un compte."""
+        return self._counters.get(account_id, default)
+
+    def advance(self, account_id: str, counter: int) -> bool:
+        """
+        Enregistre un nouveau compteur s'il est strictement supérieur à l'actuel.
+
+        :return: True si le compteur a avancé
+        """
+        with self._lock:
+            if counter <= self._counters.get(account_id, -1):
+                return False
+            self._counters[account_id] = counter
+            self._save()
+            return True
+
+    def set(self, account_id: str, counter: int):
+        """Fixe le compteur d'un compte (provisionnement d'un jeton)."""
+        with self._lock:
+            self._counters[account_id] = counter
+            self._save()
+
+    def _save(self):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self._counters, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+
+class HOTPValidator:
+    """Vérification et resynchronisation de jetons HOTP avec compteurs persistants."""
+
+    def __init__(self, store: CounterStore, look_ahead: int = 10, resync_look_ahead: int = RESYNC_LOOK_AHEAD):
+        """
+        :param store: Le stockage des compteurs
+        :param look_ahead: La fenêtre de vérification ordinaire
+        :param resync_look_ahead: La fenêtre explorée lors d'une resynchronisation
+        """
+        self.store = store
+        self.look_ahead = look_ahead
+        self.resync_look_ahead = resync_look_ahead
+
+    def verify(self, account_id: str, key: TOTPKey, code: str) -> bool:
+        """Vérifie un code et avance le compteur persistant s'il est accepté."""
+        counter = verify_hotp(key, code, self.store.get(account_id), self.look_ahead)
+        return counter is not None and self.store.advance(account_id, counter)
+
+    def resync(self, account_id: str, key: TOTPKey, first_code: str, second_code: str) -> bool:
+        """Resynchronise un compte à partir de deux codes consécutifs."""
+        counter = resync(key, first_code, second_code, self.store.get(account_id), self.resync_look_ahead)
+        return counter is not None and self.store.advance(account_id, counter)
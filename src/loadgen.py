@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Retourne le percentile (méthode du rang le plus proche) d'une liste triée."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def _open(path: str, host: str, port: int):
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _worker(path, host, port, route, payloads, deadline, latencies, errors):
+    reader, writer = await _open(path, host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            body = payloads[i % len(payloads)]
+            i += 1
+            request = (
+                f"POST {route} HTTP/1.1\r\nHost: localhost\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode('latin-1') + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line[:15].lower() == b'content-length:':
+                    length = int(line[15:])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0].decode('latin-1'))
+    finally:
+        writer.close()
+
+
+async def run(path: str = None, host: str = '127.0.0.1', port: int = 8765, route: str = '/generate',
+              connections: int = 16, duration: float = 5.0, secrets: int = 100) -> dict:
+    """
+    Envoie des requêtes en continu sur plusieurs connexions persistantes et
+    mesure les latences.
+
+    :param path: Le chemin de la socket Unix (sinon host:port)
+    :param route: La route à solliciter (/generate ou /verify)
+    :param connections: Le nombre de connexions concurrentes
+    :param duration: La durée du test en secondes
+    :param secrets: Le nombre de secrets distincts utilisés
+    :return: Le rapport (requêtes/s, p50/p95/p99 en millisecondes, erreurs)
+    """
+    pool = [base64.b32encode(os.urandom(20)).decode('ascii') for _ in range(secrets)]
+    if route == '/verify':
+        payloads = [json.dumps({'secret': s, 'code': '000000'}).encode('utf-8') for s in pool]
+    else:
+        payloads = [json.dumps({'secret': s}).encode('utf-8') for s in pool]
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(path, host, port, route, payloads[i::connections] or payloads, deadline, latencies, errors)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de charge pour le service TOTP local")
+    parser.add_argument('--unix', help="Chemin de la socket Unix")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--route', default='/generate', choices=['/generate', '/verify'])
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--secrets', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help="Afficher le rapport en JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.unix, args.host, args.port, args.route, args.connections,
+                             args.duration, args.secrets))
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{report['requests']} requêtes, {report['errors']} erreurs, {report['rps']:.0f} req/s")
+        print(f"p50 {report['p50_ms']:.3f} ms | p95 {report['p95_ms']:.3f} ms | p99 {report['p99_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from array import array
+
+from src.verify import match_code, window_offsets
+
+
+class _Ring:
+    """Tampon circulaire de taille fixe des codes d'une clé, indexé par compteur % taille."""
+
+    __slots__ = ('key', 'codes', 'counters')
+
+    def __init__(self, key, size: int):
+        self.key = key
+        self.codes = [None] * size
+        self.counters = array('q', [-1]) * size
+
+
+class LookaheadBuffer:
+    """
+    Précalcul des codes à venir : pour chaque clé active, les codes des
+    compteurs [courant - behind, courant + depth) sont gardés dans un tampon
+    circulaire rempli en arrière-plan. Au changement de période, le code
+    affiché ou vérifié n'est plus qu'une lecture à un index.
+    """
+
+    def __init__(self, depth: int = 4, behind: int = 1, clock=time.time):
+        """
+        :param depth: Le nombre de compteurs précalculés à partir du compteur courant
+        :param behind: Le nombre de compteurs passés conservés (fenêtres de vérification)
+        :param clock: La source de temps (horodatage Unix en secondes)
+        """
+        if depth < 1 or behind < 0:
+            raise ValueError("La profondeur doit être positive")
+        self.depth = depth
+        self.behind = behind
+        self.size = depth + behind
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._rings = {}
+        self._wakeup = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._rings)
+
+    def __contains__(self, account_id):
+        return account_id in self._rings
+
+    def add(self, account_id, key):
+        """Ajoute (ou remplace) une clé ; son tampon sera rempli en arrière-plan."""
+        ring = self._rings.get(account_id)
+        if ring is None or ring.key is not key:
+            self._rings[account_id] = _Ring(key, self.size)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def remove(self, account_id):
+        self._rings.pop(account_id, None)
+
+    def code_at(self, account_id, counter: int) -> str:
+        """Retourne le code d'un compteur : lecture dans le tampon, calcul immédiat sinon."""
+        ring = self._rings[account_id]
+        index = counter % self.size
+        if ring.counters[index] == counter:
+            self.hits += 1
+            return ring.codes[index]
+        self.misses += 1
+        code = ring.key.code_at(counter)
+        ring.codes[index] = code
+        ring.counters[index] = counter
+        return code
+
+    def code(self, account_id, now: float = None) -> str:
+        """Retourne le code courant d'un compte."""
+        now = self.clock() if now is None else now
+        return self.code_at(account_id, self._rings[account_id].key.counter_at(now))
+
+    def verify(self, account_id, code: str, window: int = 1, at: float = None):
+        """
+        Vérifie un code dans une fenêtre de ±window périodes à partir du tampon
+        (comparaison en temps constant, voir verify.match_code).
+
+        :return: Le décalage du code reconnu, ou None
+        """
+        key = self._rings[account_id].key
+        counter = key.counter_at(self.clock() if at is None else at)
+        return match_code(
+            ((offset, self.code_at(account_id, counter + offset))
+             for offset in window_offsets(window) if counter + offset >= 0),
+            code,
+        )
+
+    def fill(self, limit: int = None, now: float = None) -> int:
+        """
+        Complète les tampons jusqu'à courant + depth.
+
+        :param limit: Le nombre maximal de codes à calculer pendant cet appel
+        :param now: L'horodatage de référence (par défaut : l'horloge)
+        :return: Le nombre de codes calculés
+        """
+        now = self.clock() if now is None else now
+        computed = 0
+        for ring in list(self._rings.values()):
+            key = ring.key
+            current = key.counter_at(now)
+            for counter in range(max(0, current - self.behind), current + self.depth):
+                index = counter % self.size
+                if ring.counters[index] != counter:
+                    ring.codes[index] = key.code_at(counter)
+                    ring.counters[index] = counter
+                    computed += 1
+                    if limit is not None and computed >= limit:
+                        return computed
+        return computed
+
+    async def run(self, chunk: int = 256):
+        """
+        Remplissage en arrière-plan : calcule au plus `chunk` codes puis rend la
+        main à la boucle ; dort jusqu'au prochain changement de période (ou
+        jusqu'à l'ajout d'une clé) lorsque tous les tampons sont complets.
+        """
+        self._wakeup = asyncio.Event()
+        while True:
+            if self.fill(chunk) >= chunk:
+                await asyncio.sleep(0)
+                continue
+            self._wakeup.clear()
+            now = self.clock()
+            periods = {(ring.key.period, ring.key.t0) for ring in self._rings.values()}
+            delay = min((period - (now - t0) % period for period, t0 in periods), default=None)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, loop=None):
+        """Démarre le remplissage en arrière-plan sur la boucle donnée (ou la boucle courante)."""
+        if self._task is None:
+            loop = loop or asyncio.get_event_loop()
+            self._task = loop.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
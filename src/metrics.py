@@ -0,0 +1,241 @@
+import threading
+import time
+from bisect import bisect_left
+
+from src import totp
+
+# Bornes des histogrammes (secondes), de la microseconde à la seconde
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0)
+
+HELP = {
+    'totp_stage_seconds': "Durée des étapes de génération (decode, setup, hmac, truncate, format)",
+    'totp_calls_total': "Nombre d'appels par opération et par algorithme",
+    'totp_batch_seconds': "Durée des étapes des lots (hmac, truncate)",
+    'totp_errors_total': "Nombre d'erreurs par opération et par type",
+    'totp_server_requests_total': "Requêtes HTTP traitées par route et par statut",
+    'totp_server_request_seconds': "Durée de traitement des requêtes HTTP",
+    'totp_server_coalesced_total': "Calculs partagés par regroupement des requêtes",
+    'totp_engine_batch_seconds': "Durée des lots du moteur de validation, de la soumission au résultat",
+    'totp_engine_verifications_total': "Vérifications du moteur par résultat",
+    'totp_rollovers_total': "Codes régénérés aux limites de période",
+    'totp_rollover_seconds': "Durée du traitement d'une limite de période",
+    'totp_rollover_lag_seconds': "Retard du réveil par rapport à la limite de période",
+}
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # dernière case : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """Retourne les couples (borne, nombre cumulé), +Inf compris."""
+        total = 0
+        out = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Estime un quantile par la borne supérieure du premier seau qui l'atteint."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    Registre de compteurs et d'histogrammes étiquetés, partagé par le cœur
+    TOTP, le service, le moteur de validation et l'interface. Une fois
+    installé avec enable(), il sert d'observateur au module totp.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrémente un compteur."""
+        entry = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[entry] = self._counters.get(entry, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Ajoute une durée (en secondes) à un histogramme."""
+        entry = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(entry)
+            if histogram is None:
+                histogram = self._histograms[entry] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """Gestionnaire de contexte mesurant la durée d'un bloc dans un histogramme."""
+        return _Timer(self, name, labels)
+
+    # -- Observateur du module totp ----------------------------------------
+
+    def stage(self, stage: str, seconds: float, algorithm: str):
+        self.observe('totp_stage_seconds', seconds, stage=stage, algorithm=algorithm)
+
+    def call(self, operation: str, algorithm: str):
+        self.inc('totp_calls_total', operation=operation, algorithm=algorithm)
+
+    def error(self, operation: str, error: BaseException):
+        self.inc('totp_errors_total', operation=operation, error=type(error).__name__)
+
+    # -- Export -------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """
+        Retourne une copie des mesures :
+        {'counters': {nom: [{'labels', 'value'}]}, 'histograms': {nom: [{'labels', 'count', 'sum', 'p50', 'p99', 'buckets'}]}}
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(entry, h.cumulative(), h.count, h.sum, h.quantile(0.5), h.quantile(0.99))
+                          for entry, h in self._histograms.items()]
+        snapshot = {'counters': {}, 'histograms': {}}
+        for (name, labels), value in sorted(counters, key=_series_order):
+            snapshot['counters'].setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        for (name, labels), buckets, count, total, p50, p99 in sorted(histograms, key=_series_order):
+            snapshot['histograms'].setdefault(name, []).append({
+                'labels': dict(labels), 'count': count, 'sum': total, 'p50': p50, 'p99': p99, 'buckets': buckets,
+            })
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Exporte les mesures au format texte Prometheus (version 0.0.4)."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot['counters'].items():
+            _header(lines, name, 'counter')
+            for item in series:
+                lines.append(f"{name}{_labels(item['labels'])} {_number(item['value'])}")
+        for name, series in snapshot['histograms'].items():
+            _header(lines, name, 'histogram')
+            for item in series:
+                for bound, total in item['buckets']:
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(item['labels'], le=le)} {total}")
+                lines.append(f"{name}_sum{_labels(item['labels'])} {_number(item['sum'])}")
+                lines.append(f"{name}_count{_labels(item['labels'])} {item['count']}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def state(self) -> dict:
+        """
+        Retourne l'état brut des mesures, sérialisable par pickle, pour le
+        transmettre d'un processus à un autre (voir merge).
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {entry: (h.buckets, list(h.counts), h.sum, h.count)
+                               for entry, h in self._histograms.items()},
+            }
+
+    def merge(self, state: dict):
+        """
+        Ajoute à ce registre les mesures d'un autre (état retourné par state()).
+
+        :raise ValueError: si un histogramme n'a pas les mêmes bornes
+        """
+        with self._lock:
+            for entry, value in state['counters'].items():
+                self._counters[entry] = self._counters.get(entry, 0) + value
+            for entry, (buckets, counts, total, count) in state['histograms'].items():
+                histogram = self._histograms.get(entry)
+                if histogram is None:
+                    histogram = self._histograms[entry] = Histogram(buckets)
+                if histogram.buckets != buckets:
+                    raise ValueError(f"Bornes d'histogramme différentes pour {entry[0]}")
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+
+    def __init__(self, metrics: Metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def _series_order(item) -> tuple:
+    name, labels = item[0]
+    return name, [(key, str(value)) for key, value in labels]
+
+
+def _header(lines: list, name: str, kind: str):
+    if name in HELP:
+        lines.append(f"# HELP {name} {HELP[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(labels: dict, **extra) -> str:
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def enable(metrics: Metrics = None) -> Metrics:
+    """
+    Active l'instrumentation : le registre donné (ou un nouveau) devient
+    l'observateur du module totp et la surface commune de report.
+
+    :return: Le registre actif
+    """
+    if metrics is None:
+        metrics = totp._observer or Metrics()
+    totp._observer = metrics
+    return metrics
+
+
+def disable():
+    """Désactive l'instrumentation ; le chemin de génération redevient direct."""
+    totp._observer = None
+
+
+def active():
+    """Retourne le registre actif, ou None si l'instrumentation est désactivée."""
+    return totp._observer
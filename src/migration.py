@@ -0,0 +1,201 @@
+"""
+Import des exports Google Authenticator (otpauth-migration://offline?data=...).
+
+La charge utile est un message protobuf MigrationPayload encodé en Base64 :
+
+    MigrationPayload { repeated OtpParameters otp_parameters = 1; int32 version = 2;
+                       int32 batch_size = 3; int32 batch_index = 4; int32 batch_id = 5; }
+    OtpParameters    { bytes secret = 1; string name = 2; string issuer = 3; Algorithm algorithm = 4;
+                       DigitCount digits = 5; OtpType type = 6; int64 counter = 7; }
+
+Le format filaire est décodé directement (varints et champs délimités),
+sans dépendance protobuf.
+"""
+import base64
+import binascii
+import re
+from urllib.parse import unquote
+
+from src.uri import OTPAuthURI
+
+SCHEME = 'otpauth-migration://'
+_SCHEME_PATTERN = re.compile(re.escape(SCHEME), re.IGNORECASE)
+
+# Énumérations du format d'export (0 : non précisé, valeur par défaut de l'application)
+ALGORITHMS = {0: 'sha1', 1: 'sha1', 2: 'sha256', 3: 'sha512', 4: 'md5'}
+DIGITS = {0: 6, 1: 6, 2: 8}
+TYPES = {0: 'totp', 1: 'hotp', 2: 'totp'}
+
+# Types filaires protobuf
+VARINT, FIXED64, LENGTH_DELIMITED, FIXED32 = 0, 1, 2, 5
+
+
+def _varint(data, pos: int):
+    """Lit un entier varint. :return: (valeur, position suivante)"""
+    result = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[pos]
+        except IndexError:
+            raise ValueError("Export de migration tronqué") from None
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("Export de migration invalide : entier trop long")
+
+
+def _fields(data):
+    """
+    Parcourt les champs d'un message protobuf.
+
+    :param data: Le message (memoryview : les champs délimités sont des vues, sans copie)
+    :return: Un itérateur de couples (numéro de champ, valeur) ; la valeur est un entier
+        (varint) ou une memoryview (champ délimité) ; les champs de taille fixe sont ignorés
+    """
+    pos = 0
+    end = len(data)
+    while pos < end:
+        tag = data[pos]
+        if tag < 0x80:
+            pos += 1
+        else:
+            tag, pos = _varint(data, pos)
+        number, wire_type = tag >> 3, tag & 7
+        if wire_type == VARINT:
+            value, pos = _varint(data, pos)
+            yield number, value
+        elif wire_type == LENGTH_DELIMITED:
+            size, pos = _varint(data, pos)
+            if pos + size > end:
+                raise ValueError("Export de migration tronqué")
+            yield number, data[pos:pos + size]
+            pos += size
+        elif wire_type == FIXED64:
+            pos += 8
+        elif wire_type == FIXED32:
+            pos += 4
+        else:
+            raise ValueError(f"Export de migration invalide : type de champ {wire_type}")
+    if pos != end:
+        raise ValueError("Export de migration tronqué")
+
+
+def _account(data) -> OTPAuthURI:
+    """Décode un message OtpParameters."""
+    secret = b''
+    name = issuer = ''
+    algorithm = digits = otp_type = counter = 0
+    for number, value in _fields(data):
+        # Champs 1 à 3 délimités, 4 à 7 entiers : un autre type filaire est une corruption
+        if 1 <= number <= 7 and isinstance(value, memoryview) != (number <= 3):
+            raise ValueError(f"Export de migration invalide : type incorrect pour le champ {number}")
+        if number == 1:
+            secret = value
+        elif number == 2:
+            name = str(value, 'utf-8', 'replace')
+        elif number == 3:
+            issuer = str(value, 'utf-8', 'replace')
+        elif number == 4:
+            algorithm = value
+        elif number == 5:
+            digits = value
+        elif number == 6:
+            otp_type = value
+        elif number == 7:
+            counter = value
+    if not secret:
+        raise ValueError("Export de migration invalide : secret manquant")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Export de migration invalide : algorithme inconnu ({algorithm})")
+    if digits not in DIGITS:
+        raise ValueError(f"Export de migration invalide : nombre de chiffres inconnu ({digits})")
+    if otp_type not in TYPES:
+        raise ValueError(f"Export de migration invalide : type inconnu ({otp_type})")
+
+    # Le nom contient souvent « émetteur:compte », comme le libellé d'une URI otpauth://
+    prefix, sep, rest = name.partition(':')
+    if sep and (not issuer or prefix.strip() == issuer):
+        issuer, name = issuer or prefix.strip(), rest
+    return OTPAuthURI(
+        TYPES[otp_type],
+        issuer,
+        name.strip(),
+        base64.b32encode(secret).decode('ascii').rstrip('='),
+        ALGORITHMS[algorithm],
+        DIGITS[digits],
+        30,  # Les exports ne portent pas la période : toujours 30 secondes
+        counter,
+    )
+
+
+def payload(uri: str) -> bytes:
+    """
+    Extrait et décode la charge utile Base64 d'une URI otpauth-migration://.
+
+    :raise ValueError: si l'URI ou son paramètre data est invalide
+    """
+    uri = uri.strip()
+    if uri[:len(SCHEME)].lower() != SCHEME:
+        raise ValueError("URI de migration invalide")
+    query = uri.partition('?')[2].partition('#')[0]
+    data = None
+    for pair in query.split('&'):
+        key, _, value = pair.partition('=')
+        if key.lower() == 'data':
+            data = value
+    if not data:
+        raise ValueError("URI de migration invalide : paramètre data manquant")
+    # Base64 standard percent-encodé ; un '+' non encodé a pu devenir une espace
+    data = unquote(data).replace(' ', '+').replace('-', '+').replace('_', '/')
+    try:
+        return base64.b64decode(data + '=' * (-len(data) % 4), validate=True)
+    except binascii.Error:
+        raise ValueError("URI de migration invalide : données Base64 incorrectes") from None
+
+
+def decode_payload(data: bytes):
+    """
+    Décode une charge utile MigrationPayload, compte par compte.
+
+    :param data: Le message protobuf
+    :return: Un itérateur d'OTPAuthURI
+    """
+    for number, value in _fields(memoryview(data)):
+        if number == 1 and isinstance(value, memoryview):
+            yield _account(value)
+
+
+def split_uris(lines):
+    """
+    Extrait les URI otpauth-migration:// d'un flux de texte : une ou
+    plusieurs par ligne, séparées par des blancs ou simplement concaténées ;
+    le schéma est reconnu sans tenir compte de la casse.
+    """
+    for line in lines:
+        parts = _SCHEME_PATTERN.split(line)
+        for part in parts[1:]:
+            token = part.split(None, 1)[0] if part.strip() else ''
+            if token:
+                yield SCHEME + token
+
+
+def iter_accounts(source):
+    """
+    Importe en flux les comptes d'exports de migration : chaque URI est
+    décodée à son tour et ses comptes sont produits un par un ; une seule
+    charge utile est en mémoire à la fois.
+
+    :param source: Une URI, ou un itérable de lignes de texte (fichier ouvert, liste d'URI...)
+    :return: Un itérateur d'OTPAuthURI
+    """
+    if isinstance(source, str):
+        # Une URI seule est décodée telle quelle (un '+' devenu espace y est toléré)
+        uris = (source,) if len(_SCHEME_PATTERN.findall(source)) == 1 else split_uris((source,))
+    else:
+        uris = split_uris(source)
+    for uri in uris:
+        yield from decode_payload(payload(uri))
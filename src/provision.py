@@ -0,0 +1,206 @@
+import base64
+import hmac
+import json
+import multiprocessing
+import os
+import time
+from urllib.parse import quote
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : repli sur base64
+    np = None
+
+from src import algorithms
+from src.batch import generate_batch
+from src.totp import TOTPKey, decode_secret, truncate
+
+OUTPUT_FORMATS = ('uri', 'jsonl', 'vault')
+DEFAULT_BLOCK_SIZE = 4096
+BASE32_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+# Secrets d'un bloc dont le code est vérifié par l'auto-vérification
+VERIFY_SAMPLE = 64
+
+
+def b32encode_block(raw: bytes) -> str:
+    """
+    Encode en Base32 un bloc dont la longueur est un multiple de 5 (pas de
+    padding) ; avec NumPy, les groupes de 5 bits sont extraits en une seule
+    opération vectorisée.
+    """
+    if np is None:
+        return base64.b32encode(raw).decode('ascii')
+    groups = np.unpackbits(np.frombuffer(raw, dtype=np.uint8)).reshape(-1, 5)
+    indexes = groups @ np.array([16, 8, 4, 2, 1], dtype=np.uint8)
+    return np.frombuffer(BASE32_ALPHABET, dtype=np.uint8)[indexes].tobytes().decode('ascii')
+
+
+def mint_secrets(count: int, size: int = 20):
+    """
+    Tire `count` secrets de `size` octets en un seul appel à os.urandom et
+    les encode en Base32 en un seul passage : lorsque `size` est un multiple
+    de 5 (20 octets : 32 caractères), chaque secret correspond exactement à
+    une tranche du bloc encodé, sans padding.
+
+    :return: (octets aléatoires concaténés, liste des secrets Base32)
+    """
+    if count < 0 or size <= 0:
+        raise ValueError("Le nombre et la taille des secrets doivent être positifs")
+    raw = os.urandom(count * size)
+    if size % 5 == 0:
+        width = size // 5 * 8
+        encoded = b32encode_block(raw)
+        return raw, [encoded[i:i + width] for i in range(0, len(encoded), width)]
+    return raw, [base64.b32encode(raw[i:i + size]).decode('ascii').rstrip('=')
+                 for i in range(0, len(raw), size)]
+
+
+def self_check(raw: bytes, secrets: list, size: int, algo: str, digits: int, period: int, at: float,
+               sample: int = VERIFY_SAMPLE):
+    """
+    Vérifie un bloc de secrets de bout en bout. Tout le bloc est relu par le
+    décodeur du générateur (totp.decode_secret) et comparé aux octets tirés
+    au départ : chaque secret fait ainsi l'aller-retour exact. Le calcul des
+    codes étant le même pour toutes les clés, il n'est vérifié que sur un
+    échantillon réparti dans le bloc (premier et dernier secrets compris) :
+    leurs codes, produits par generate_batch, sont comparés à un HMAC de
+    référence calculé sur les octets tirés.
+
+    :param sample: Le nombre de secrets dont le code est vérifié (0 : tous)
+    :raise RuntimeError: si un secret ne fait pas l'aller-retour
+    """
+    if size % 5 == 0:
+        decoded = decode_secret(''.join(secrets))
+    else:
+        decoded = b''.join(decode_secret(secret) for secret in secrets)
+    if decoded != raw:
+        raise RuntimeError("Échec de l'auto-vérification : un secret ne se décode pas à l'identique")
+
+    count = len(secrets)
+    if not count:
+        return
+    if sample and count > sample:
+        indexes = sorted({index * (count - 1) // (sample - 1) for index in range(sample)}) if sample > 1 else [0]
+    else:
+        indexes = range(count)
+    keys = [TOTPKey(decoded[index * size:(index + 1) * size], algo, digits, period) for index in indexes]
+    codes = generate_batch(keys, at, as_array=True)
+    digestmod = algorithms.get(algo).digestmod
+    message = keys[0].counter_at(at).to_bytes(8, 'big')
+    for index, code in zip(indexes, codes):
+        offset = index * size
+        if truncate(hmac.digest(raw[offset:offset + size], message, digestmod), digits) != code:
+            raise RuntimeError(f"Échec de l'auto-vérification : code incorrect pour le secret {index}")
+
+
+class _Formatter:
+    """Sérialise les comptes provisionnés (URI otpauth:// ou JSONL)."""
+
+    def __init__(self, fmt: str, issuer: str, name_format: str, algo: str, digits: int, period: int):
+        self.fmt = fmt
+        self.issuer = issuer
+        self.name_format = name_format
+        self.algo = algo
+        self.digits = digits
+        self.period = period
+        # Parties constantes, préparées une seule fois
+        self._prefix = f"otpauth://totp/{quote(issuer)}:" if issuer else "otpauth://totp/"
+        self._query = (f"&issuer={quote(issuer)}" if issuer else "") + \
+            f"&algorithm={algo.upper()}&digits={digits}&period={period}"
+        self._json_issuer = json.dumps(issuer)
+        self._json_params = f'"algorithm":{json.dumps(algo)},"digits":{digits},"period":{period}'
+
+    def uri(self, name: str, secret: str) -> str:
+        return f"{self._prefix}{quote(name, safe='@')}?secret={secret}{self._query}"
+
+    def format(self, start: int, secrets: list) -> str:
+        name_format = self.name_format
+        uri = self.uri
+        if self.fmt == 'uri':
+            return ''.join(uri(name_format.format(index=index), secret) + '\n'
+                           for index, secret in enumerate(secrets, start))
+        lines = []
+        for index, secret in enumerate(secrets, start):
+            name = name_format.format(index=index)
+            lines.append(
+                f'{{"account":{json.dumps(name)},"issuer":{self._json_issuer},"name":{json.dumps(name)},'
+                f'"secret":"{secret}",{self._json_params},"uri":{json.dumps(uri(name, secret))}}}\n'
+            )
+        return ''.join(lines)
+
+
+def _mint_block(task):
+    """Tâche d'un bloc : tirage, encodage, auto-vérification et sérialisation."""
+    start, count, size, fmt, issuer, name_format, algo, digits, period, verify = task
+    raw, secrets = mint_secrets(count, size)
+    if verify:
+        self_check(raw, secrets, size, algo, digits, period, time.time())
+    if fmt == 'vault':
+        return start, count, secrets
+    return start, count, _Formatter(fmt, issuer, name_format, algo, digits, period).format(start, secrets)
+
+
+def provision(count: int, out=None, fmt: str = 'uri', issuer: str = '', name_format: str = 'user{index}',
+              start: int = 0, algo: str = 'sha1', digits: int = 6, period: int = 30, size: int = 20,
+              block_size: int = DEFAULT_BLOCK_SIZE, workers: int = 1, verify: bool = True, vault=None,
+              mp_context=None) -> dict:
+    """
+    Provisionne des comptes en flux, bloc par bloc.
+
+    :param count: Le nombre de secrets à créer
+    :param out: Le flux de sortie texte (formats uri et jsonl)
+    :param fmt: Le format de sortie (uri, jsonl ou vault)
+    :param issuer: L'émetteur inscrit dans les URI
+    :param name_format: Le modèle du nom de compte ({index} est remplacé par le numéro)
+    :param start: Le numéro du premier compte
+    :param algo: L'algorithme de hachage
+    :param digits: Le nombre de chiffres
+    :param period: La période en secondes
+    :param size: La taille des secrets en octets (20 par défaut, comme la RFC 4226 le recommande)
+    :param block_size: Le nombre de secrets tirés et écrits par bloc
+    :param workers: Le nombre de processus (1 : dans le processus courant)
+    :param verify: Vérifier chaque secret par un aller-retour dans le générateur
+    :param vault: Le coffre (Vault ouvert) recevant les comptes au format vault
+    :param mp_context: Le contexte multiprocessing à utiliser
+    :return: Les compteurs {'secrets', 'blocks', 'seconds'}
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Format de sortie inconnu : {fmt}")
+    if fmt == 'vault' and vault is None:
+        raise ValueError("Un coffre est requis pour le format vault")
+    if fmt != 'vault' and out is None:
+        raise ValueError("Un flux de sortie est requis")
+    algo = algorithms.get(algo).name
+    TOTPKey(bytes(size), algo, digits, period)  # Valide les paramètres avant de tirer quoi que ce soit
+    name_format.format(index=start)
+
+    tasks = [
+        (first, min(block_size, start + count - first), size, fmt, issuer, name_format, algo, digits, period, verify)
+        for first in range(start, start + count, block_size)
+    ]
+    began = time.perf_counter()
+    stats = {'secrets': 0, 'blocks': 0, 'seconds': 0.0}
+
+    def consume(results):
+        for first, minted, payload in results:
+            if fmt == 'vault':
+                from src.vault import VaultRecord
+                vault.put_many([
+                    VaultRecord(name_format.format(index=index), secret, algo, digits, period, issuer,
+                                name_format.format(index=index))
+                    for index, secret in enumerate(payload, first)
+                ])
+            else:
+                out.write(payload)
+            stats['secrets'] += minted
+            stats['blocks'] += 1
+
+    if workers > 1 and len(tasks) > 1:
+        context = mp_context or multiprocessing.get_context()
+        with context.Pool(workers) as pool:
+            # imap conserve l'ordre des blocs tout en les produisant en parallèle
+            consume(pool.imap(_mint_block, tasks))
+    else:
+        consume(map(_mint_block, tasks))
+    stats['seconds'] = time.perf_counter() - began
+    return stats
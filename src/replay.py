@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+from array import array
+
+SNAPSHOT_MAGIC = b'TOTPRPL1'
+SNAPSHOT_HEADER = struct.Struct('<8scQ')
+
+
+class ReplayGuard:
+    """
+    Protection contre le rejeu (RFC 6238, section 5.2) : pour chaque compte,
+    identifié par un index dense, seul le dernier compteur accepté est
+    conservé dans un tableau d'entiers 64 bits (8 octets par compte). Un code
+    n'est accepté que si son compteur est strictement supérieur.
+
+    En mode partagé, le tableau vit en mémoire partagée et peut être transmis
+    aux processus du moteur de validation.
+    """
+
+    def __init__(self, capacity: int, shared: bool = False, mp_context=None):
+        """
+        :param capacity: Le nombre de comptes (index 0 à capacity - 1)
+        :param shared: Utiliser une mémoire partagée entre processus
+        :param mp_context: Le contexte multiprocessing (celui du moteur de validation)
+        """
+        self.capacity = capacity
+        self.shared = shared
+        # On stocke compteur + 1 : la valeur 0 (initiale) signifie « jamais accepté »
+        if shared:
+            self._values = (mp_context or multiprocessing.get_context()).Array('q', capacity, lock=True)
+            self._lock = self._values.get_lock()
+            self._array = self._values.get_obj()
+        else:
+            self._array = array('q', bytes(8 * capacity))
+            self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Seul le tableau partagé est transmis aux processus ; il ne peut pas l'être en mode local
+        if not self.shared:
+            raise TypeError("Seul un ReplayGuard partagé peut être transmis à un autre processus")
+        return {'capacity': self.capacity, 'values': self._values}
+
+    def __setstate__(self, state):
+        self.capacity = state['capacity']
+        self.shared = True
+        self._values = state['values']
+        self._lock = self._values.get_lock()
+        self._array = self._values.get_obj()
+
+    def __len__(self):
+        return self.capacity
+
+    def _index(self, account_index: int) -> int:
+        # Un index négatif désignerait silencieusement un autre compte
+        if not 0 <= account_index < self.capacity:
+            raise IndexError(f"Index de compte hors limites : {account_index} (capacité {self.capacity})")
+        return account_index
+
+    def check_and_set(self, account_index: int, counter: int) -> bool:
+        """
+        Accepte atomiquement un compteur s'il n'a pas déjà été utilisé.
+
+        :param account_index: L'index dense du compte
+        :param counter: Le compteur du code vérifié
+        :return: True si le code est accepté, False s'il s'agit d'un rejeu
+        """
+        account_index = self._index(account_index)
+        value = counter + 1
+        with self._lock:
+            if value <= self._array[account_index]:
+                return False
+            self._array[account_index] = value
+            return True
+
+    def last(self, account_index: int):
+        """Retourne le dernier compteur accepté d'un compte, ou None."""
+        value = self._array[self._index(account_index)]
+        return value - 1 if value else None
+
+    def reset(self, account_index: int):
+        account_index = self._index(account_index)
+        with self._lock:
+            self._array[account_index] = 0
+
+    def snapshot(self, path: str):
+        """Écrit l'état sur disque de façon atomique (fichier temporaire puis remplacement)."""
+        temporary = path + '.tmp'
+        with self._lock:
+            data = memoryview(self._array).cast('B').tobytes()
+        with open(temporary, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, sys.byteorder[0].encode('ascii'), self.capacity))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int = None, shared: bool = False, mp_context=None) -> 'ReplayGuard':
+        """
+        Recharge un état sauvegardé.
+
+        :param path: Le fichier de sauvegarde
+        :param capacity: La capacité souhaitée (par défaut : celle de la sauvegarde) ; peut l'agrandir
+        :param shared: Utiliser une mémoire partagée entre processus
+        :param mp_context: Le contexte multiprocessing
+        """
+        with open(path, 'rb') as f:
+            magic, byteorder, saved = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("Ce fichier n'est pas une sauvegarde anti-rejeu")
+            values = array('q')
+            values.frombytes(f.read(8 * saved))
+        if byteorder != sys.byteorder[0].encode('ascii'):
+            values.byteswap()
+
+        guard = cls(max(saved, capacity or 0), shared, mp_context)
+        count = min(saved, guard.capacity)
+        memoryview(guard._array).cast('B')[:8 * count] = memoryview(values).cast('B')[:8 * count]
+        return guard
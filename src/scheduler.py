@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RolloverEvent:
+    """Changement de code d'un compte à une limite de période."""
+
+    __slots__ = ('account_id', 'code', 'counter', 'deadline')
+
+    def __init__(self, account_id, code: str, counter: int, deadline: float):
+        self.account_id = account_id
+        self.code = code
+        self.counter = counter
+        self.deadline = deadline
+
+    def __repr__(self):
+        return f"RolloverEvent(account_id={self.account_id!r}, counter={self.counter}, deadline={self.deadline})"
+
+
+class _Group:
+    """Comptes partageant la même (période, phase) : leurs codes changent aux mêmes instants."""
+
+    __slots__ = ('period', 'phase', 'accounts', 'boundary', 'handle')
+
+    def __init__(self, period: int, phase: float):
+        self.period = period
+        self.phase = phase
+        self.accounts = {}  # identifiant -> [clé, compteur, code]
+        self.boundary = 0.0
+        self.handle = None
+
+    def next_boundary(self, now: float) -> float:
+        return self.phase + ((now - self.phase) // self.period + 1) * self.period
+
+
+class RolloverScheduler:
+    """
+    Planificateur unique des changements de code : les comptes sont groupés
+    par (période, phase) et chaque groupe ne se réveille qu'une fois par
+    limite de période, via une échéance de la boucle asyncio recalculée à
+    partir de l'horloge (pas de dérive cumulée). Seuls les comptes dont le
+    compteur a changé sont régénérés, puis publiés aux abonnés.
+
+    Une horloge qui porte ses propres minuteries (call_at, comme
+    clock.SimulatedClock) remplace la boucle : les limites de période se
+    succèdent alors au rythme du temps simulé.
+    """
+
+    def __init__(self, loop=None, clock=time.time, lookahead=None):
+        """
+        :param loop: La boucle asyncio (par défaut : la boucle courante au premier ajout)
+        :param clock: La source de temps (horodatage Unix en secondes, voir src.clock)
+        :param lookahead: Un LookaheadBuffer optionnel fournissant les codes précalculés
+        """
+        self.loop = loop
+        self.clock = clock
+        self.lookahead = lookahead
+        self._groups = {}
+        self._index = {}  # identifiant -> groupe
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """
+        Abonne callback(events) aux changements de code.
+
+        :return: Une fonction de désabonnement
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback) if callback in self._subscribers else None
+
+    def _publish(self, events: list):
+        for callback in list(self._subscribers):
+            try:
+                callback(events)
+            except Exception:
+                logger.exception("Erreur dans un abonné du planificateur")
+
+    def add(self, account_id, key) -> str:
+        """
+        Ajoute (ou remplace) un compte et retourne son code courant.
+
+        :param account_id: L'identifiant du compte
+        :param key: La TOTPKey précompilée
+        """
+        now = self.clock()
+        group = self._index.get(account_id)
+        if group is not None:
+            state = group.accounts[account_id]
+            if state[0] is key and state[1] == key.counter_at(now):
+                return state[2]
+            self.remove(account_id)
+
+        entry = (key.period, key.t0 % key.period)
+        group = self._groups.get(entry)
+        if group is None:
+            group = self._groups[entry] = _Group(*entry)
+        counter = key.counter_at(now)
+        if self.lookahead is not None:
+            self.lookahead.add(account_id, key)
+            code = self.lookahead.code_at(account_id, counter)
+        else:
+            code = key.code_at(counter)
+        group.accounts[account_id] = [key, counter, code]
+        self._index[account_id] = group
+        if group.handle is None:
+            self._schedule(group, now)
+        return code
+
+    def remove(self, account_id):
+        """Retire un compte ; le groupe est arrêté s'il devient vide."""
+        group = self._index.pop(account_id, None)
+        if group is None:
+            return
+        if self.lookahead is not None:
+            self.lookahead.remove(account_id)
+        del group.accounts[account_id]
+        if not group.accounts:
+            if group.handle is not None:
+                group.handle.cancel()
+            del self._groups[(group.period, group.phase)]
+
+    def __contains__(self, account_id):
+        return account_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def code(self, account_id) -> str:
+        """Retourne le dernier code calculé d'un compte."""
+        return self._index[account_id].accounts[account_id][2]
+
+    def deadline(self, account_id) -> float:
+        """Retourne l'horodatage du prochain changement de code d'un compte."""
+        group = self._index[account_id]
+        return group.next_boundary(self.clock()) if group.handle is None else group.boundary
+
+    def remaining(self, account_id, now: float = None) -> float:
+        """Retourne le temps restant (en secondes) avant le prochain code."""
+        now = self.clock() if now is None else now
+        return max(0.0, self.deadline(account_id) - now)
+
+    def progress(self, account_id, now: float = None) -> float:
+        """Retourne la fraction de la période restante (1.0 juste après un changement, 0.0 à l'échéance)."""
+        return self.remaining(account_id, now) / self._index[account_id].period
+
+    def _schedule(self, group: _Group, now: float):
+        group.boundary = group.next_boundary(now)
+        self._wake(group, now)
+
+    def _wake(self, group: _Group, now: float):
+        """Programme le réveil d'un groupe à sa limite, sur l'horloge si elle a ses minuteries, sinon sur la boucle."""
+        call_at = getattr(self.clock, 'call_at', None)
+        if call_at is not None:
+            group.handle = call_at(group.boundary, self._fire, group)
+            return
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        group.handle = self.loop.call_at(self.loop.time() + (group.boundary - now), self._fire, group)
+
+    def _fire(self, group: _Group):
+        started = time.perf_counter()
+        now = self.clock()
+        if now < group.boundary:
+            # Réveil légèrement en avance par rapport à l'horloge : on replanifie sur la même limite
+            self._wake(group, now)
+            return
+
+        boundary = group.boundary
+        deadline = group.next_boundary(now)
+        lookahead = self.lookahead
+        events = []
+        for account_id, state in group.accounts.items():
+            key = state[0]
+            counter = key.counter_at(now)
+            if counter != state[1]:
+                state[1] = counter
+                state[2] = key.code_at(counter) if lookahead is None else lookahead.code_at(account_id, counter)
+                events.append(RolloverEvent(account_id, state[2], counter, deadline))
+        self._schedule(group, now)
+        if events:
+            self._publish(events)
+        observer = metrics.active()
+        if observer is not None:
+            # Retard du réveil par rapport à la limite, puis coût du traitement du groupe
+            observer.observe('totp_rollover_lag_seconds', now - boundary)
+            observer.observe('totp_rollover_seconds', time.perf_counter() - started)
+            observer.inc('totp_rollovers_total', len(events))
+
+    def stop(self):
+        """Annule tous les réveils programmés (les comptes sont conservés)."""
+        for group in self._groups.values():
+            if group.handle is not None:
+                group.handle.cancel()
+                group.handle = None
@@ -0,0 +1,129 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+# Borne supérieure de tous les mots commençant par un préfixe donné
+_PREFIX_END = '\U0010ffff'
+
+
+def words(text: str) -> list:
+    """
+    Découpe un texte en mots normalisés pour la recherche : casse ignorée,
+    accents retirés, séparés par tout caractère non alphanumérique
+    ("Société Générale : alice@example.com" -> societe, generale, alice, example, com).
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c if c.isalnum() else ' ' for c in text if not unicodedata.combining(c)).split()
+
+
+class PrefixIndex:
+    """
+    Index de recherche par préfixe sur l'émetteur et le nom des comptes.
+
+    Chaque mot de l'émetteur et du nom est rangé dans un tableau trié (mots,
+    numéros d'ordre et identifiants des comptes en tableaux parallèles) :
+    les comptes dont un mot commence par un préfixe forment une plage
+    contiguë, trouvée par dichotomie. Les ajouts et retraits sont insérés à
+    leur place sans reconstruire l'index ; les chargements en masse
+    (add_many) trient une seule fois.
+    """
+
+    def __init__(self):
+        self._terms = []     # mots, triés
+        self._seqs = []      # numéro d'ordre du compte de chaque mot (croissant à mot égal)
+        self._owners = []    # identifiant du compte de chaque mot
+        self._accounts = {}  # identifiant -> (numéro d'ordre, mots)
+        self._next = 0
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, account_id):
+        return account_id in self._accounts
+
+    def _register(self, account_id, texts) -> tuple:
+        seq = self._next
+        self._next += 1
+        terms = sorted({term for text in texts if text for term in words(text)})
+        self._accounts[account_id] = (seq, terms)
+        return seq, terms
+
+    def add(self, account_id, *texts):
+        """
+        Indexe (ou réindexe) un compte.
+
+        :param account_id: L'identifiant du compte
+        :param texts: Les textes recherchables (émetteur, nom...)
+        """
+        self.remove(account_id)
+        seq, terms = self._register(account_id, texts)
+        for term in terms:
+            # Le nouveau numéro est le plus grand : il se place après les mots égaux
+            index = bisect_right(self._terms, term)
+            self._terms.insert(index, term)
+            self._seqs.insert(index, seq)
+            self._owners.insert(index, account_id)
+
+    def add_many(self, accounts):
+        """Indexe des comptes donnés sous forme de couples (identifiant, textes), avec un seul tri."""
+        accounts = dict(accounts)  # En cas de doublon, le dernier l'emporte
+        for account_id in accounts:
+            self.remove(account_id)
+        entries = list(zip(self._terms, self._seqs, self._owners))
+        for account_id, texts in accounts.items():
+            seq, terms = self._register(account_id, texts)
+            entries.extend((term, seq, account_id) for term in terms)
+        # Les numéros d'ordre sont uniques : les identifiants ne sont jamais comparés
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self._terms = [entry[0] for entry in entries]
+        self._seqs = [entry[1] for entry in entries]
+        self._owners = [entry[2] for entry in entries]
+
+    def remove(self, account_id):
+        entry = self._accounts.pop(account_id, None)
+        if entry is None:
+            return
+        seq, terms = entry
+        for term in terms:
+            lo = bisect_left(self._terms, term)
+            hi = bisect_right(self._terms, term, lo)
+            index = bisect_left(self._seqs, seq, lo, hi)
+            del self._terms[index]
+            del self._seqs[index]
+            del self._owners[index]
+
+    def clear(self):
+        self._terms.clear()
+        self._seqs.clear()
+        self._owners.clear()
+        self._accounts.clear()
+
+    def _range(self, prefix: str) -> tuple:
+        lo = bisect_left(self._terms, prefix)
+        return lo, bisect_left(self._terms, prefix + _PREFIX_END, lo)
+
+    def search(self, query: str) -> list:
+        """
+        Retourne les comptes dont chaque mot de la requête préfixe un mot de
+        l'émetteur ou du nom ("goo al" trouve "Google : alice").
+
+        Seule la plus courte des plages des préfixes est parcourue ; les
+        autres préfixes sont vérifiés sur les mots des comptes candidats. Le
+        coût est celui de quelques dichotomies plus le nombre de résultats.
+
+        :param query: Le texte saisi
+        :return: Les identifiants trouvés, dans l'ordre alphabétique du mot reconnu
+            (tous les comptes, dans l'ordre d'ajout, si la requête est vide)
+        """
+        prefixes = words(query)
+        if not prefixes:
+            return list(self._accounts)
+        ranges = [self._range(prefix) for prefix in prefixes]
+        narrowest = min(range(len(prefixes)), key=lambda i: ranges[i][1] - ranges[i][0])
+        lo, hi = ranges[narrowest]
+        found = dict.fromkeys(self._owners[lo:hi])  # Un compte peut avoir plusieurs mots dans la plage
+        others = prefixes[:narrowest] + prefixes[narrowest + 1:]
+        if not others:
+            return list(found)
+        accounts = self._accounts
+        return [account_id for account_id in found
+                if all(any(term.startswith(prefix) for term in accounts[account_id][1]) for prefix in others)]
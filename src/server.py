@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from src import algorithms, metrics
+from src.batch import generate_batch
+from src.cache import secret_fingerprint
+from src.totp import TOTPKey
+from src.verify import match_code, window_offsets
+
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 16 * 1024 * 1024
+# Tolérance maximale acceptée en vérification (périodes de part et d'autre)
+MAX_WINDOW = 10
+# Nombre de chiffres maximal d'un code (au-delà, la troncature RFC 4226 n'a plus de sens)
+MAX_DIGITS = 10
+# Horodatage maximal accepté (environ l'an 36812) : le compteur tient sur 8 octets
+MAX_TIMESTAMP = 2 ** 40
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _integer(payload: dict, name: str, default: int, minimum: int = 1, maximum: int = None) -> int:
+    """Lit un paramètre entier de la requête et vérifie ses bornes."""
+    value = payload.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+        raise HTTPError(400, f"Paramètre {name} invalide : entier attendu")
+    value = int(value)
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"entre {minimum} et {maximum}" if maximum is not None else f"au moins {minimum}"
+        raise HTTPError(400, f"Paramètre {name} invalide : doit valoir {bounds}")
+    return value
+
+
+def _timestamp(payload: dict) -> float:
+    """Lit l'horodatage de la requête (par défaut : l'heure actuelle)."""
+    value = payload.get('at')
+    if value is None:
+        return time.time()
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= MAX_TIMESTAMP:
+        raise HTTPError(400, f"Paramètre at invalide : horodatage Unix entre 0 et {MAX_TIMESTAMP} attendu")
+    return float(value)
+
+
+class TOTPServer:
+    """
+    Service asyncio local exposant la génération et la vérification de codes
+    en HTTP/1.1 (JSON), sur une socket Unix ou sur localhost.
+
+    Les requêtes portant sur la même clé et le même compteur qui arrivent dans
+    la fenêtre de regroupement partagent un seul calcul HMAC ; les lots
+    volumineux sont confiés à un exécuteur pour ne pas bloquer la boucle.
+    """
+
+    def __init__(self, accounts: dict = None, executor=None, coalesce_window: float = 0.05,
+                 inline_batch_size: int = 256):
+        """
+        :param accounts: Les comptes préchargés {identifiant: TOTPKey}
+        :param executor: L'exécuteur des lots (par défaut : celui de la boucle)
+        :param coalesce_window: La durée (en secondes) pendant laquelle un calcul est partagé
+        :param inline_batch_size: La taille de lot au-delà de laquelle le calcul est déporté
+        """
+        self.accounts = accounts or {}
+        self.executor = executor
+        self.coalesce_window = coalesce_window
+        self.inline_batch_size = inline_batch_size
+        self.requests = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._server = None
+
+    # -- Calcul des codes -------------------------------------------------
+
+    def _key_source(self, payload: dict):
+        """Retourne (empreinte, fabrique de clé, période, t0) pour une requête."""
+        account = payload.get('account')
+        if account is not None:
+            key = self.accounts.get(account)
+            if key is None:
+                raise HTTPError(404, f"Compte inconnu : {account}")
+            return key.fingerprint, lambda: key, key.period, key.t0
+
+        secret = payload.get('secret')
+        if not isinstance(secret, str) or not secret:
+            raise HTTPError(400, "Secret requis")
+        algo = algorithms.get(str(payload.get('algorithm', 'sha1'))).name
+        digits = _integer(payload, 'digits', 6, 1, MAX_DIGITS)
+        period = _integer(payload, 'period', 30)
+        built = []
+
+        def factory():
+            if not built:
+                built.append(TOTPKey.from_secret(secret, algo, digits, period))
+            return built[0]
+
+        return secret_fingerprint(secret, algo, digits, period), factory, period, 0
+
+    async def _code(self, fingerprint: bytes, counter: int, factory) -> str:
+        """Calcule un code, ou rejoint un calcul identique encore dans la fenêtre de regroupement."""
+        entry = (fingerprint, counter)
+        future = self._inflight.get(entry)
+        if future is not None:
+            self.coalesced += 1
+            observer = metrics.active()
+            if observer is not None:
+                observer.inc('totp_server_coalesced_total')
+            return await future
+
+        loop = asyncio.get_running_loop()
+        future = self._inflight[entry] = loop.create_future()
+        try:
+            future.set_result(factory().code_at(counter))
+        except Exception as e:
+            future.set_exception(e)
+        loop.call_later(self.coalesce_window, self._inflight.pop, entry, None)
+        return await future
+
+    async def generate(self, payload: dict) -> dict:
+        fingerprint, factory, period, t0 = self._key_source(payload)
+        now = _timestamp(payload)
+        counter = int((now - t0) // period)
+        code = await self._code(fingerprint, counter, factory)
+        return {'code': code, 'counter': counter, 'remaining': period - (now - t0) % period}
+
+    async def verify(self, payload: dict) -> dict:
+        if 'code' not in payload:
+            raise HTTPError(400, "Code requis")
+        fingerprint, factory, period, t0 = self._key_source(payload)
+        # Chaque période de la fenêtre coûte un calcul : la fenêtre est bornée
+        window = _integer(payload, 'window', 1, 0, MAX_WINDOW)
+        now = _timestamp(payload)
+        counter = int((now - t0) // period)
+        candidates = [
+            (offset, await self._code(fingerprint, counter + offset, factory))
+            for offset in window_offsets(window) if counter + offset >= 0
+        ]
+        offset = match_code(candidates, payload['code'])
+        return {'valid': offset is not None, 'offset': offset}
+
+    async def batch(self, payload: dict) -> dict:
+        secrets = payload.get('secrets')
+        if not isinstance(secrets, list):
+            raise HTTPError(400, "Liste de secrets requise")
+        if not all(isinstance(secret, str) and secret for secret in secrets):
+            raise HTTPError(400, "Liste de secrets invalide : clés Base32 attendues")
+        at = _timestamp(payload)
+        args = (
+            secrets, at,
+            str(payload.get('algorithm', 'sha1')),
+            _integer(payload, 'digits', 6, 1, MAX_DIGITS),
+            _integer(payload, 'period', 30),
+        )
+        if len(secrets) <= self.inline_batch_size:
+            codes = generate_batch(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            codes = await loop.run_in_executor(self.executor, generate_batch, *args)
+        return {'codes': codes, 'at': at}
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        if method == 'GET' and path == '/health':
+            return {'status': 'ok', 'requests': self.requests, 'coalesced': self.coalesced}
+        if method == 'GET' and path == '/metrics':
+            observer = metrics.active()
+            if observer is None:
+                raise HTTPError(404, "Instrumentation désactivée (--metrics)")
+            return observer.to_prometheus()
+        routes = {'/generate': self.generate, '/verify': self.verify, '/batch': self.batch}
+        handler = routes.get(path)
+        if handler is None:
+            raise HTTPError(404, f"Route inconnue : {path}")
+        if method != 'POST':
+            raise HTTPError(405, "Méthode non autorisée")
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Corps JSON invalide")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Corps JSON invalide")
+        return await handler(payload)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, {'error': "En-têtes trop volumineux"}, False)
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = request_line.split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': "Requête invalide"}, False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': "Content-Length invalide"}, False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': "Corps trop volumineux"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                self.requests += 1
+                path = target.split('?', 1)[0]
+                start = time.perf_counter()
+                try:
+                    status, result = 200, await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, result = e.status, {'error': str(e)}
+                except (ValueError, TypeError, OverflowError) as e:
+                    status, result = 400, {'error': str(e)}
+                except Exception as e:
+                    # Une erreur inattendue ne doit jamais couper la connexion sans réponse
+                    status, result = 500, {'error': f"Erreur interne : {type(e).__name__}"}
+                    observer = metrics.active()
+                    if observer is not None:
+                        observer.error('server', e)
+                observer = metrics.active()
+                if observer is not None:
+                    route = path if status != 404 else 'other'
+                    observer.observe('totp_server_request_seconds', time.perf_counter() - start, route=route)
+                    observer.inc('totp_server_requests_total', route=route, status=status)
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, result, keep_alive: bool):
+        if isinstance(result, str):
+            body, content_type = result.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = json.dumps(result).encode('utf-8'), 'application/json'
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def start(self, path: str = None, host: str = '127.0.0.1', port: int = 8765):
+        """Démarre le service sur une socket Unix (path) ou sur host:port."""
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path, limit=MAX_HEADER_SIZE)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_SIZE)
+        return self._server
+
+    async def serve_forever(self, path: str = None, host: str = '127.0.0.1', port: int = 8765):
+        server = await self.start(path, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def load_accounts(path: str) -> dict:
+    """Charge un fichier JSON {identifiant: clé Base32 ou dict(secret, algorithm, digits, period)}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    accounts = {}
+    for account_id, params in data.items():
+        if isinstance(params, str):
+            params = {'secret': params}
+        accounts[account_id] = TOTPKey.from_secret(
+            params['secret'],
+            params.get('algorithm', 'sha1'),
+            params.get('digits', 6),
+            params.get('period', 30),
+        )
+    return accounts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service local de génération/vérification TOTP")
+    parser.add_argument('--unix', help="Chemin de la socket Unix")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--accounts', help="Fichier JSON des comptes préchargés")
+    parser.add_argument('--coalesce', type=float, default=0.05, help="Fenêtre de regroupement (secondes)")
+    parser.add_argument('--metrics', action='store_true', help="Activer l'instrumentation (GET /metrics)")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    server = TOTPServer(
+        accounts=load_accounts(args.accounts) if args.accounts else None,
+        coalesce_window=args.coalesce,
+    )
+    if args.unix and os.path.exists(args.unix):
+        os.unlink(args.unix)
+    print(f"Écoute sur {args.unix or f'{args.host}:{args.port}'}")
+    try:
+        asyncio.run(server.serve_forever(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,381 @@
 import hmac
 import hashlib
 import time
-import base64
 
-def generate_totp_secret(secret_key: str, algo: str = 'sha1', digits: int = 6, period: int = 30) -> str:
+from src import algorithms
+
+# Observateur des mesures (voir src.metrics.enable) ; None : aucune instrumentation
+_observer = None
+
+
+def _b32_table() -> bytes:
+    table = bytearray(_B32_INVALID * 256)
+    for symbols in (_B32_ALPHABET, _B32_ALPHABET.lower()):
+        for symbol, digit in zip(symbols, b'0123456789abcdefghijklmnopqrstuv'):
+            table[symbol] = digit
+    return bytes(table)
+
+
+_B32_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+# Table Base32 -> chiffres de int(..., 32) ; tout autre octet devient invalide
+_B32_INVALID = b'!'
+_B32_TABLE = _b32_table()
+# Séparateurs et padding, supprimés pendant la traduction
+_B32_IGNORED = b' -=\t\r\n'
+_B32_IGNORED_TEXT = str.maketrans('', '', _B32_IGNORED.decode('ascii'))
+# Types acceptés comme octets de clé bruts (sans décodage ni copie)
+RAW_KEY_TYPES = (bytes, bytearray, memoryview)
+
+
+def decode_secret(secret_key) -> bytearray:
+    """
+    Décode une clé secrète Base32 (insensible à la casse, padding optionnel,
+    espaces et tirets ignorés).
+
+    Le texte est normalisé en un seul passage par une table de traduction :
+    chaque symbole Base32 devient le chiffre équivalent en base 32, puis
+    int(..., 32) reconstitue les octets, sans chaîne intermédiaire.
+
+    Les copies transitoires du texte sont des bytearray effacés avant le
+    retour. L'entier intermédiaire et les octets produits par to_bytes sont
+    immuables : ils ne peuvent pas être effacés et sont seulement libérés
+    (comme la chaîne fournie par l'appelant). wipe() n'efface donc que le
+    tampon retourné.
+
+    :param secret_key: La clé secrète en Base32 (str, ou octets ASCII)
+    :return: Les octets de la clé, dans un tampon effaçable (voir wipe)
+    """
+    if isinstance(secret_key, str):
+        try:
+            text = bytearray(secret_key, 'ascii')
+        except UnicodeEncodeError:
+            raise ValueError("La clé secrète n'est pas un format Base32 valide") from None
+    elif isinstance(secret_key, RAW_KEY_TYPES):
+        text = bytearray(secret_key)
+    else:
+        raise TypeError("La clé secrète doit être une chaîne Base32 ou des octets ASCII")
+    symbols = text.translate(_B32_TABLE, _B32_IGNORED)
+    try:
+        length = len(symbols)
+        # 1, 3 ou 6 symboles en fin de groupe ne correspondent à aucun nombre d'octets
+        if _B32_INVALID in symbols or length % 8 in (1, 3, 6):
+            raise ValueError("La clé secrète n'est pas un format Base32 valide")
+        size = length * 5 // 8
+        if not size:
+            return bytearray()
+        # Les bits restants du dernier symbole ne portent pas de données
+        return bytearray((int(symbols, 32) >> (length * 5 - size * 8)).to_bytes(size, 'big'))
+    finally:
+        text[:] = bytes(len(text))
+        symbols[:] = bytes(len(symbols))
+
+
+def normalize_secret(secret_key: str) -> str:
+    """
+    Forme canonique d'une clé Base32 : en majuscules, sans les séparateurs
+    ni le padding que decode_secret ignore ("jbsw-y3dp ehpk=" -> "JBSWY3DPEHPK").
+    """
+    return secret_key.translate(_B32_IGNORED_TEXT).upper()
+
+
+def key_fingerprint(key, algo: str = 'sha1', digits: int = 6, period: int = 30, t0: int = 0) -> bytes:
+    """
+    Empreinte SHA-256 d'une clé décodée et de ses paramètres (voir TOTPKey.fingerprint),
+    calculée sans préparer l'état HMAC.
+    """
+    h = hashlib.sha256(f'{algo.lower()}:{int(digits)}:{int(period)}:{t0}:'.encode('utf-8'))
+    h.update(key)
+    return h.digest()
+
+
+def wipe(buffer):
+    """
+    Efface (remet à zéro) un tampon de clé modifiable.
+
+    :param buffer: Un bytearray ou une memoryview inscriptible
+    """
+    view = memoryview(buffer)
+    if view.readonly:
+        raise ValueError("Le tampon de clé n'est pas modifiable")
+    view = view.cast('B')
+    view[:] = bytes(len(view))
+
+
+def resolve_algorithm(algo: str):
+    """
+    Retourne le constructeur hashlib correspondant au nom d'algorithme.
+
+    :param algo: Le nom de l'algorithme (sha1, sha256, sha512...)
+    :return: Le constructeur de hachage (ou le nom OpenSSL) utilisable par hmac
+    """
+    return algorithms.get(algo).digestmod
+
+
+def truncate(hmac_result: bytes, digits: int) -> int:
+    """
+    Applique la troncature dynamique de la RFC 4226 à un résultat HMAC.
+
+    :param hmac_result: Le condensat HMAC
+    :param digits: Le nombre de chiffres du code
+    :return: La valeur entière du code
+    """
+    offset = hmac_result[-1] & 0xf
+    code = int.from_bytes(hmac_result[offset:offset + 4], 'big') & 0x7fffffff
+    return code % (10 ** digits)
+
+
+class TOTPKey:
+    """
+    Clé TOTP précompilée : la clé Base32 est décodée, l'algorithme résolu et
+    l'état HMAC interne/externe calculé une seule fois, puis réutilisé pour
+    chaque code.
+
+    Utilisée comme gestionnaire de contexte, la clé est effacée en sortie
+    (voir wipe).
+    """
+
+    __slots__ = ('key', 'algo', 'digits', 'period', 't0', '_hmac', '_format', '_fingerprint')
+
+    def __init__(self, key, algo: str = 'sha1', digits: int = 6, period: int = 30, t0: int = 0):
+        """
+        :param key: Les octets de la clé secrète (déjà décodée) : bytes, bytearray ou
+            memoryview, conservés sans copie
+        :param algo: L'algorithme de hachage à utiliser (sha1, sha256, sha512)
+        :param digits: Le nombre de chiffres de la clé TOTP (par défaut : 6)
+        :param period: La période de temps pour la clé TOTP (par défaut : 30 secondes)
+        :param t0: L'instant de départ du comptage (par défaut : 0, l'epoch Unix)
+        """
+        digits = int(digits)
+        period = int(period)
+        if digits <= 0:
+            raise ValueError("Le nombre de chiffres doit être positif")
+        if period <= 0:
+            raise ValueError("La période doit être positive")
+
+        self.key = key
+        self.algo = algo.lower()
+        self.digits = digits
+        self.period = period
+        self.t0 = t0
+        # L'objet HMAC garde l'état interne/externe ; on le copie à chaque code
+        if isinstance(key, memoryview):
+            # hmac n'accepte que bytes/bytearray : copie transitoire, effacée aussitôt
+            material = bytearray(key)
+            try:
+                self._hmac = hmac.new(material, None, resolve_algorithm(algo))
+            finally:
+                wipe(material)
+        else:
+            self._hmac = hmac.new(key, None, resolve_algorithm(algo))
+        self._format = '{:0%dd}' % digits
+        self._fingerprint = None
+
+    @classmethod
+    def from_secret(cls, secret_key: str, algo: str = 'sha1', digits: int = 6, period: int = 30, t0: int = 0) -> 'TOTPKey':
+        """Construit une clé à partir d'une clé secrète en Base32."""
+        algorithms.get(algo)  # Algorithme inutilisable : rejet avant tout décodage
+        return cls(decode_secret(secret_key), algo, digits, period, t0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wipe()
+
+    def wipe(self):
+        """
+        Efface les octets de la clé s'ils sont modifiables (bytearray, memoryview
+        inscriptible) et abandonne l'état HMAC : la clé n'est plus utilisable.
+        L'état conservé par OpenSSL est libéré avec l'objet HMAC. Seul ce
+        tampon est effacé : le texte Base32 d'origine et les valeurs
+        immuables du décodage ne le sont pas (voir decode_secret).
+        """
+        if not isinstance(self.key, bytes) and not memoryview(self.key).readonly:
+            wipe(self.key)
+        self._hmac = None
+
+    def __repr__(self):
+        return f"TOTPKey(algo={self.algo!r}, digits={self.digits}, period={self.period})"
+
+    @property
+    def fingerprint(self) -> bytes:
+        """
+        Empreinte SHA-256 de la clé et de ses paramètres, utilisable comme clé
+        de cache sans conserver le secret.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = key_fingerprint(self.key, self.algo, self.digits, self.period, self.t0)
+        return self._fingerprint
+
+    @property
+    def digest_size(self) -> int:
+        """Taille en octets du condensat HMAC produit par la clé."""
+        return self._hmac.digest_size
+
+    def counter_at(self, timestamp: float) -> int:
+        """Retourne le compteur de temps pour un horodatage donné."""
+        return int((timestamp - self.t0) // self.period)
+
+    def digest_at(self, counter: int) -> bytes:
+        """Retourne le condensat HMAC brut pour un compteur donné."""
+        h = self._hmac.copy()
+        h.update(counter.to_bytes(8, 'big'))
+        return h.digest()
+
+    def code_at(self, counter: int) -> str:
+        """
+        Calcule le code pour un compteur donné.
+
+        :param counter: Le compteur (8 octets, big-endian)
+        :return: Le code sous forme de chaîne de caractères
+        """
+        observer = _observer
+        if observer is not None:
+            return _observed_code_at(self, counter, observer)
+        h = self._hmac.copy()
+        h.update(counter.to_bytes(8, 'big'))
+        return self._format.format(truncate(h.digest(), self.digits))
+
+    def at(self, timestamp: float) -> str:
+        """Retourne le code valide à l'horodatage donné."""
+        return self.code_at(self.counter_at(timestamp))
+
+    def now(self, clock=None) -> str:
+        """
+        Retourne le code actuellement valide.
+
+        :param clock: La source de temps (voir src.clock ; par défaut : time.time)
+        """
+        return self.code_at(self.counter_at(time.time() if clock is None else clock()))
+
+
+def as_key(secret, algo: str = 'sha1', digits: int = 6, period: int = 30) -> TOTPKey:
+    """
+    Retourne une clé précompilée : les TOTPKey sont renvoyées telles quelles,
+    les enregistrements exposant to_key() (URI analysées...) sont convertis,
+    les octets bruts (bytes, bytearray, memoryview) sont utilisés sans copie et
+    les chaînes Base32 sont décodées avec les paramètres donnés.
+    """
+    if isinstance(secret, TOTPKey):
+        return secret
+    if isinstance(secret, RAW_KEY_TYPES):
+        return TOTPKey(secret, algo, digits, period)
+    to_key = getattr(secret, 'to_key', None)
+    if to_key is not None:
+        return to_key()
+    return TOTPKey.from_secret(secret, algo, digits, period)
+
+
+def digests_at(keys, timestamp: float) -> list:
+    """
+    Calcule les condensats HMAC d'une séquence de clés pour un même horodatage.
+    Les octets du compteur sont calculés une seule fois par (période, t0).
+
+    :param keys: Les TOTPKey précompilées
+    :param timestamp: L'horodatage commun
+    :return: Les condensats, dans l'ordre des clés
+    """
+    observer = _observer
+    if observer is not None:
+        return _observed_digests_at(keys, timestamp, observer)
+    return _digests_at(keys, timestamp)
+
+
+def _digests_at(keys, timestamp: float) -> list:
+    counters = {}
+    digests = []
+    append = digests.append
+    for key in keys:
+        step = (key.period, key.t0)
+        counter_bytes = counters.get(step)
+        if counter_bytes is None:
+            counter_bytes = counters[step] = key.counter_at(timestamp).to_bytes(8, 'big')
+        h = key._hmac.copy()
+        h.update(counter_bytes)
+        append(h.digest())
+    return digests
+
+
+def generate_totp_secret(secret_key, algo: str = 'sha1', digits: int = 6, period: int = 30, clock=None) -> str:
     """
     Génère une clé TOTP à partir d'une clé secrète en suivant la RFC 6238.
 
-    :param secret_key: La clé secrète en Base32 à utiliser pour la génération
+    :param secret_key: La clé secrète en Base32 (str), ou ses octets bruts (bytes,
+        bytearray, memoryview) utilisés directement, sans décodage ni copie
     :param algo: L'algorithme de hachage à utiliser (sha1, sha256, sha512)
     :param digits: Le nombre de chiffres de la clé TOTP (par défaut : 6)
     :param period: La période de temps pour la clé TOTP (par défaut : 30 secondes)
+    :param clock: La source de temps (voir src.clock ; par défaut : time.time)
     :return: La clé TOTP sous forme de chaîne de caractères
     """
+    observer = _observer
+    if observer is not None:
+        return _observed_generate(secret_key, algo, digits, period, clock, observer)
+    try:
+        if isinstance(secret_key, RAW_KEY_TYPES):
+            return TOTPKey(secret_key, algo, digits, period).now(clock)
+        # La clé décodée ne sert qu'à ce code : elle est effacée aussitôt
+        with TOTPKey.from_secret(secret_key, algo, digits, period) as key:
+            return key.now(clock)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Erreur lors de la génération du code TOTP: {str(e)}")
+
+
+def _observed_code_at(key: TOTPKey, counter: int, observer) -> str:
+    """Variante instrumentée de TOTPKey.code_at : chaque étape est chronométrée."""
+    clock = time.perf_counter
+    start = clock()
+    h = key._hmac.copy()
+    h.update(counter.to_bytes(8, 'big'))
+    digest = h.digest()
+    hashed = clock()
+    value = truncate(digest, key.digits)
+    truncated = clock()
+    code = key._format.format(value)
+    formatted = clock()
+    observer.call('code', key.algo)
+    observer.stage('hmac', hashed - start, key.algo)
+    observer.stage('truncate', truncated - hashed, key.algo)
+    observer.stage('format', formatted - truncated, key.algo)
+    return code
+
+
+def _observed_digests_at(keys, timestamp: float, observer) -> list:
+    """Variante instrumentée de digests_at : durée du lot et nombre de condensats par algorithme."""
+    start = time.perf_counter()
+    digests = _digests_at(keys, timestamp)
+    observer.observe('totp_batch_seconds', time.perf_counter() - start, stage='hmac')
+    counts = {}
+    for key in keys:
+        counts[key.algo] = counts.get(key.algo, 0) + 1
+    for algorithm, count in counts.items():
+        observer.inc('totp_calls_total', count, operation='batch', algorithm=algorithm)
+    return digests
+
+
+def _observed_generate(secret_key, algo: str, digits: int, period: int, clock, observer) -> str:
+    """Variante instrumentée de generate_totp_secret (décodage, précompilation, erreurs)."""
+    algorithm = str(algo).lower()
+    timer = time.perf_counter
+    start = timer()
+    observer.call('generate', algorithm)
     try:
-        # Normaliser et padding de la clé Base32
-        secret_key = secret_key.upper().strip()
-        padding = '=' * ((8 - len(secret_key) % 8) % 8)
-        padded_secret = (secret_key + padding).encode('utf-8')
-        
-        # Décoder la clé Base32
-        key = base64.b32decode(padded_secret)
-        
-        # Obtenir le compteur de temps
-        counter = int(time.time() // period)
-        
-        # Convertir le compteur en bytes (8 octets, big-endian)
-        counter_bytes = counter.to_bytes(8, 'big')
-        
-        # Calculer le HMAC
-        hash_algo = getattr(hashlib, algo.lower())
-        hmac_obj = hmac.new(key, counter_bytes, hash_algo)
-        hmac_result = hmac_obj.digest()
-
-        # Générer le code TOTP selon la RFC 6238
-        offset = hmac_result[-1] & 0xf
-        code_bytes = hmac_result[offset:offset + 4]
-        code = int.from_bytes(code_bytes, 'big') & 0x7fffffff
-        totp_value = code % (10 ** digits)
-
-        return str(totp_value).zfill(digits)
-
-    except base64.binascii.Error:
-        raise ValueError("La clé secrète n'est pas un format Base32 valide")
+        algorithms.get(algo)
+        raw = isinstance(secret_key, RAW_KEY_TYPES)
+        key_bytes = secret_key if raw else decode_secret(secret_key)
+        decoded = timer()
+        key = TOTPKey(key_bytes, algo, digits, period)
+        observer.stage('decode', decoded - start, algorithm)
+        observer.stage('setup', timer() - decoded, algorithm)
+        if raw:
+            return key.now(clock)
+        with key:
+            return key.now(clock)
     except Exception as e:
-        raise ValueError(f"Erreur lors de la génération du code TOTP: {str(e)}")
\ No newline at end of file
+        observer.error('generate', e)
+        observer.stage('error', timer() - start, algorithm)
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError(f"Erreur lors de la génération du code TOTP: {str(e)}")
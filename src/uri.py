@@ -0,0 +1,147 @@
+from src.totp import TOTPKey, normalize_secret
+
+BASE32_ALPHABET = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ234567')
+HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+
+def _unquote(value: str) -> str:
+    """Décode le percent-encoding (et '+' en espace) sans passer par urllib."""
+    if '+' in value:
+        value = value.replace('+', ' ')
+    if '%' not in value:
+        return value
+    head, *chunks = value.split('%')
+    out = bytearray(head.encode('utf-8'))
+    for chunk in chunks:
+        if len(chunk) >= 2 and chunk[0] in HEX_DIGITS and chunk[1] in HEX_DIGITS:
+            out.append(int(chunk[:2], 16))
+            out += chunk[2:].encode('utf-8')
+        else:
+            out += b'%' + chunk.encode('utf-8')
+    return out.decode('utf-8', 'replace')
+
+
+class OTPAuthURI:
+    """Paramètres extraits d'une URI otpauth:// (à traiter en lecture seule)."""
+
+    __slots__ = ('type', 'issuer', 'name', 'secret', 'algorithm', 'digits', 'period', 'counter')
+
+    def __init__(self, type: str, issuer: str, name: str, secret: str, algorithm: str = 'sha1', digits: int = 6,
+                 period: int = 30, counter: int = 0):
+        self.type = type
+        self.issuer = issuer
+        self.name = name
+        self.secret = secret
+        self.algorithm = algorithm
+        self.digits = digits
+        self.period = period
+        self.counter = counter
+
+    def __repr__(self):
+        return (f"OTPAuthURI(type={self.type!r}, issuer={self.issuer!r}, name={self.name!r}, "
+                f"algorithm={self.algorithm!r}, digits={self.digits}, period={self.period})")
+
+    def to_key(self) -> TOTPKey:
+        """Construit la clé précompilée correspondante."""
+        return TOTPKey.from_secret(self.secret, self.algorithm, self.digits, self.period)
+
+    def to_uri(self) -> str:
+        """Reconstruit l'URI otpauth:// correspondante."""
+        from urllib.parse import quote
+        label = f"{quote(self.issuer)}:{quote(self.name, safe='@')}" if self.issuer else quote(self.name, safe='@')
+        query = f"secret={self.secret}"
+        if self.issuer:
+            query += f"&issuer={quote(self.issuer)}"
+        query += f"&algorithm={self.algorithm.upper()}&digits={self.digits}"
+        query += f"&counter={self.counter}" if self.type == 'hotp' else f"&period={self.period}"
+        return f"otpauth://{self.type}/{label}?{query}"
+
+    def as_dict(self) -> dict:
+        return {
+            'type': self.type,
+            'secret': self.secret,
+            'algorithm': self.algorithm,
+            'digits': self.digits,
+            'period': self.period,
+            'counter': self.counter,
+            'issuer': self.issuer,
+            'name': self.name,
+        }
+
+
+def parse_uri(uri: str) -> OTPAuthURI:
+    """
+    Parse une URI otpauth://totp/ ou otpauth://hotp/ en une seule passe :
+    paramètres dans n'importe quel ordre, percent-encoding, secrets en
+    minuscules ou sans padding. Rien n'est mis en cache : l'URI porte le secret.
+
+    :param uri: L'URI (otpauth://totp/Émetteur:compte?secret=...&issuer=...)
+    :return: L'enregistrement OTPAuthURI
+    """
+    uri = uri.strip()
+    if uri[:10].lower() != 'otpauth://':
+        raise ValueError("URI TOTP invalide")
+
+    otp_type, _, rest = uri[10:].partition('/')
+    otp_type = otp_type.lower()
+    if otp_type not in ('totp', 'hotp'):
+        raise ValueError(f"URI TOTP invalide: type '{otp_type}' non supporté")
+
+    label, _, query = rest.partition('?')
+    query = query.partition('#')[0]
+    label = _unquote(label)
+    issuer, sep, name = label.partition(':')
+    if not sep:
+        issuer, name = '', label
+
+    params = {}
+    for pair in query.split('&'):
+        if pair:
+            key, _, value = pair.partition('=')
+            params[key.lower()] = _unquote(value)
+
+    secret = normalize_secret(params.get('secret', ''))
+    if not secret:
+        raise ValueError("URI TOTP invalide: secret manquant")
+    if not BASE32_ALPHABET.issuperset(secret):
+        raise ValueError("La clé secrète n'est pas un format Base32 valide")
+
+    try:
+        digits = int(params.get('digits') or 6)
+        period = int(params.get('period') or 30)
+        counter = int(params.get('counter') or 0)
+    except ValueError:
+        raise ValueError("URI TOTP invalide: digits, period et counter doivent être des nombres")
+    if otp_type == 'hotp' and 'counter' not in params:
+        raise ValueError("URI HOTP invalide: counter manquant")
+
+    return OTPAuthURI(
+        otp_type,
+        params.get('issuer') or issuer.strip(),
+        name.strip(),
+        secret,
+        (params.get('algorithm') or 'sha1').lower(),
+        digits,
+        period,
+        counter,
+    )
+
+
+def parse_many(uris, skip_errors: bool = False) -> list:
+    """
+    Parse une séquence d'URI.
+
+    :param uris: Les URI à analyser
+    :param skip_errors: Remplacer les URI invalides par None au lieu de lever ValueError
+    :return: Les enregistrements, dans l'ordre
+    """
+    records = []
+    append = records.append
+    for uri in uris:
+        try:
+            append(parse_uri(uri))
+        except ValueError:
+            if not skip_errors:
+                raise
+            append(None)
+    return records
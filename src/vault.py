@@ -0,0 +1,359 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # cryptography est optionnel : seul le coffre en dépend
+    AESGCM = None
+
+from src.totp import TOTPKey
+
+MAGIC = b'TOTPVLT\x01'
+VERSION = 2
+
+# En-tête de taille fixe : magic, version, paramètres scrypt, sel, index principal,
+# dernier segment du journal et nombre total d'entrées du journal, vérificateur du
+# mot de passe (nonce + tag AES-GCM)
+HEADER = struct.Struct('>8sHBBB3x16sQQQQ12s16s')
+HEADER_SIZE = 128
+
+# Entrée d'index : empreinte du compte, position, longueur, drapeaux
+ENTRY = struct.Struct('>16sQII')
+DELETED = 1
+
+# En-tête d'un segment du journal : position du segment précédent (0 : aucun), nombre d'entrées
+SEGMENT = struct.Struct('>QI4x')
+
+NONCE_SIZE = 12
+JOURNAL_LIMIT = 1024
+
+
+class VaultRecord:
+    """Compte stocké dans le coffre."""
+
+    __slots__ = ('account_id', 'secret', 'algorithm', 'digits', 'period', 'issuer', 'name', 'type', 'counter')
+
+    def __init__(self, account_id: str, secret: str, algorithm: str = 'sha1', digits: int = 6, period: int = 30,
+                 issuer: str = '', name: str = '', type: str = 'totp', counter: int = 0):
+        self.account_id = account_id
+        self.secret = secret
+        self.algorithm = algorithm
+        self.digits = digits
+        self.period = period
+        self.issuer = issuer
+        self.name = name
+        self.type = type
+        self.counter = counter
+
+    def __repr__(self):
+        return f"VaultRecord(account_id={self.account_id!r}, issuer={self.issuer!r}, name={self.name!r})"
+
+    @classmethod
+    def from_uri(cls, account_id: str, uri) -> 'VaultRecord':
+        """Construit un enregistrement depuis une URI analysée (OTPAuthURI)."""
+        return cls(account_id, uri.secret, uri.algorithm, uri.digits, uri.period, uri.issuer, uri.name,
+                   uri.type, uri.counter)
+
+    def to_key(self) -> TOTPKey:
+        """Construit la clé précompilée correspondante."""
+        return TOTPKey.from_secret(self.secret, self.algorithm, self.digits, self.period)
+
+    def _dumps(self) -> bytes:
+        return json.dumps([self.account_id, self.secret, self.algorithm, self.digits, self.period,
+                           self.issuer, self.name, self.type, self.counter], separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def _loads(cls, data: bytes) -> 'VaultRecord':
+        return cls(*json.loads(data))
+
+
+class Vault:
+    """
+    Coffre de comptes dans un fichier unique projeté en mémoire :
+
+    - un en-tête de taille fixe (paramètres scrypt, sel, positions des index) ;
+    - des enregistrements chiffrés individuellement (AES-256-GCM), ajoutés en fin de fichier ;
+    - un index principal trié d'entrées de taille fixe, parcouru par dichotomie ;
+    - un journal des écritures récentes, chaîne de segments ajoutés en fin de fichier (une
+      écriture n'ajoute que ses propres entrées), fusionné dans l'index principal au-delà
+      de JOURNAL_LIMIT entrées.
+
+    L'ouverture ne lit que l'en-tête et le journal, et seuls les comptes
+    demandés sont déchiffrés.
+    """
+
+    def __init__(self, path: str, password: str):
+        """
+        Ouvre un coffre existant.
+
+        :param path: Le chemin du fichier
+        :param password: Le mot de passe maître
+        """
+        if AESGCM is None:
+            raise RuntimeError("Le module 'cryptography' est requis pour le coffre (pip install cryptography)")
+        self.path = path
+        self._file = open(path, 'r+b')
+        self._map = None
+        try:
+            self._load(password)
+        except Exception:
+            self._file.close()
+            raise
+
+    @classmethod
+    def create(cls, path: str, password: str, n_log2: int = 14, r: int = 8, p: int = 1) -> 'Vault':
+        """
+        Crée un coffre vide.
+
+        :param path: Le chemin du fichier (ne doit pas exister)
+        :param password: Le mot de passe maître
+        :param n_log2: Le coût scrypt (log2 de N)
+        """
+        if AESGCM is None:
+            raise RuntimeError("Le module 'cryptography' est requis pour le coffre (pip install cryptography)")
+        salt = os.urandom(16)
+        cipher, _ = _derive(password, salt, n_log2, r, p)
+        nonce = os.urandom(NONCE_SIZE)
+        verifier = cipher.encrypt(nonce, b'', MAGIC + salt)
+        header = HEADER.pack(MAGIC, VERSION, n_log2, r, p, salt, HEADER_SIZE, 0, 0, 0, nonce, verifier)
+        with open(path, 'xb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(path, password)
+
+    # -- Lecture ----------------------------------------------------------
+
+    def _load(self, password: str):
+        raw = self._file.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE or raw[:8] != MAGIC:
+            raise ValueError("Ce fichier n'est pas un coffre TOTP")
+        (_, version, n_log2, r, p, salt, self._index_offset, self._index_count,
+         self._journal_offset, self._journal_entries, nonce, verifier) = HEADER.unpack_from(raw)
+        if version != VERSION:
+            raise ValueError(f"Version de coffre non supportée : {version}")
+
+        self._params = (n_log2, r, p, salt, nonce, verifier)
+        self._cipher, self._index_key = _derive(password, salt, n_log2, r, p)
+        try:
+            self._cipher.decrypt(nonce, verifier, MAGIC + salt)
+        except Exception:
+            raise ValueError("Mot de passe du coffre incorrect")
+
+        self._remap()
+        self._journal = {}
+        self._read_journal()
+        self._count = self._index_count
+        for digest, (_, _, flags) in self._journal.items():
+            in_main = self._search_main(digest) is not None
+            if flags & DELETED:
+                self._count -= in_main
+            else:
+                self._count += not in_main
+
+    def _read_entries(self, position: int, count: int):
+        for i in range(count):
+            digest, offset, length, flags = ENTRY.unpack_from(self._map, position + i * ENTRY.size)
+            self._journal[digest] = (offset, length, flags)
+
+    def _read_journal(self):
+        """Remonte la chaîne des segments depuis le plus récent, puis les applique dans l'ordre."""
+        segments = []
+        position = self._journal_offset
+        while position:
+            if position + SEGMENT.size > len(self._map):
+                raise ValueError("Journal du coffre corrompu")
+            previous, count = SEGMENT.unpack_from(self._map, position)
+            if previous >= position:  # Les segments sont ajoutés : chaque lien pointe en arrière
+                raise ValueError("Journal du coffre corrompu")
+            segments.append((position + SEGMENT.size, count))
+            position = previous
+        for position, count in reversed(segments):
+            self._read_entries(position, count)
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _digest(self, account_id: str) -> bytes:
+        return hashlib.blake2b(account_id.encode('utf-8'), key=self._index_key, digest_size=16).digest()
+
+    def _search_main(self, digest: bytes):
+        """Recherche dichotomique dans l'index principal projeté en mémoire."""
+        low, high = 0, self._index_count
+        base = self._index_offset
+        size = ENTRY.size
+        while low < high:
+            middle = (low + high) // 2
+            position = base + middle * size
+            current = self._map[position:position + 16]
+            if current < digest:
+                low = middle + 1
+            elif current > digest:
+                high = middle
+            else:
+                _, offset, length, flags = ENTRY.unpack_from(self._map, position)
+                return offset, length, flags
+        return None
+
+    def _find(self, digest: bytes):
+        entry = self._journal.get(digest)
+        if entry is None:
+            entry = self._search_main(digest)
+        if entry is None or entry[2] & DELETED:
+            return None
+        return entry
+
+    def _decrypt(self, digest: bytes, offset: int, length: int) -> VaultRecord:
+        blob = self._map[offset:offset + length]
+        try:
+            data = self._cipher.decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], digest)
+        except Exception:
+            raise ValueError("Enregistrement du coffre corrompu")
+        return VaultRecord._loads(data)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, account_id: str):
+        return self._find(self._digest(account_id)) is not None
+
+    def get(self, account_id: str) -> VaultRecord:
+        """Déchiffre et retourne un compte ; lève KeyError s'il n'existe pas."""
+        digest = self._digest(account_id)
+        entry = self._find(digest)
+        if entry is None:
+            raise KeyError(account_id)
+        return self._decrypt(digest, entry[0], entry[1])
+
+    def _entries(self):
+        """Itère sur les entrées vivantes (empreinte, position, longueur)."""
+        for i in range(self._index_count):
+            digest, offset, length, flags = ENTRY.unpack_from(self._map, self._index_offset + i * ENTRY.size)
+            if digest not in self._journal and not flags & DELETED:
+                yield digest, offset, length
+        for digest, (offset, length, flags) in self._journal.items():
+            if not flags & DELETED:
+                yield digest, offset, length
+
+    def records(self):
+        """Itère sur tous les comptes, déchiffrés un par un."""
+        for digest, offset, length in self._entries():
+            yield self._decrypt(digest, offset, length)
+
+    # -- Écriture ---------------------------------------------------------
+
+    def put(self, record: VaultRecord):
+        """Ajoute ou remplace un compte."""
+        self.put_many([record])
+
+    def put_many(self, records):
+        """Ajoute ou remplace des comptes : les enregistrements sont ajoutés en fin de fichier."""
+        self._file.seek(0, os.SEEK_END)
+        position = self._file.tell()
+        chunks = []
+        written = {}
+        for record in records:
+            digest = self._digest(record.account_id)
+            nonce = os.urandom(NONCE_SIZE)
+            blob = nonce + self._cipher.encrypt(nonce, record._dumps(), digest)
+            chunks.append(blob)
+            if digest not in written and self._find(digest) is None:
+                self._count += 1
+            written[digest] = (position, len(blob), 0)
+            position += len(blob)
+        self._file.write(b''.join(chunks))
+        self._commit(written)
+
+    def delete(self, account_id: str):
+        """Supprime un compte ; lève KeyError s'il n'existe pas."""
+        digest = self._digest(account_id)
+        if self._find(digest) is None:
+            raise KeyError(account_id)
+        self._count -= 1
+        self._commit({digest: (0, 0, DELETED)})
+
+    def _commit(self, written: dict):
+        """
+        Ajoute un segment de journal portant les seules entrées écrites (ou un
+        nouvel index fusionné quand le journal est trop long), puis l'en-tête
+        qui le référence : une écriture coûte ses enregistrements et 32 octets
+        par entrée, quelle que soit la taille du coffre.
+        """
+        self._journal.update(written)
+        self._journal_entries += len(written)
+        self._file.seek(0, os.SEEK_END)
+        if self._journal_entries > JOURNAL_LIMIT:
+            entries = {}
+            for i in range(self._index_count):
+                digest, offset, length, flags = ENTRY.unpack_from(self._map, self._index_offset + i * ENTRY.size)
+                entries[digest] = (offset, length, flags)
+            entries.update(self._journal)
+            self._index_offset = self._file.tell()
+            live = sorted((d, e) for d, e in entries.items() if not e[2] & DELETED)
+            self._file.write(b''.join(ENTRY.pack(d, o, n, f) for d, (o, n, f) in live))
+            self._index_count = len(live)
+            self._journal = {}
+            self._journal_offset = self._journal_entries = 0
+        else:
+            position = self._file.tell()
+            self._file.write(SEGMENT.pack(self._journal_offset, len(written)))
+            self._file.write(b''.join(ENTRY.pack(d, o, n, f) for d, (o, n, f) in written.items()))
+            self._journal_offset = position
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._write_header(self._file)
+        self._remap()
+
+    def _write_header(self, f):
+        n_log2, r, p, salt, nonce, verifier = self._params
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, n_log2, r, p, salt, self._index_offset, self._index_count,
+                            self._journal_offset, self._journal_entries, nonce, verifier))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def compact(self):
+        """Réécrit le coffre avec les seuls enregistrements vivants et un index unique."""
+        temporary = self.path + '.compact'
+        with open(temporary, 'wb') as f:
+            f.write(b'\0' * HEADER_SIZE)
+            live = []
+            for digest, offset, length in sorted(self._entries()):
+                live.append((digest, f.tell(), length))
+                f.write(self._map[offset:offset + length])
+            self._index_offset = f.tell()
+            self._index_count = len(live)
+            f.write(b''.join(ENTRY.pack(d, o, n, 0) for d, o, n in live))
+            self._journal = {}
+            self._journal_offset = self._journal_entries = 0
+            self._write_header(f)
+        self._map.close()
+        self._map = None
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, 'r+b')
+        self._remap()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _derive(password: str, salt: bytes, n_log2: int, r: int, p: int):
+    """Dérive la clé de chiffrement et la clé d'index depuis le mot de passe (scrypt)."""
+    material = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=1 << n_log2, r=r, p=p,
+                              maxmem=256 * 1024 * 1024, dklen=64)
+    return AESGCM(material[:32]), material[32:]
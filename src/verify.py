@@ -0,0 +1,66 @@
+import hmac
+import time
+
+from src.cache import CodeCache
+from src.totp import as_key
+
+# Mémoïsation (empreinte de clé, compteur) -> code, partagée entre les appels
+_memo = CodeCache(maxsize=4096)
+
+
+def window_offsets(window: int) -> list:
+    """Retourne les décalages candidats, du plus proche au plus éloigné : 0, -1, 1, -2, 2..."""
+    offsets = [0]
+    for step in range(1, window + 1):
+        offsets.append(-step)
+        offsets.append(step)
+    return offsets
+
+
+def match_code(candidates, code: str):
+    """
+    Compare un code soumis à des candidats (décalage, code) en temps constant :
+    tous les candidats sont comparés, même après une correspondance.
+
+    :param candidates: Les couples (décalage, code attendu), du plus probable au moins probable
+    :param code: Le code soumis par l'utilisateur
+    :return: Le décalage du premier candidat correspondant, ou None
+    """
+    submitted = str(code).strip().encode('utf-8')
+    matched = None
+    for offset, candidate in candidates:
+        if hmac.compare_digest(candidate.encode('utf-8'), submitted) and matched is None:
+            matched = offset
+    return matched
+
+
+def verify(key, code: str, window: int = 1, at: float = None, algo: str = 'sha1', digits: int = 6,
+           period: int = 30, clock=None):
+    """
+    Vérifie un code soumis dans une fenêtre de ±window périodes ; les
+    candidats sont comparés en temps constant (voir match_code).
+
+    :param key: La TOTPKey précompilée ou la clé secrète en Base32
+    :param code: Le code soumis par l'utilisateur
+    :param window: Le nombre de périodes tolérées avant et après l'instant courant
+    :param at: L'horodatage de vérification (par défaut : l'heure actuelle)
+    :param algo: L'algorithme utilisé si la clé est fournie en Base32
+    :param digits: Le nombre de chiffres si la clé est fournie en Base32
+    :param period: La période si la clé est fournie en Base32
+    :param clock: La source de temps utilisée si `at` n'est pas donné (voir src.clock ; par défaut : time.time)
+    :return: Le décalage (en périodes) du code reconnu, ou None
+    """
+    if window < 0:
+        raise ValueError("La fenêtre de vérification doit être positive")
+    key = as_key(key, algo, digits, period)
+    if at is not None:
+        now = at
+    else:
+        now = time.time() if clock is None else clock()
+    counter = key.counter_at(now)
+    # Marge de 2 * window : tous les candidats restent valides pendant la période courante
+    return match_code(
+        ((offset, _memo.code_at(key, counter + offset, now, grace=2 * window))
+         for offset in window_offsets(window) if counter + offset >= 0),
+        code,
+    )
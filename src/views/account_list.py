@@ -0,0 +1,242 @@
+import asyncio
+import math
+
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN, ROW
+
+# Hauteur fixe d'une ligne (pixels) : la position de défilement donne directement le premier index visible
+ROW_HEIGHT = 44
+# Lignes matérialisées au-delà de la zone visible, de part et d'autre
+OVERSCAN = 2
+# Délai de regroupement des écritures de widgets (une image à 60 Hz)
+FRAME = 1 / 60
+
+
+class _Row:
+    """Ligne matérialisée, réaffectée au compte visible à sa position."""
+
+    __slots__ = ('box', 'label', 'code', 'countdown', 'account_id', 'texts')
+
+    def __init__(self, on_copy):
+        self.label = toga.Label('', style=Pack(flex=1))
+        self.code = toga.Label('', style=Pack(font_weight="bold", font_size=16, width=90, text_align="right"))
+        self.countdown = toga.Label('', style=Pack(width=40, text_align="right"))
+        copy_button = toga.Button('Copier', on_press=lambda widget, **kwargs: on_copy(self), style=Pack(padding_left=5))
+        self.box = toga.Box(
+            children=[self.label, self.code, self.countdown, copy_button],
+            style=Pack(direction=ROW, height=ROW_HEIGHT, padding=(0, 5), alignment="center"),
+        )
+        self.account_id = None
+        # Derniers textes écrits (libellé, code, compte à rebours) : seules les différences sont écrites
+        self.texts = [None, None, None]
+
+    def write(self, slot: int, widget, text: str):
+        if self.texts[slot] != text:
+            self.texts[slot] = text
+            widget.text = text
+
+
+class AccountList:
+    """
+    Liste défilante de comptes, chacun avec son code et son compte à rebours.
+
+    Seules les lignes visibles (plus OVERSCAN de part et d'autre) existent
+    sous forme de widgets Toga : elles sont réaffectées aux comptes lors du
+    défilement, et deux boîtes vides de la hauteur des lignes absentes
+    conservent la taille de la zone défilante. Les changements de code sont
+    reçus du RolloverScheduler (qui ne publie que les comptes dont le
+    compteur a changé) ; ceux des comptes hors écran sont ignorés et les
+    autres sont appliqués en un seul passage par image.
+    """
+
+    def __init__(self, scheduler, loop=None, visible_rows: int = 8, on_copy=None):
+        """
+        :param scheduler: Le RolloverScheduler partagé qui calcule les codes
+        :param loop: La boucle asyncio de l'application
+        :param visible_rows: Le nombre de lignes visibles dans la zone défilante
+        :param on_copy: callback(account_id, code) appelé par le bouton de copie d'une ligne
+        """
+        self.scheduler = scheduler
+        self.loop = loop
+        self.on_copy = on_copy
+        self.capacity = visible_rows + 2 * OVERSCAN
+        self._accounts = []  # identifiants, dans l'ordre d'affichage
+        self._labels = {}    # identifiant -> libellé affiché
+        self._filter = None  # identifiants affichés (résultat d'une recherche), None : tous
+        self._rows = []      # lignes matérialisées (au plus capacity)
+        self._visible = {}   # identifiant -> ligne qui l'affiche
+        self._dirty = set()
+        self._relayout = True
+        self._frame = None
+        self._tick = None
+
+        self._top = toga.Box(style=Pack(height=0))
+        self._bottom = toga.Box(style=Pack(height=0))
+        self._content = toga.Box(children=[self._top, self._bottom], style=Pack(direction=COLUMN))
+        self.widget = toga.ScrollContainer(
+            content=self._content,
+            horizontal=False,
+            on_scroll=self._on_scroll,
+            style=Pack(height=visible_rows * ROW_HEIGHT, flex=1),
+        )
+        self._unsubscribe = scheduler.subscribe(self._on_rollover)
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, account_id):
+        return account_id in self._labels
+
+    # -- Comptes ------------------------------------------------------------
+
+    def add(self, account_id, key, label: str = ''):
+        """
+        Ajoute (ou remplace) un compte en fin de liste.
+
+        :param account_id: L'identifiant du compte dans le planificateur
+        :param key: La TOTPKey précompilée
+        :param label: Le libellé affiché (émetteur : nom)
+        """
+        if account_id not in self._labels:
+            self._accounts.append(account_id)
+        self._labels[account_id] = label or str(account_id)
+        self.scheduler.add(account_id, key)
+        self._dirty.add(account_id)
+        self._changed()
+
+    def add_many(self, accounts):
+        """Ajoute des comptes donnés sous forme de triplets (identifiant, clé, libellé)."""
+        for account_id, key, label in accounts:
+            if account_id not in self._labels:
+                self._accounts.append(account_id)
+            self._labels[account_id] = label or str(account_id)
+            self.scheduler.add(account_id, key)
+            self._dirty.add(account_id)
+        self._changed()
+
+    def remove(self, account_id):
+        if self._labels.pop(account_id, None) is None:
+            return
+        self._accounts.remove(account_id)
+        if self._filter is not None and account_id in self._filter:
+            self._filter.remove(account_id)
+        self.scheduler.remove(account_id)
+        self._changed()
+
+    def clear(self):
+        for account_id in self._accounts:
+            self.scheduler.remove(account_id)
+        self._accounts.clear()
+        self._labels.clear()
+        self._filter = None
+        self._changed()
+
+    def show(self, account_ids=None):
+        """
+        N'affiche que les comptes donnés, dans cet ordre (résultat d'une
+        recherche), et revient en haut de la liste.
+
+        :param account_ids: Les identifiants à afficher ; None : tous les comptes
+        """
+        labels = self._labels
+        self._filter = None if account_ids is None else [i for i in account_ids if i in labels]
+        self.widget.vertical_position = 0
+        self._changed()
+
+    def close(self):
+        """Se désabonne du planificateur et annule les rafraîchissements programmés."""
+        self._unsubscribe()
+        for handle in (self._frame, self._tick):
+            if handle is not None:
+                handle.cancel()
+        self._frame = self._tick = None
+
+    # -- Événements -----------------------------------------------------------
+
+    def _changed(self):
+        self._relayout = True
+        self._request_frame()
+
+    def _on_scroll(self, widget, **kwargs):
+        self._relayout = True
+        self._request_frame()
+
+    def _on_rollover(self, events):
+        visible = self._visible
+        dirty = [event.account_id for event in events if event.account_id in visible]
+        if dirty:
+            self._dirty.update(dirty)
+            self._request_frame()
+
+    def _on_copy(self, row: _Row):
+        if self.on_copy is not None and row.account_id in self.scheduler:
+            self.on_copy(row.account_id, self.scheduler.code(row.account_id))
+
+    def _request_frame(self):
+        if self._frame is None:
+            if self.loop is None:
+                self.loop = asyncio.get_event_loop()
+            self._frame = self.loop.call_later(FRAME, self._render)
+
+    # -- Rendu --------------------------------------------------------------
+
+    def _render(self):
+        """Applique en un seul passage les changements accumulés depuis la dernière image."""
+        self._frame = None
+        if self._relayout:
+            self._relayout = False
+            self._layout()
+        scheduler = self.scheduler
+        for account_id in self._dirty:
+            row = self._visible.get(account_id)
+            if row is not None:
+                row.write(1, row.code, scheduler.code(account_id))
+        self._dirty.clear()
+        self._countdown()
+
+    def _layout(self):
+        """Réaffecte les lignes matérialisées aux comptes de la zone visible."""
+        accounts = self._accounts if self._filter is None else self._filter
+        count = len(accounts)
+        self._resize(min(count, self.capacity))
+        size = len(self._rows)
+        position = self.widget.vertical_position or 0
+        first = max(0, min(int(position // ROW_HEIGHT) - OVERSCAN, count - size))
+        self._top.style.height = first * ROW_HEIGHT
+        self._bottom.style.height = (count - first - size) * ROW_HEIGHT
+
+        scheduler = self.scheduler
+        self._visible = {}
+        for row, account_id in zip(self._rows, accounts[first:first + size]):
+            self._visible[account_id] = row
+            if row.account_id != account_id or account_id in self._dirty:
+                row.account_id = account_id
+                row.write(0, row.label, self._labels[account_id])
+                row.write(1, row.code, scheduler.code(account_id))
+
+    def _resize(self, size: int):
+        """Crée ou détruit des lignes pour n'en garder que `size` (jamais plus que capacity)."""
+        while len(self._rows) < size:
+            row = _Row(self._on_copy)
+            self._rows.append(row)
+            self._content.insert(len(self._rows), row.box)
+        while len(self._rows) > size:
+            self._content.remove(self._rows.pop().box)
+
+    def _countdown(self):
+        """Met à jour les comptes à rebours visibles puis programme la seconde suivante."""
+        if self._tick is not None:
+            self._tick.cancel()
+            self._tick = None
+        if not self._visible:
+            return
+        scheduler = self.scheduler
+        now = scheduler.clock()
+        for account_id, row in self._visible.items():
+            row.write(2, row.countdown, f"{math.ceil(scheduler.remaining(account_id, now))} s")
+        self._tick = self.loop.call_later(1.0 - now % 1 or 1.0, self._on_tick)
+
+    def _on_tick(self):
+        self._tick = None
+        self._request_frame()
@@ -1,10 +1,6 @@
 import toga
-import time
 import sys
 import os
-import asyncio
-import pyperclip
-import re
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
@@ -14,7 +10,14 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from src.totp import generate_totp_secret  # Import relatif depuis le dossier parent
+from src import algorithms, metrics, migration
+from src.clipboard import DEFAULT_TTL, ClipboardService, default_backend
+from src.lookahead import LookaheadBuffer
+from src.scheduler import RolloverScheduler
+from src.search import PrefixIndex
+from src.totp import TOTPKey  # Import relatif depuis le dossier parent
+from src.uri import parse_uri
+from src.views.account_list import ROW_HEIGHT, AccountList
 
 if getattr(sys, 'frozen', False):
     # Si le programme est exécuté en tant qu'exécutable
@@ -28,15 +31,39 @@ LOGO = os.path.join(base_path, 'resources','TOTP.png')
 CLIPBOARD = os.path.join(base_path, 'resources','clipboard.png')
 CLIPBOARD_COPY = os.path.join(base_path, 'resources','clipboard-1.png')
 
+# Identifiant du compte affiché dans le planificateur
+ACCOUNT = 'main'
+# Nombre de codes à venir précalculés par compte
+LOOKAHEAD_DEPTH = 2
+# Nombre de lignes visibles de la liste des comptes
+ACCOUNT_ROWS = 6
+
 class MainWindow(toga.MainWindow):
     def __init__(self, title, app):
         super().__init__(
             title,
-            size=(300, 470),
+            size=(360, 580 + ACCOUNT_ROWS * ROW_HEIGHT),
             resizable=False
         )
         
-        self.update_task = None
+        # Planificateur unique des changements de code (compte principal et liste),
+        # rattaché à la boucle de l'application au premier code
+        self.lookahead = LookaheadBuffer(depth=LOOKAHEAD_DEPTH, behind=0)
+        self.scheduler = RolloverScheduler(lookahead=self.lookahead)
+        self.scheduler.subscribe(self.on_rollover)
+        self.progress_handle = None
+        # Clé précompilée réutilisée tant que les paramètres ne changent pas
+        self.totp_key = None
+        self.totp_params = None
+        # Instrumentation optionnelle (TOTP_METRICS=1), exportable via metrics.active().to_prometheus()
+        if os.environ.get('TOTP_METRICS'):
+            metrics.enable()
+        # Presse-papier non bloquant, effacé après TOTP_CLIPBOARD_TTL secondes (0 : jamais)
+        self.clipboard = ClipboardService(
+            default_backend(on_error=lambda e: self.app.loop.call_soon_threadsafe(self._copy_failed, e)),
+            ttl=float(os.environ.get('TOTP_CLIPBOARD_TTL', DEFAULT_TTL)),
+            on_notice=self.show_notice,
+        )
         
         # Création des widgets
         self.secret_input = toga.TextInput(style=Pack(flex=1))
@@ -45,26 +72,7 @@ class MainWindow(toga.MainWindow):
         
         # Liste déroulante pour les algorithmes
         self.algo_selection = toga.Selection(
-            items=["sha3_512",
-                   "blake2s",
-                   "sm3",
-                   "md5-sha1",
-                   "shake_128",
-                   "sha384",
-                   "sha512_224",
-                   "sha3_384",
-                   "blake2b",
-                   "sha1",
-                   "sha256",
-                   "sha512_256",
-                   "sha3_256",
-                   "sha3_224",
-                   "md5",
-                   "sha224",
-                   "sha512",
-                   "ripemd160",
-                   "shake_256"
-                   ],
+            items=list(algorithms.SUPPORTED),
             value="sha1",
             style=Pack(flex=1)
         )
@@ -74,10 +82,21 @@ class MainWindow(toga.MainWindow):
         
         # Bouton de génération
         generate_button = toga.Button('Générer', style=Pack(flex=1), on_press=self.generate_totp)
+        add_button = toga.Button('Ajouter à la liste', style=Pack(flex=1, padding_left=5), on_press=self.add_account)
+
+        # Liste virtualisée des comptes enregistrés
+        self.account_list = AccountList(self.scheduler, visible_rows=ACCOUNT_ROWS, on_copy=self.copy_account)
+        self.account_count = 0
+        # Index par préfixe de l'émetteur et du nom, mis à jour à chaque ajout
+        self.search_index = PrefixIndex()
+        self.search_input = toga.TextInput(placeholder='Rechercher (émetteur, nom)', on_change=self.on_search,
+                                           style=Pack(flex=1))
         
         # Bouton de copie
         self.copy_button = toga.Button(icon=CLIPBOARD, style=Pack(width=30,flex=1), on_press=self.copy_to_clipboard)
         self.copy_button.enabled = False
+        # Confirmation de copie non modale
+        self.notice_label = toga.Label('', style=Pack(text_align="center", font_size=10, flex=1))
         
         # Layout
         input_box = toga.Box(
@@ -103,6 +122,10 @@ class MainWindow(toga.MainWindow):
                         ],
                     style=Pack(direction=ROW, padding=5)
                 ),
+                toga.Box(
+                    children=[self.notice_label],
+                    style=Pack(direction=ROW, padding=(0, 5))
+                ),
                 toga.Box(
                     children=[
                         toga.Label('Secret (key/otpauth):',style=Pack(flex=1)),
@@ -137,47 +160,41 @@ class MainWindow(toga.MainWindow):
                     style=Pack(direction=ROW, padding=5)
                 ),
                 toga.Box(
-                    children=[generate_button],
+                    children=[generate_button, add_button],
                     style=Pack(direction=ROW, padding=5)
                 ),
+                toga.Divider(),
+                toga.Box(
+                    children=[self.search_input],
+                    style=Pack(direction=ROW, padding=5)
+                ),
+                toga.Box(
+                    children=[self.account_list.widget],
+                    style=Pack(direction=COLUMN, padding=5, flex=1)
+                ),
             ],
             style=Pack(direction=COLUMN, padding=10)
         )
         
-        # Correction du pattern regex pour les URI TOTP
-        self.totp_uri_pattern = re.compile(
-            r'^otpauth://totp/(?:(?P<issuer>[^:]+):)?(?P<name>[^?]+)'
-            r'\?secret=(?P<secret>[A-Z2-7=]+)'
-            r'(?:&issuer=(?P<issuer_2>[^&]+))?'
-            r'(?:&algorithm=(?P<algorithm>[^&]+))?'
-            r'(?:&digits=(?P<digits>\d+))?'
-            r'(?:&period=(?P<period>\d+))?$'
-        )
-        
         self.content = input_box
 
     def parse_totp_uri(self, uri: str) -> dict:
         """Parse une URI TOTP et retourne les paramètres"""
-        match = self.totp_uri_pattern.match(uri)
-        if not match:
-            raise ValueError("URI TOTP invalide")
-            
-        params = match.groupdict()
-        return {
-            'secret': params['secret'],
-            'algorithm': params.get('algorithm', 'SHA1') if params.get('algorithm') else 'SHA1',
-            'digits': int(params.get('digits')) if params.get('digits') else 6,
-            'period': int(params.get('period')) if params.get('period') else 30,
-            'issuer': params.get('issuer') or params.get('issuer_2', '')
-        }
+        record = parse_uri(uri)
+        if record.type != 'totp':
+            raise ValueError("Seules les URI otpauth://totp/ sont prises en charge")
+        algorithms.get(record.algorithm)  # Rejet avant de modifier les champs
+        return record.as_dict()
 
     def generate_totp(self, widget):
         try:
             
             secret = self.secret_input.value.strip()
             
+            if secret.lower().startswith(migration.SCHEME):
+                raise ValueError("Export de migration : utilisez « Ajouter à la liste » pour importer ses comptes")
             # Vérifier si c'est une URI TOTP
-            if secret.startswith('otpauth://totp/'):
+            if secret.lower().startswith('otpauth://'):
                 try:
                     params = self.parse_totp_uri(secret)
                     secret = params['secret']
@@ -200,23 +217,96 @@ class MainWindow(toga.MainWindow):
                 
             algo = self.algo_selection.value or 'sha1'  # Valeur par défaut si None
             
-            code = generate_totp_secret(
-                secret_key=secret,
-                algo=algo,
-                digits=digits,
-                period=period
-            )
+            params = (secret, algo, digits, period)
+            previous = None
+            if params != self.totp_params:
+                previous = self.totp_key
+                self.totp_key = TOTPKey.from_secret(secret, algo, digits, period)
+                self.totp_params = params
+            self._start()
+            code = self.scheduler.add(ACCOUNT, self.totp_key)
+            if previous is not None:
+                # La clé remplacée n'est plus utilisée par le planificateur : ses octets sont effacés
+                previous.wipe()
             
             self.result_label.text = f"{code}"
             self.copy_button.enabled = True
             # Démarrer la mise à jour automatique
-            if self.update_task is None:
-                self.update_task = self.app.loop.create_task(self.auto_update())
+            if self.progress_handle is None:
+                self.update_progress()
             
         except ValueError as ve:
+            self._report_error(ve)
             self.app.loop.create_task(self.informations("Erreur", str(ve)))
         except Exception as e:
+            self._report_error(e)
+            self.app.loop.create_task(self.informations("Erreur", str(e)))
+
+    def _start(self):
+        """Rattache le planificateur, le précalcul et la liste à la boucle de l'application"""
+        if self.scheduler.loop is None:
+            self.scheduler.loop = self.account_list.loop = self.clipboard.loop = self.app.loop
+            self.lookahead.start(self.app.loop)
+
+    def add_account(self, widget):
+        """Ajoute le secret saisi (clé ou URI) à la liste des comptes"""
+        try:
+            secret = self.secret_input.value.strip()
+            if not secret:
+                raise ValueError("Secret requis")
+            if secret.lower().startswith(migration.SCHEME):
+                # Export Google Authenticator : tous ses comptes TOTP d'un coup
+                self.load_accounts(account for account in migration.iter_accounts(secret)
+                                   if account.type == 'totp')
+                self.secret_input.value = ''
+                return
+            if secret.lower().startswith('otpauth://'):
+                params = self.parse_totp_uri(secret)
+                key = TOTPKey.from_secret(params['secret'], params['algorithm'], params['digits'], params['period'])
+                account = (key, params['issuer'], params['name'])
+            else:
+                key = TOTPKey.from_secret(secret, self.algo_selection.value or 'sha1',
+                                          int(self.digits_input.value or 6), int(self.period_input.value or 30))
+                account = (key, '', '')
+            self.load_accounts([account])
+            self.secret_input.value = ''
+        except Exception as e:
+            self._report_error(e)
             self.app.loop.create_task(self.informations("Erreur", str(e)))
+
+    def load_accounts(self, accounts):
+        """
+        Charge des comptes dans la liste et l'index de recherche : triplets
+        (TOTPKey, émetteur, nom), ou enregistrements exposant to_key()
+        (VaultRecord, OTPAuthURI...)
+        """
+        self._start()
+        entries = []
+        indexed = []
+        for account in accounts:
+            if isinstance(account, tuple):
+                key, issuer, name = account
+            else:
+                key, issuer, name = account.to_key(), account.issuer, account.name
+            self.account_count += 1
+            account_id = f"account-{self.account_count}"
+            label = account_label(issuer, name) or f"Compte {self.account_count}"
+            entries.append((account_id, key, label))
+            indexed.append((account_id, (issuer, name or label)))
+        self.account_list.add_many(entries)
+        self.search_index.add_many(indexed)
+        if self.search_input.value:
+            self.on_search(self.search_input)
+
+    def on_search(self, widget, **kwargs):
+        """Filtre la liste des comptes à chaque frappe"""
+        query = self.search_input.value or ''
+        self.account_list.show(self.search_index.search(query) if query.strip() else None)
+
+    def _report_error(self, error):
+        observer = metrics.active()
+        if observer is not None:
+            observer.error('gui', error)
             
     async def informations(self, title, message):
         """Affiche une boîte de dialogue d'informations"""
@@ -228,37 +318,37 @@ class MainWindow(toga.MainWindow):
             )
         await toga.Window.dialog(self, dialog)
 
-    async def auto_update(self):
-        """Met à jour le code TOTP automatiquement"""
-        while True:
-            try:
-                # Attendre jusqu'à la prochaine période
-                period = int(self.period_input.value)
-                wait_time = period - (time.time() % period)
-                
-                # Mise à jour de la barre de progression toutes les secondes
-                for i in range(int(wait_time)):
-                    self.time.value = int(100 - ((i / wait_time) * 100))
-                    await asyncio.sleep(1)  # Attendre 1 seconde
-                
-                # Assurer que la barre atteint 100% avant de régénérer
-                self.time.value = 0
-                self.copy_button.icon = CLIPBOARD
-                # Regénérer le code
-                await asyncio.sleep(0.1)  # Petit délai pour voir la barre à 100%
-                if self.secret_input.value:
-                    self.generate_totp(None)
-                else:
-                    self.time.value = 0
-                    self.result_label.text = "------"
-                    self.update_task = None
-                    self.copy_button.enabled = False
-                    break
-                
-            except Exception as e:
-                print(f"Erreur lors de la mise à jour automatique: {e}")
+    def on_rollover(self, events):
+        """Appelé par le planificateur à chaque changement de période"""
+        if not any(event.account_id == ACCOUNT for event in events):
+            return  # Changement d'un compte de la liste : géré par AccountList
+        try:
+            self.copy_button.icon = CLIPBOARD
+            if self.secret_input.value:
+                # Relit les paramètres ; le code déjà calculé est réutilisé s'ils n'ont pas changé
+                self.generate_totp(None)
+            else:
+                self.scheduler.remove(ACCOUNT)
+                if self.progress_handle is not None:
+                    self.progress_handle.cancel()
+                    self.progress_handle = None
                 self.time.value = 0
-                break
+                self.result_label.text = "------"
+                self.copy_button.enabled = False
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour automatique: {e}")
+            self.time.value = 0
+
+    def update_progress(self):
+        """Met à jour la barre de progression à partir de l'échéance du code"""
+        self.progress_handle = None
+        if ACCOUNT not in self.scheduler:
+            self.time.value = 0
+            return
+        remaining = self.scheduler.remaining(ACCOUNT)
+        self.time.value = int(round(100 * self.scheduler.progress(ACCOUNT)))
+        # Prochain rafraîchissement aligné sur les secondes restantes avant l'échéance
+        self.progress_handle = self.app.loop.call_later(remaining % 1 or 1.0, self.update_progress)
             
     def copy_to_clipboard(self, widget):
         """Copie le code TOTP dans le presse-papier"""
@@ -268,13 +358,49 @@ class MainWindow(toga.MainWindow):
             self.copy_button.icon = CLIPBOARD_COPY
             # Vérifier si un code existe
             if code and code != "":
-                # Utiliser pyperclip pour la compatibilité multi-plateforme
-                pyperclip.copy(code)
-                # Feedback temporaire
-                self.app.loop.create_task(self.informations("Info", "Code copié !"))
+                # Copie sans blocage ; la confirmation s'affiche sous la barre
+                self.clipboard.copy(code)
                 
         except Exception as e:
-            print(f"Erreur lors de la copie: {e}")
+            self._copy_failed(e)
+
+    def copy_account(self, account_id, code):
+        """Copie le code d'un compte de la liste dans le presse-papier"""
+        try:
+            self.clipboard.copy(code)
+        except Exception as e:
+            self._copy_failed(e)
+
+    def show_notice(self, message):
+        """Affiche (ou masque, message vide) la confirmation de copie"""
+        self.notice_label.text = message
+
+    def _copy_failed(self, error):
+        self._report_error(error)
+        self.notice_label.text = f"Erreur lors de la copie: {error}"
+
+    def shutdown(self):
+        """
+        Arrête les services à la fermeture de l'application : le code copié
+        est effacé du presse-papier, les réveils et le précalcul sont annulés
+        et la clé courante est effacée.
+        """
+        if self.progress_handle is not None:
+            self.progress_handle.cancel()
+            self.progress_handle = None
+        self.clipboard.close()
+        self.account_list.close()
+        self.lookahead.stop()
+        self.scheduler.stop()
+        if self.totp_key is not None:
+            self.totp_key.wipe()
+            self.totp_key = self.totp_params = None
+
+
+def account_label(issuer: str, name: str) -> str:
+    """Libellé affiché d'un compte (émetteur : nom)"""
+    return f"{issuer} : {name}" if issuer and name else issuer or name
+
 
 def main():
     return MainWindow("TOTP Generator", None)
\ No newline at end of file
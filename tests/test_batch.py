@@ -0,0 +1,93 @@
+import pytest
+
+from src import batch, metrics
+from src.batch import generate_batch, truncate_many
+from src.totp import TOTPKey, digests_at, truncate
+
+AT = 1_700_000_000
+SECRETS = ['JBSWY3DPEHPK3PXP', 'GEZDGNBVGY3TQOJQ', 'MFRGGZDFMZTWQ2LK', 'ONSWG4TFOQ======']
+
+
+def expected(keys, at=AT):
+    return [key.at(at) for key in keys]
+
+
+@pytest.fixture(params=['numpy', 'scalar'])
+def backend(request, monkeypatch):
+    """Exécute le test avec NumPy puis avec le repli en Python pur."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(batch, 'np', None)
+    return request.param
+
+
+def test_base32_secrets(backend):
+    keys = [TOTPKey.from_secret(secret) for secret in SECRETS]
+    assert generate_batch(SECRETS, AT) == expected(keys)
+
+
+@pytest.mark.parametrize('algo', ['sha1', 'sha256', 'sha512', 'md5'])
+@pytest.mark.parametrize('digits', [6, 8, 10])
+def test_algorithms_and_digits(backend, algo, digits):
+    keys = [TOTPKey.from_secret(secret, algo, digits) for secret in SECRETS]
+    assert generate_batch(SECRETS, AT, algo, digits) == expected(keys)
+
+
+def test_mixed_keys(backend):
+    keys = [TOTPKey.from_secret(SECRETS[0], 'sha1', 6), TOTPKey.from_secret(SECRETS[1], 'sha512', 8, 60),
+            TOTPKey.from_secret(SECRETS[2], 'md5', 7), TOTPKey.from_secret(SECRETS[3], 'sha256', 6, 45)]
+    assert generate_batch(keys, AT) == expected(keys)
+
+
+def test_as_array_and_empty(backend):
+    keys = [TOTPKey.from_secret(secret) for secret in SECRETS]
+    assert list(generate_batch(keys, AT, as_array=True)) == [int(code) for code in expected(keys)]
+    assert generate_batch([], AT) == []
+    assert len(generate_batch([], AT, as_array=True)) == 0
+
+
+def test_short_digests_use_the_scalar_path(monkeypatch):
+    pytest.importorskip('numpy')
+    # Condensats MD5 (16 octets) dont la fenêtre de troncature dépasse la fin : seul truncate() fait foi
+    keys = [TOTPKey.from_secret(secret, 'md5') for secret in SECRETS]
+    digests = [bytes(15) + bytes([offset]) for offset in range(16)] + digests_at(keys, AT)
+    codes = truncate_many(b''.join(digests), 16, 6)
+    assert list(codes) == [truncate(digest, 6) for digest in digests]
+
+
+def test_vectorized_truncation_matches_scalar():
+    pytest.importorskip('numpy')
+    keys = [TOTPKey(bytes([i]) * 20, 'sha1', 6 + i % 3) for i in range(64)]
+    digests = digests_at(keys, AT)
+    assert list(truncate_many(b''.join(digests), 20, [key.digits for key in keys])) \
+        == [truncate(digest, key.digits) for digest, key in zip(digests, keys)]
+
+
+def test_batches_are_instrumented():
+    registry = metrics.enable(metrics.Metrics())
+    try:
+        generate_batch(SECRETS, AT)
+        generate_batch([TOTPKey.from_secret(SECRETS[0], 'sha256')], AT)
+        with pytest.raises(ValueError):
+            generate_batch(['not base32!'], AT)
+    finally:
+        metrics.disable()
+    snapshot = registry.snapshot()
+    calls = {(item['labels']['operation'], item['labels']['algorithm']): item['value']
+             for item in snapshot['counters']['totp_calls_total']}
+    assert calls[('batch', 'sha1')] == 4 and calls[('batch', 'sha256')] == 1
+    assert {item['labels']['stage']: item['count'] for item in snapshot['histograms']['totp_batch_seconds']} \
+        == {'hmac': 2, 'truncate': 2}
+    assert snapshot['counters']['totp_errors_total'][0]['labels']['operation'] == 'batch'
+
+
+def test_metrics_state_merges_across_registries():
+    first, second = metrics.Metrics(), metrics.Metrics()
+    first.inc('totp_calls_total', 2, operation='batch', algorithm='sha1')
+    second.inc('totp_calls_total', 3, operation='batch', algorithm='sha1')
+    second.observe('totp_batch_seconds', 0.001, stage='hmac')
+    first.merge(second.state())
+    snapshot = first.snapshot()
+    assert snapshot['counters']['totp_calls_total'][0]['value'] == 5
+    assert snapshot['histograms']['totp_batch_seconds'][0]['count'] == 1
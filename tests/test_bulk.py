@@ -0,0 +1,77 @@
+import argparse
+import csv
+import io
+import json
+
+from src.bulk import read_rows, stream_codes
+from src.cli import _key_from
+from src.totp import TOTPKey
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+OTHER = 'GEZDGNBVGY3TQOJQ'
+AT = 1_700_000_000
+
+
+def code(secret: str, **kwargs) -> str:
+    return TOTPKey.from_secret(secret, **kwargs).at(AT)
+
+
+def run(text: str, fmt: str = 'lines', out_fmt: str = 'text', **kwargs):
+    out, errors = io.StringIO(), io.StringIO()
+    stats = stream_codes(io.StringIO(text, newline=''), out, fmt, out_fmt, errors, at=AT, **kwargs)
+    return out.getvalue().splitlines(), [json.loads(line) for line in errors.getvalue().splitlines()], stats
+
+
+def test_text_output_has_one_line_per_input():
+    lines, errors, stats = run(f'{SECRET}\nnot base32!\n\nOTPAUTH://TOTP/ACME:alice?secret={OTHER}\n',
+                               batch_size=2)
+    assert lines[0] == f'1\t-\t{code(SECRET)}'
+    assert lines[1].startswith('2\tERREUR\t')
+    assert lines[2] == f'4\tACME:alice\t{code(OTHER)}'
+    assert len(lines) == 3
+    assert [e['line'] for e in errors] == [2]
+    assert stats == {'rows': 3, 'codes': 2, 'errors': 1}
+
+
+def test_csv_and_jsonl_outputs_carry_codes_only():
+    text = f'uri\n{SECRET}\nbad\n'
+    lines, _, _ = run(text, 'csv', 'csv')
+    assert lines == ['line,issuer,name,code', f'2,,,{code(SECRET)}']
+    lines, _, _ = run(text, 'csv', 'jsonl')
+    assert [json.loads(line) for line in lines] == [{'line': 2, 'issuer': '', 'name': '', 'code': code(SECRET)}]
+
+
+def test_non_utf8_rows_are_reported_one_by_one():
+    raw = f'{SECRET}\n'.encode('ascii') + b'\xff\xfe\n' + f'{OTHER}\n'.encode('ascii')
+    stream = io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8', errors='surrogateescape')
+    out, errors = io.StringIO(), io.StringIO()
+    stats = stream_codes(stream, out, at=AT, errors=errors)
+    assert stats == {'rows': 3, 'codes': 2, 'errors': 1}
+    assert 'UTF-8' in json.loads(errors.getvalue())['error']
+    assert out.getvalue().splitlines()[2] == f'3\t-\t{code(OTHER)}'
+
+
+def test_csv_errors_are_reported_per_row():
+    # Un champ au-delà de la limite du module csv n'arrête pas la lecture
+    limit = csv.field_size_limit(64)
+    try:
+        rows = list(read_rows(io.StringIO(f'{"A" * 100}\n{OTHER}\n', newline=''), 'csv'))
+    finally:
+        csv.field_size_limit(limit)
+    assert isinstance(rows[0][1], ValueError) and 'CSV invalide' in str(rows[0][1])
+    assert rows[1] == (2, OTHER)
+
+
+def test_jsonl_input():
+    text = f'{{"uri": "otpauth://totp/alice?secret={SECRET}"}}\n"{OTHER}"\n{{"name": "x"}}\nnot json\n'
+    lines, errors, _ = run(text, 'jsonl')
+    assert lines[:2] == [f'1\talice\t{code(SECRET)}', f'2\t-\t{code(OTHER)}']
+    assert [e['line'] for e in errors] == [3, 4]
+
+
+def test_cli_scheme_is_case_insensitive():
+    args = argparse.Namespace(counter=None, algo='sha1', digits=6, period=30)
+    key, counter = _key_from(f'  OtpAuth://hotp/alice?secret={SECRET}&counter=3', args)
+    assert counter == 3 and key.digits == 6
+    key, counter = _key_from(f'otpauth://totp/alice?secret={SECRET}&digits=8', args)
+    assert (counter, key.digits) == (None, 8)
@@ -0,0 +1,97 @@
+import pytest
+
+from src.cache import CodeCache
+from src.clock import FrozenClock
+from src.totp import TOTPKey
+from src.uri import parse_uri
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+AT = 1_700_000_000
+
+
+def test_generate_matches_totp_and_hits():
+    cache = CodeCache(clock=FrozenClock(AT))
+    expected = TOTPKey.from_secret(SECRET).at(AT)
+    assert cache.generate(SECRET) == expected
+    assert cache.generate(SECRET) == expected
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+
+def test_entries_do_not_keep_the_secret():
+    cache = CodeCache(clock=FrozenClock(AT))
+    cache.generate(SECRET)
+    cache.generate(bytearray(b'raw secret bytes'))
+    for entry in cache._entries:
+        assert SECRET not in entry and SECRET.encode('ascii') not in entry
+        assert b'raw secret bytes' not in entry
+
+
+def test_parameters_are_part_of_the_entry():
+    cache = CodeCache(clock=FrozenClock(AT))
+    six = cache.generate(SECRET)
+    eight = cache.generate(SECRET, digits=8)
+    sha256 = cache.generate(SECRET, 'sha256', 8)
+    assert len(six) == 6 and len(eight) == 8
+    assert sha256 == TOTPKey.from_secret(SECRET, 'sha256', 8).at(AT)
+    assert cache.misses == 3
+
+
+def test_entries_expire_with_their_period():
+    clock = FrozenClock(AT)
+    cache = CodeCache(clock=clock)
+    cache.generate(SECRET)
+    clock.set(AT + 30)
+    assert cache.generate(SECRET) == TOTPKey.from_secret(SECRET).at(AT + 30)
+    assert cache.expirations == 1
+
+
+def test_lru_eviction():
+    cache = CodeCache(maxsize=2, clock=FrozenClock(AT))
+    for secret in (SECRET, 'GEZDGNBVGY3TQOJQ', 'MFRGGZDFMZTWQ2LK'):
+        cache.generate(secret)
+    assert (len(cache), cache.evictions) == (2, 1)
+
+
+def test_decoded_key_is_wiped(monkeypatch):
+    built = []
+    original = TOTPKey.from_secret.__func__
+
+    def spy(cls, *args, **kwargs):
+        built.append(original(cls, *args, **kwargs))
+        return built[-1]
+
+    monkeypatch.setattr(TOTPKey, 'from_secret', classmethod(spy))
+    CodeCache(clock=FrozenClock(AT)).generate(SECRET)
+    assert built and not any(built[0].key)
+
+
+def test_raw_bytes_belong_to_the_caller():
+    secret = bytearray(b'12345678901234567890')
+    CodeCache(clock=FrozenClock(AT)).generate(secret)
+    assert secret == bytearray(b'12345678901234567890')
+
+
+def test_precompiled_keys_and_records():
+    cache = CodeCache(clock=FrozenClock(AT))
+    key = TOTPKey.from_secret(SECRET)
+    assert cache.generate(key) == key.at(AT)
+    record = parse_uri(f'otpauth://totp/alice?secret={SECRET}&digits=8')
+    assert cache.generate(record) == TOTPKey.from_secret(SECRET, digits=8).at(AT)
+
+
+@pytest.mark.parametrize('kwargs, error', [
+    ({'period': 0}, ValueError),
+    ({'period': -30}, ValueError),
+    ({'digits': 0}, ValueError),
+    ({'algo': 'md4'}, ValueError),
+    ({'algo': None}, TypeError),
+    ({'algo': 1}, TypeError),
+])
+def test_invalid_parameters(kwargs, error):
+    with pytest.raises(error):
+        CodeCache(clock=FrozenClock(AT)).generate(SECRET, **kwargs)
+
+
+def test_invalid_secret():
+    with pytest.raises(ValueError):
+        CodeCache(clock=FrozenClock(AT)).generate('not base32!')
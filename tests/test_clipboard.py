@@ -0,0 +1,198 @@
+import threading
+
+import pytest
+
+from src.clipboard import ClipboardService, FakeClipboard, GtkClipboard, ThreadedClipboard
+from src.clock import SimulatedClock
+
+
+class ManualLoop(SimulatedClock):
+    """Boucle minimale pour ClipboardService : les rappels avancent avec l'horloge simulée."""
+
+    def call_soon(self, callback, *args):
+        return self.call_later(0, callback, *args)
+
+
+@pytest.fixture
+def loop():
+    return ManualLoop(1000.0)
+
+
+def test_code_is_cleared_after_ttl(loop):
+    backend = FakeClipboard()
+    service = ClipboardService(backend, loop, ttl=30)
+    service.copy('123456')
+    loop.advance(29.9)
+    assert backend.paste() == '123456'
+    loop.advance(0.1)
+    assert backend.paste() == ''
+
+
+def test_expiry_keeps_text_copied_since(loop):
+    backend = FakeClipboard()
+    service = ClipboardService(backend, loop, ttl=30)
+    service.copy('123456')
+    backend.copy('copié par l\'utilisateur')
+    loop.advance(30)
+    assert backend.paste() == 'copié par l\'utilisateur'
+
+
+def test_new_copy_restarts_expiry(loop):
+    backend = FakeClipboard()
+    service = ClipboardService(backend, loop, ttl=30)
+    service.copy('111111')
+    loop.advance(20)
+    service.copy('222222')
+    loop.advance(15)
+    assert backend.paste() == '222222'
+    loop.advance(15)
+    assert backend.paste() == ''
+    assert loop.pending() == 0
+
+
+def test_zero_ttl_never_clears(loop):
+    backend = FakeClipboard()
+    service = ClipboardService(backend, loop, ttl=0)
+    service.copy('123456')
+    loop.advance(3600)
+    assert backend.paste() == '123456'
+
+
+def test_close_clears_pending_code(loop):
+    backend = FakeClipboard()
+    service = ClipboardService(backend, loop, ttl=30, on_notice=lambda message: None)
+    service.copy('123456')
+    loop.advance(0)
+    service.close()
+    assert backend.paste() == ''
+    assert loop.pending() == 0
+
+
+def test_repeated_copies_show_one_notice(loop):
+    notices = []
+    service = ClipboardService(FakeClipboard(), loop, ttl=30, on_notice=notices.append, notice_duration=2)
+    for code in ('111111', '222222', '333333'):
+        service.copy(code)
+    service.copy('444444', ttl=10)
+    assert notices == []
+    loop.advance(0)
+    assert notices == ["Code copié, effacé dans 10 s"]
+    loop.advance(2)
+    assert notices == ["Code copié, effacé dans 10 s", '']
+
+
+def test_copy_during_notice_extends_it(loop):
+    notices = []
+    service = ClipboardService(FakeClipboard(), loop, ttl=0, on_notice=notices.append, notice_duration=2)
+    service.copy('111111')
+    loop.advance(1.5)
+    service.copy('222222')
+    loop.advance(1.5)
+    assert notices == ["Code copié", "Code copié"]
+    loop.advance(0.5)
+    assert notices[-1] == ''
+
+
+class GatedClipboard(FakeClipboard):
+    """Presse-papier dont chaque opération attend l'ouverture d'une barrière."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def copy(self, text: str):
+        self.entered.set()
+        self.gate.wait(5)
+        super().copy(text)
+
+
+def test_threaded_clipboard_runs_only_latest_pending_operation():
+    backend = GatedClipboard()
+    clipboard = ThreadedClipboard(backend)
+    try:
+        clipboard.copy('111111')
+        assert backend.entered.wait(5)
+        # Le fil de travail est bloqué sur la première copie : les suivantes se remplacent
+        clipboard.copy('222222')
+        clipboard.copy('333333')
+        assert clipboard.paste() == '333333'
+        assert not clipboard.flush(0.05)
+        backend.gate.set()
+        assert clipboard.flush(5)
+        assert backend.history == ['111111', '333333']
+    finally:
+        backend.gate.set()
+        clipboard.close()
+
+
+def test_threaded_clipboard_clear_only_matching_text():
+    backend = FakeClipboard()
+    clipboard = ThreadedClipboard(backend)
+    try:
+        clipboard.copy('111111')
+        clipboard.clear('999999')
+        assert clipboard.flush(5)
+        assert backend.paste() == '111111'
+        clipboard.clear('111111')
+        assert clipboard.flush(5)
+        assert backend.paste() == ''
+    finally:
+        clipboard.close()
+
+
+def test_threaded_clipboard_close_stops_worker():
+    clipboard = ThreadedClipboard(FakeClipboard())
+    clipboard.copy('111111')
+    clipboard.close()
+    assert not clipboard._thread.is_alive()
+
+
+def test_threaded_clipboard_reports_errors():
+    class Broken(FakeClipboard):
+        def copy(self, text: str):
+            raise OSError("xclip introuvable")
+
+    errors = []
+    clipboard = ThreadedClipboard(Broken(), on_error=errors.append)
+    try:
+        clipboard.copy('111111')
+        assert clipboard.flush(5)
+        assert [str(error) for error in errors] == ["xclip introuvable"]
+    finally:
+        clipboard.close()
+
+
+class PendingGtkClipboard:
+    """Gtk.Clipboard minimal : les lectures asynchrones restent en attente jusqu'à deliver()."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.requests = []
+
+    def set_text(self, text: str, length: int):
+        self.text = text
+
+    def store(self):
+        pass
+
+    def request_text(self, callback, *data):
+        self.requests.append((callback, data))
+
+    def wait_for_text(self):
+        raise AssertionError("lecture bloquante depuis la boucle")
+
+    def deliver(self):
+        for callback, data in self.requests:
+            callback(self, self.text, *data)
+        self.requests.clear()
+
+
+@pytest.mark.parametrize('current, cleared', [('123456', ''), ('autre texte', 'autre texte')])
+def test_gtk_clear_reads_clipboard_asynchronously(current, cleared):
+    backend = GtkClipboard.__new__(GtkClipboard)
+    backend._clipboard = PendingGtkClipboard(current)
+    backend.clear('123456')
+    assert backend._clipboard.text == current
+    backend._clipboard.deliver()
+    assert backend._clipboard.text == cleared
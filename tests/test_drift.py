@@ -0,0 +1,56 @@
+from src.drift import DriftTracker, estimate_offset
+from src.totp import TOTPKey
+
+KEY = TOTPKey(b'12345678901234567890')
+NOW = 1_700_000_000
+
+
+def test_code_in_window_is_accepted_once():
+    tracker = DriftTracker(1)
+    code = KEY.at(NOW)
+    assert tracker.verify(0, KEY, code, NOW) == 0
+    assert tracker.verify(0, KEY, code, NOW + 1) is None
+
+
+def test_repeated_stale_code_does_not_resync():
+    tracker = DriftTracker(1)
+    stale = KEY.at(NOW - 240)
+    assert tracker.verify(0, KEY, stale, NOW) is None
+    assert tracker.verify(0, KEY, stale, NOW) is None
+    assert tracker.verify(0, KEY, stale, NOW + 5) is None
+    assert tracker.offset(0) == 0
+    assert tracker.resyncs == 0
+
+
+def test_consecutive_codes_resync_drifted_device():
+    tracker = DriftTracker(1)
+    skew = -240  # Appareil en retard de 8 périodes
+    assert tracker.verify(0, KEY, KEY.at(NOW + skew), NOW) is None
+    assert tracker.verify(0, KEY, KEY.at(NOW + 30 + skew), NOW + 30) == -8
+    assert tracker.offset(0) == -8
+    assert tracker.resyncs == 1
+    # La fenêtre suit désormais l'appareil
+    assert tracker.verify(0, KEY, KEY.at(NOW + 60 + skew), NOW + 60) == -8
+
+
+def test_non_consecutive_codes_do_not_resync():
+    tracker = DriftTracker(1)
+    assert tracker.verify(0, KEY, KEY.at(NOW - 240), NOW) is None
+    assert tracker.verify(0, KEY, KEY.at(NOW - 180), NOW + 30) is None
+    assert tracker.offset(0) == 0
+
+
+def test_replayed_old_pair_cannot_move_window():
+    tracker = DriftTracker(1)
+    first, second = KEY.at(NOW - 240), KEY.at(NOW - 210)
+    assert tracker.verify(0, KEY, KEY.at(NOW), NOW) == 0
+    # Deux codes consécutifs antérieurs au dernier code accepté : rejeu
+    assert tracker.verify(0, KEY, first, NOW + 30) is None
+    assert tracker.verify(0, KEY, second, NOW + 30) is None
+    assert tracker.offset(0) == 0
+
+
+def test_estimate_offset_counts_each_code_once():
+    stale = KEY.at(NOW - 240)
+    assert estimate_offset(KEY, [(NOW, stale), (NOW, stale)]) is None
+    assert estimate_offset(KEY, [(NOW, KEY.at(NOW - 240)), (NOW + 30, KEY.at(NOW - 210))]) == -8
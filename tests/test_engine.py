@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from src import metrics
+from src.engine import ValidationEngine
+from src.totp import TOTPKey
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+AT = 1_700_000_000
+
+
+def _counter(observer, name: str, **labels) -> float:
+    series = observer.snapshot()['counters'].get(name, [])
+    return sum(item['value'] for item in series if labels.items() <= item['labels'].items())
+
+
+def failing_loader(shard, shards):
+    raise OSError("base indisponible")
+
+
+def test_verify_many_accepts_and_rejects():
+    code = TOTPKey.from_secret(SECRET).at(AT)
+    with ValidationEngine({'alice': SECRET, 'bob': SECRET}, workers=2) as engine:
+        assert engine.verify_many([('alice', code), ('bob', '000000'), ('carol', code)], AT, timeout=30) \
+            == [0, None, None]
+
+
+def test_invalid_secret_does_not_stop_the_worker():
+    code = TOTPKey.from_secret(SECRET).at(AT)
+    with ValidationEngine({'alice': SECRET, 'broken': '!!!'}, workers=1) as engine:
+        assert engine.verify_many([('broken', code), ('alice', code)], AT, timeout=30) == [None, 0]
+        assert 'broken' in engine.invalid_accounts
+
+
+def test_loader_failure_fails_pending_requests():
+    with ValidationEngine(workers=1, loader=failing_loader) as engine:
+        with pytest.raises(RuntimeError, match='base indisponible'):
+            engine.verify_many([('alice', '123456')], AT, timeout=30)
+
+
+def test_killed_worker_fails_its_futures():
+    with ValidationEngine({'alice': SECRET}, workers=1) as engine:
+        engine._processes[0].kill()
+        engine._processes[0].join()
+        with pytest.raises(RuntimeError, match='indisponible'):
+            engine.verify_many([('alice', '123456')], AT, timeout=30)
+        # Les lots suivants échouent immédiatement
+        start = time.monotonic()
+        with pytest.raises(RuntimeError):
+            engine.verify('alice', '123456', AT)
+        assert time.monotonic() - start < 1
+
+
+def test_worker_metrics_are_merged_into_the_parent():
+    code = TOTPKey.from_secret(SECRET).at(AT)
+    observer = metrics.enable(metrics.Metrics())
+    try:
+        engine = ValidationEngine({'alice': SECRET, 'bob': SECRET}, workers=2)
+        try:
+            engine.verify_many([('alice', code), ('bob', '000000')], AT, timeout=30)
+            assert engine.collect_metrics(timeout=30)
+            calls = _counter(observer, 'totp_calls_total', operation='code')
+            assert calls >= 2
+            # Autre période : les codes de la mémoïsation du processus ne servent pas
+            engine.verify('alice', TOTPKey.from_secret(SECRET).at(AT + 300), AT + 300)
+        finally:
+            engine.close()
+        # Les mesures restantes sont envoyées à la fermeture, sans double compte
+        assert _counter(observer, 'totp_calls_total', operation='code') > calls
+        assert _counter(observer, 'totp_engine_verifications_total', result='accepted') == 2
+    finally:
+        metrics.disable()
+
+
+def test_collect_metrics_without_instrumentation():
+    with ValidationEngine({'alice': SECRET}, workers=1) as engine:
+        assert engine.collect_metrics(timeout=30)
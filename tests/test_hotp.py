@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.hotp import CounterStore, HOTPValidator, codes_from, hotp, resync, verify_hotp
+from src.totp import TOTPKey
+from tests.vectors import RFC4226_SEED, RFC4226_VECTORS
+
+
+@pytest.mark.parametrize('counter, code', list(enumerate(RFC4226_VECTORS)))
+def test_rfc4226_vectors(counter, code):
+    assert hotp(TOTPKey(RFC4226_SEED), counter) == code
+
+
+def test_codes_from_matches_hotp():
+    key = TOTPKey(RFC4226_SEED)
+    assert ['%06d' % code for code in codes_from(key, 0, 10)] == RFC4226_VECTORS
+
+
+def test_negative_counter_is_rejected():
+    with pytest.raises(ValueError):
+        hotp(TOTPKey(RFC4226_SEED), -1)
+
+
+def test_verify_hotp_look_ahead():
+    key = TOTPKey(RFC4226_SEED)
+    assert verify_hotp(key, RFC4226_VECTORS[0], 0) == 1
+    assert verify_hotp(key, RFC4226_VECTORS[3], 0, look_ahead=3) == 4
+    assert verify_hotp(key, RFC4226_VECTORS[4], 0, look_ahead=3) is None
+    assert verify_hotp(key, RFC4226_VECTORS[0], 1) is None
+
+
+def test_resync_needs_two_consecutive_codes():
+    key = TOTPKey(RFC4226_SEED)
+    codes = [hotp(key, counter) for counter in range(600)]
+    assert resync(key, codes[500], codes[501], 0) == 502
+    assert resync(key, codes[500], codes[502], 0) is None
+    assert resync(key, codes[501], codes[500], 0) is None
+    assert resync(key, codes[500], codes[501], 0, look_ahead=400) is None
+    assert resync(key, codes[500], 'abcdef', 0) is None
+
+
+def test_counter_store_persists_and_only_advances(tmp_path):
+    path = str(tmp_path / 'counters.json')
+    store = CounterStore(path)
+    assert store.get('alice') == 0 and 'alice' not in store
+    assert store.advance('alice', 3)
+    assert not store.advance('alice', 3)
+    assert not store.advance('alice', 2)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'alice': 3}
+    assert CounterStore(path).get('alice') == 3
+
+
+def test_validator_advances_after_verify_and_refuses_replay(tmp_path):
+    path = str(tmp_path / 'counters.json')
+    key = TOTPKey(RFC4226_SEED)
+    validator = HOTPValidator(CounterStore(path), look_ahead=2)
+    assert validator.verify('alice', key, RFC4226_VECTORS[1])
+    assert not validator.verify('alice', key, RFC4226_VECTORS[1])
+    assert not validator.verify('alice', key, RFC4226_VECTORS[0])
+
+    # Après redémarrage, le compteur persistant refuse toujours le rejeu
+    validator = HOTPValidator(CounterStore(path), look_ahead=2)
+    assert validator.store.get('alice') == 2
+    assert not validator.verify('alice', key, RFC4226_VECTORS[1])
+    assert validator.verify('alice', key, RFC4226_VECTORS[2])
+
+    # Un jeton trop avancé ne passe qu'avec une resynchronisation
+    assert not validator.verify('alice', key, RFC4226_VECTORS[8])
+    assert validator.resync('alice', key, RFC4226_VECTORS[7], RFC4226_VECTORS[8])
+    assert CounterStore(path).get('alice') == 9
@@ -0,0 +1,73 @@
+import pytest
+
+from src.clock import SimulatedClock
+from src.lookahead import LookaheadBuffer
+from src.totp import TOTPKey
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+
+
+def test_fill_precomputes_the_window():
+    clock = SimulatedClock(95.0)  # compteur 3
+    buffer = LookaheadBuffer(depth=4, behind=1, clock=clock)
+    key = TOTPKey.from_secret(SECRET)
+    buffer.add('alice', key)
+    assert buffer.fill() == 5  # compteurs 2 à 6
+    assert buffer.fill() == 0
+    assert [buffer.code_at('alice', counter) for counter in range(2, 7)] == [key.code_at(c) for c in range(2, 7)]
+    assert (buffer.hits, buffer.misses) == (5, 0)
+
+
+def test_refill_across_period_boundaries():
+    clock = SimulatedClock(0.0)
+    buffer = LookaheadBuffer(depth=2, behind=1, clock=clock)
+    key = TOTPKey.from_secret(SECRET)
+    buffer.add('alice', key)
+    assert buffer.fill() == 2  # compteurs 0 et 1
+
+    clock.advance(30.0)  # compteur 1 : seul le compteur 2 manque
+    assert buffer.code('alice') == key.code_at(1)
+    assert buffer.fill() == 1
+    clock.advance(90.0)  # compteur 4 : tout le tampon est périmé
+    assert buffer.fill() == 3
+    assert buffer.code('alice') == key.code_at(4)
+    assert buffer.misses == 0
+
+    # Un compteur hors du tampon est calculé à la demande
+    assert buffer.code_at('alice', 100) == key.code_at(100)
+    assert buffer.misses == 1
+
+
+def test_fill_respects_limit():
+    clock = SimulatedClock(0.0)
+    buffer = LookaheadBuffer(depth=4, clock=clock)
+    for i in range(3):
+        buffer.add(i, TOTPKey.from_secret(SECRET))
+    assert buffer.fill(limit=5) == 5
+    assert buffer.fill() == 7
+
+
+def test_verify_uses_the_buffer():
+    clock = SimulatedClock(300.0)
+    buffer = LookaheadBuffer(depth=2, behind=1, clock=clock)
+    key = TOTPKey.from_secret(SECRET)
+    buffer.add('alice', key)
+    buffer.fill()
+    assert buffer.verify('alice', key.code_at(9)) == -1
+    assert buffer.verify('alice', key.code_at(11)) == 1
+    assert buffer.verify('alice', key.code_at(12)) is None
+
+
+def test_replacing_a_key_resets_its_buffer():
+    clock = SimulatedClock(0.0)
+    buffer = LookaheadBuffer(clock=clock)
+    buffer.add('alice', TOTPKey.from_secret(SECRET))
+    buffer.fill()
+    other = TOTPKey.from_secret('GEZDGNBVGY3TQOJQ')
+    buffer.add('alice', other)
+    assert buffer.code('alice') == other.code_at(0)
+
+
+def test_invalid_depth():
+    with pytest.raises(ValueError):
+        LookaheadBuffer(depth=0)
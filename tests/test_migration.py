@@ -0,0 +1,102 @@
+import base64
+from urllib.parse import quote
+
+import pytest
+
+from src.migration import decode_payload, iter_accounts, payload, split_uris
+
+# Export d'un compte TOTP (SHA-1, 6 chiffres) : secret « Hello!\xde\xad\xbe\xef »,
+# nom « Example:alice@example.com », émetteur « Example »
+KNOWN = ('otpauth-migration://offline?data='
+         'CjYKCkhlbGxvId6tvu8SGUV4YW1wbGU6YWxpY2VAZXhhbXBsZS5jb20aB0V4YW1wbGUgASgBMAIQARgBIAAoAA%3D%3D')
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, value) -> bytes:
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _account(secret: bytes, name: str, issuer: str = '', algorithm: int = 1, digits: int = 1, otp_type: int = 2,
+             counter: int = 0, extra: bytes = b'') -> bytes:
+    return (_field(1, secret) + _field(2, name.encode('utf-8')) + _field(3, issuer.encode('utf-8'))
+            + _field(4, algorithm) + _field(5, digits) + _field(6, otp_type) + _field(7, counter) + extra)
+
+
+def _uri(data: bytes) -> str:
+    return 'otpauth-migration://offline?data=' + quote(base64.b64encode(data).decode('ascii'), safe='')
+
+
+def test_known_payload():
+    [account] = iter_accounts(KNOWN)
+    assert account.as_dict() == {
+        'type': 'totp', 'secret': 'JBSWY3DPEHPK3PXP', 'algorithm': 'sha1', 'digits': 6, 'period': 30,
+        'counter': 0, 'issuer': 'Example', 'name': 'alice@example.com',
+    }
+
+
+def test_several_accounts_in_one_batch():
+    data = (_field(1, _account(b'\x00' * 10, 'alice', 'A', algorithm=2, digits=2))
+            + _field(1, _account(b'\xff' * 20, 'bob', 'B', otp_type=1, counter=42))
+            + _field(2, 1) + _field(3, 1) + _field(4, 0) + _field(5, 123))
+    accounts = list(iter_accounts(_uri(data)))
+    assert [(a.type, a.issuer, a.name, a.algorithm, a.digits, a.counter) for a in accounts] == [
+        ('totp', 'A', 'alice', 'sha256', 8, 0),
+        ('hotp', 'B', 'bob', 'sha1', 6, 42),
+    ]
+    assert accounts[0].secret == 'AAAAAAAAAAAAAAAA'
+
+
+def test_unknown_fields_are_skipped():
+    extra = _field(15, 7) + _field(16, b'ignored') + _varint(17 << 3 | 1) + b'\0' * 8 + _varint(18 << 3 | 5) + b'\0' * 4
+    data = _field(1, _account(b'Hello!\xde\xad\xbe\xef', 'alice', extra=extra)) + _field(9, b'future')
+    [account] = decode_payload(data)
+    assert (account.name, account.secret) == ('alice', 'JBSWY3DPEHPK3PXP')
+
+
+@pytest.mark.parametrize('data', [
+    b'\x08',                # varint absent
+    b'\x08\x80',            # varint interrompu
+    b'\x0a\x05abc',         # longueur au-delà du message
+    b'\x0a\x03\x0a\x05ab',  # longueur incohérente dans un compte
+    b'\x11\0\0\0',          # champ de 64 bits tronqué
+])
+def test_truncated_payloads_are_rejected(data):
+    with pytest.raises(ValueError, match='tronqué'):
+        list(decode_payload(data))
+
+
+def test_overlong_varint_is_rejected():
+    with pytest.raises(ValueError, match='trop long'):
+        list(decode_payload(b'\x08' + b'\xff' * 10 + b'\x01'))
+
+
+@pytest.mark.parametrize('uri', [
+    'otpauth-migration://offline?data=@@@@',
+    'otpauth-migration://offline?data=QUJD%ZZ',
+    'otpauth-migration://offline',
+    'otpauth://totp/alice?secret=JBSWY3DPEHPK3PXP',
+])
+def test_bad_uris_are_rejected(uri):
+    with pytest.raises(ValueError, match='URI de migration invalide'):
+        payload(uri)
+
+
+def test_split_uris_accepts_concatenated_exports():
+    text = [KNOWN + KNOWN + '\n', '  ' + KNOWN + ' trailing\n', 'no export here\n']
+    assert list(split_uris(text)) == [KNOWN, KNOWN, KNOWN]
+
+
+def test_scheme_is_case_insensitive():
+    upper = KNOWN.replace('otpauth-migration://', 'OTPAUTH-MIGRATION://')
+    assert list(split_uris([upper + ' ' + KNOWN])) == ['otpauth-migration://' + upper[20:], KNOWN]
+    assert len(list(iter_accounts(upper))) == 1
@@ -0,0 +1,84 @@
+import base64
+import io
+import json
+
+import pytest
+
+from src import provision as provision_module
+from src.provision import b32encode_block, mint_secrets, provision, self_check
+from src.totp import TOTPKey
+from src.uri import parse_uri
+
+AT = 1_700_000_000
+
+
+def test_b32encode_block_matches_base64():
+    raw = bytes(range(200))
+    assert b32encode_block(raw) == base64.b32encode(raw).decode('ascii')
+
+
+@pytest.mark.parametrize('size', [20, 16])
+def test_mint_secrets_round_trip(size):
+    raw, secrets = mint_secrets(5, size)
+    assert len(raw) == 5 * size and len(secrets) == 5
+    for index, secret in enumerate(secrets):
+        padded = secret + '=' * (-len(secret) % 8)
+        assert base64.b32decode(padded) == raw[index * size:(index + 1) * size]
+    self_check(raw, secrets, size, 'sha1', 6, 30, AT, sample=0)
+
+
+def test_self_check_detects_a_bad_secret():
+    raw, secrets = mint_secrets(3)
+    secrets[1] = 'A' * 32
+    with pytest.raises(RuntimeError, match='identique'):
+        self_check(raw, secrets, 20, 'sha1', 6, 30, AT)
+
+
+def test_self_check_detects_a_wrong_code(monkeypatch):
+    raw, secrets = mint_secrets(3)
+    monkeypatch.setattr(provision_module, 'generate_batch', lambda keys, at, as_array: [0] * len(keys))
+    with pytest.raises(RuntimeError, match='code incorrect'):
+        self_check(raw, secrets, 20, 'sha1', 6, 30, AT)
+
+
+def test_uri_output():
+    out = io.StringIO()
+    stats = provision(10, out, 'uri', 'ACME Inc', 'user{index}@example.com', start=5, algo='SHA256',
+                      digits=8, block_size=3)
+    assert (stats['secrets'], stats['blocks']) == (10, 4)
+    records = [parse_uri(line) for line in out.getvalue().splitlines()]
+    assert [r.name for r in records] == [f'user{i}@example.com' for i in range(5, 15)]
+    assert {(r.issuer, r.algorithm, r.digits, r.period) for r in records} == {('ACME Inc', 'sha256', 8, 30)}
+    assert len({r.secret for r in records}) == 10
+
+
+def test_jsonl_output_in_parallel():
+    out = io.StringIO()
+    provision(9, out, 'jsonl', block_size=2, workers=2)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line['account'] for line in lines] == [f'user{i}' for i in range(9)]
+    for line in lines:
+        record = parse_uri(line['uri'])
+        assert record.secret == line['secret']
+        assert TOTPKey.from_secret(line['secret']).at(AT) == record.to_key().at(AT)
+
+
+def test_vault_output(tmp_path):
+    pytest.importorskip('cryptography')
+    from src.vault import Vault
+    with Vault.create(str(tmp_path / 'coffre.vault'), 'secret', n_log2=4) as vault:
+        provision(5, fmt='vault', issuer='ACME', vault=vault, block_size=2)
+        assert len(vault) == 5
+        assert vault.get('user3').issuer == 'ACME'
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'fmt': 'xml'},
+    {'fmt': 'vault'},
+    {'digits': 0},
+    {'algo': 'md4'},
+    {'name_format': 'user{missing}'},
+])
+def test_invalid_parameters_are_rejected_before_minting(kwargs):
+    with pytest.raises((ValueError, KeyError)):
+        provision(1, io.StringIO(), **kwargs)
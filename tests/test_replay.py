@@ -0,0 +1,40 @@
+import pytest
+
+from src.replay import ReplayGuard
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_counter_is_accepted_once(shared):
+    guard = ReplayGuard(4, shared=shared)
+    assert guard.last(2) is None
+    assert guard.check_and_set(2, 5)
+    assert not guard.check_and_set(2, 5)
+    assert not guard.check_and_set(2, 4)
+    assert guard.check_and_set(2, 6)
+    assert guard.last(2) == 6
+    guard.reset(2)
+    assert guard.last(2) is None
+
+
+@pytest.mark.parametrize('index', [-1, -4, 4, 100])
+def test_out_of_range_index_is_rejected(index):
+    guard = ReplayGuard(4)
+    with pytest.raises(IndexError):
+        guard.check_and_set(index, 5)
+    with pytest.raises(IndexError):
+        guard.last(index)
+    with pytest.raises(IndexError):
+        guard.reset(index)
+    assert [guard.last(account) for account in range(4)] == [None] * 4
+
+
+def test_snapshot_round_trip(tmp_path):
+    guard = ReplayGuard(3)
+    guard.check_and_set(0, 10)
+    guard.check_and_set(2, 0)
+    path = str(tmp_path / 'replay.bin')
+    guard.snapshot(path)
+    loaded = ReplayGuard.load(path, capacity=5)
+    assert len(loaded) == 5
+    assert [loaded.last(account) for account in range(5)] == [10, None, 0, None, None]
+    assert not loaded.check_and_set(0, 10)
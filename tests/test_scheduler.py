@@ -0,0 +1,84 @@
+import logging
+
+from src.clock import SimulatedClock
+from src.lookahead import LookaheadBuffer
+from src.scheduler import RolloverScheduler
+from src.totp import TOTPKey
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+
+
+def test_rollover_fires_at_each_boundary():
+    clock = SimulatedClock(1000.0)
+    scheduler = RolloverScheduler(clock=clock)
+    key = TOTPKey.from_secret(SECRET)
+    received = []
+    scheduler.subscribe(lambda events: received.extend((clock(), e.account_id, e.counter, e.code) for e in events))
+
+    assert scheduler.add('alice', key) == key.at(1000.0)
+    assert scheduler.deadline('alice') == 1020.0
+    assert scheduler.remaining('alice') == 20.0
+
+    clock.advance(19.5)
+    assert received == []
+    clock.advance(0.5)
+    assert received == [(1020.0, 'alice', 34, key.code_at(34))]
+    assert scheduler.deadline('alice') == 1050.0
+    assert scheduler.progress('alice') == 1.0
+
+    clock.advance_to(1110.0)
+    assert [(at, counter) for at, _, counter, _ in received] == [(1020.0, 34), (1050.0, 35), (1080.0, 36), (1110.0, 37)]
+    assert scheduler.code('alice') == key.code_at(37)
+
+
+def test_accounts_are_grouped_by_period_and_phase():
+    clock = SimulatedClock(0.0)
+    scheduler = RolloverScheduler(clock=clock)
+    scheduler.add('a', TOTPKey.from_secret(SECRET))
+    scheduler.add('b', TOTPKey.from_secret('GEZDGNBVGY3TQOJQ'))
+    scheduler.add('c', TOTPKey.from_secret(SECRET, period=60))
+    # Un seul réveil par groupe (30 s et 60 s)
+    assert clock.pending() == 2
+    batches = []
+    scheduler.subscribe(lambda events: batches.append((clock(), sorted(e.account_id for e in events))))
+    clock.advance_to(60.0)
+    assert sorted(batches) == [(30.0, ['a', 'b']), (60.0, ['a', 'b']), (60.0, ['c'])]
+
+    scheduler.remove('c')
+    assert clock.pending() == 1
+    scheduler.stop()
+    assert clock.pending() == 0
+
+
+def test_failing_subscriber_is_logged_and_others_still_notified(caplog):
+    clock = SimulatedClock(0.0)
+    scheduler = RolloverScheduler(clock=clock)
+    scheduler.add('alice', TOTPKey.from_secret(SECRET))
+    received = []
+
+    def broken(events):
+        raise RuntimeError("abonné défaillant")
+
+    scheduler.subscribe(broken)
+    unsubscribe = scheduler.subscribe(received.extend)
+    with caplog.at_level(logging.ERROR, logger='src.scheduler'):
+        clock.advance(30.0)
+    assert len(received) == 1
+    assert 'abonné défaillant' in caplog.text
+
+    unsubscribe()
+    clock.advance(30.0)
+    assert len(received) == 1
+
+
+def test_scheduler_reads_codes_from_lookahead():
+    clock = SimulatedClock(0.0)
+    lookahead = LookaheadBuffer(depth=3, clock=clock)
+    scheduler = RolloverScheduler(clock=clock, lookahead=lookahead)
+    key = TOTPKey.from_secret(SECRET)
+    scheduler.add('alice', key)
+    lookahead.fill()
+    hits = lookahead.hits
+    clock.advance(30.0)
+    assert scheduler.code('alice') == key.code_at(1)
+    assert lookahead.hits == hits + 1
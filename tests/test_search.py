@@ -0,0 +1,58 @@
+from src.search import PrefixIndex, words
+
+
+def index():
+    idx = PrefixIndex()
+    idx.add('g1', 'Google', 'alice@example.com')
+    idx.add('g2', 'Google', 'bob@example.com')
+    idx.add('s1', 'Société Générale', 'alice')
+    idx.add('h1', 'GitHub', 'alice-dev')
+    return idx
+
+
+def test_words_ignore_case_accents_and_punctuation():
+    assert words("Société Générale : alice@example.com") == ['societe', 'generale', 'alice', 'example', 'com']
+
+
+def test_prefix_search():
+    idx = index()
+    assert idx.search('goo') == ['g1', 'g2']
+    assert idx.search('G') == ['s1', 'h1', 'g1', 'g2']  # generale, github, google
+    assert idx.search('SOCIÉ') == ['s1']
+    assert idx.search('gen') == ['s1']
+    assert idx.search('xyz') == []
+
+
+def test_every_word_must_match():
+    idx = index()
+    assert idx.search('goo al') == ['g1']
+    assert idx.search('al goo') == ['g1']
+    assert sorted(idx.search('alice')) == ['g1', 'h1', 's1']
+    assert idx.search('git dev') == ['h1']
+
+
+def test_empty_query_lists_accounts_in_insertion_order():
+    assert index().search('  ') == ['g1', 'g2', 's1', 'h1']
+
+
+def test_reindex_and_remove():
+    idx = index()
+    idx.add('g1', 'Gmail', 'carol')
+    assert idx.search('goo') == ['g2']
+    assert idx.search('carol') == ['g1']
+    idx.remove('g2')
+    idx.remove('missing')
+    assert idx.search('goo') == []
+    assert len(idx) == 3 and 'g2' not in idx
+    idx.clear()
+    assert idx.search('') == [] and len(idx) == 0
+
+
+def test_add_many_matches_add():
+    one = index()
+    many = PrefixIndex()
+    many.add('g1', 'old')
+    many.add_many([('g1', ('Google', 'alice@example.com')), ('g2', ('Google', 'bob@example.com')),
+                   ('s1', ('Société Générale', 'alice')), ('h1', ('GitHub', 'alice-dev'))])
+    for query in ('g', 'goo', 'alice', 'al goo', 'old', ''):
+        assert many.search(query) == one.search(query)
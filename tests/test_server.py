@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from src.server import MAX_TIMESTAMP, TOTPServer
+from src.totp import TOTPKey
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+AT = 1_700_000_000
+
+
+async def _post(path: str, payload: dict):
+    server = TOTPServer()
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                     .encode('latin-1') + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    finally:
+        await server.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def post(path: str, payload: dict):
+    return asyncio.run(_post(path, payload))
+
+
+def test_generate_returns_the_code():
+    status, result = post('/generate', {'secret': SECRET, 'at': AT})
+    assert status == 200
+    assert result['code'] == TOTPKey.from_secret(SECRET).at(AT)
+
+
+def test_verify_accepts_previous_period():
+    code = TOTPKey.from_secret(SECRET).at(AT - 30)
+    status, result = post('/verify', {'secret': SECRET, 'code': code, 'at': AT})
+    assert (status, result) == (200, {'valid': True, 'offset': -1})
+
+
+@pytest.mark.parametrize('digits', [0, 11, 1000, 'six', 6.5, True])
+def test_digits_out_of_range_is_rejected(digits):
+    assert post('/generate', {'secret': SECRET, 'digits': digits, 'at': AT})[0] == 400
+    assert post('/batch', {'secrets': [SECRET], 'digits': digits, 'at': AT})[0] == 400
+
+
+@pytest.mark.parametrize('at', [-1, 1e30, MAX_TIMESTAMP + 1, 'now'])
+def test_timestamp_out_of_range_is_rejected(at):
+    assert post('/generate', {'secret': SECRET, 'at': at})[0] == 400
+    assert post('/verify', {'secret': SECRET, 'code': '123456', 'at': at})[0] == 400
+    assert post('/batch', {'secrets': [SECRET], 'at': at})[0] == 400
+
+
+def test_maximum_timestamp_is_accepted():
+    assert post('/generate', {'secret': SECRET, 'at': MAX_TIMESTAMP, 'digits': 10})[0] == 200
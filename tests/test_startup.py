@@ -0,0 +1,36 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _bench_startup():
+    spec = importlib.util.spec_from_file_location('bench_startup', os.path.join(ROOT, 'benchmarks', 'bench_startup.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _modules_after(argv: list) -> set:
+    """Lance la CLI dans un interpréteur neuf et retourne les modules chargés."""
+    script = ("import sys\nfrom src.cli import main\nstatus = main(sys.argv[1:])\n"
+              "print('\\n'.join(sys.modules), file=sys.stderr)\nsys.exit(status)")
+    result = subprocess.run([sys.executable, '-c', script] + argv, cwd=ROOT, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return set(result.stderr.split())
+
+
+def test_cli_generate_does_not_import_heavy_modules():
+    forbidden = _bench_startup().FORBIDDEN
+    loaded = _modules_after(['generate', 'JBSWY3DPEHPK3PXP', '--at', '59'])
+    heavy = sorted(m for m in loaded if any(m == f or m.startswith(f + '.') for f in forbidden))
+    assert heavy == []
+    assert 'src.cli' in loaded and 'src.totp' in loaded
+
+
+def test_cli_verify_does_not_import_heavy_modules():
+    forbidden = _bench_startup().FORBIDDEN
+    loaded = _modules_after(['verify', 'JBSWY3DPEHPK3PXP', '996554', '--at', '59'])
+    assert not [m for m in loaded if any(m == f or m.startswith(f + '.') for f in forbidden)]
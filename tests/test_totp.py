@@ -0,0 +1,42 @@
+import base64
+
+import pytest
+
+from src.batch import generate_batch
+from src.clock import FrozenClock
+from src.hotp import hotp
+from src.totp import TOTPKey, decode_secret, generate_totp_secret
+from tests.vectors import RFC4226_SEED, RFC4226_VECTORS, RFC6238_SEEDS, RFC6238_VECTORS
+
+
+@pytest.mark.parametrize('timestamp, algo, code', RFC6238_VECTORS)
+def test_rfc6238_vectors(timestamp, algo, code):
+    assert TOTPKey(RFC6238_SEEDS[algo], algo, 8).at(timestamp) == code
+
+
+@pytest.mark.parametrize('timestamp, algo, code', RFC6238_VECTORS)
+def test_rfc6238_vectors_from_base32(timestamp, algo, code):
+    secret = base64.b32encode(RFC6238_SEEDS[algo]).decode('ascii')
+    assert generate_totp_secret(secret, algo, 8, clock=FrozenClock(timestamp)) == code
+
+
+@pytest.mark.parametrize('timestamp', sorted({vector[0] for vector in RFC6238_VECTORS}))
+def test_rfc6238_vectors_in_batch(timestamp):
+    keys = [TOTPKey(seed, algo, 8) for algo, seed in RFC6238_SEEDS.items()]
+    expected = {algo: code for at, algo, code in RFC6238_VECTORS if at == timestamp}
+    assert generate_batch(keys, timestamp) == [expected[algo] for algo in RFC6238_SEEDS]
+
+
+@pytest.mark.parametrize('counter, code', list(enumerate(RFC4226_VECTORS)))
+def test_rfc4226_vectors(counter, code):
+    assert hotp(TOTPKey(RFC4226_SEED), counter) == code
+
+
+def test_decode_secret_ignores_case_separators_and_padding():
+    assert decode_secret('jbsw-y3dp ehpk-3pxp==') == decode_secret('JBSWY3DPEHPK3PXP') == bytearray(b'Hello!\xde\xad\xbe\xef')
+
+
+@pytest.mark.parametrize('secret', ['JBSWY3D!', 'JBSWY3DPE', 'été'])
+def test_decode_secret_rejects_invalid_keys(secret):
+    with pytest.raises(ValueError):
+        decode_secret(secret)
@@ -0,0 +1,64 @@
+import pytest
+
+from src.uri import parse_many, parse_uri
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+
+
+def test_full_uri():
+    record = parse_uri(f'otpauth://totp/ACME:alice@example.com?secret={SECRET}&issuer=ACME'
+                       '&algorithm=SHA256&digits=8&period=60')
+    assert record.as_dict() == {
+        'type': 'totp', 'secret': SECRET, 'algorithm': 'sha256', 'digits': 8, 'period': 60,
+        'counter': 0, 'issuer': 'ACME', 'name': 'alice@example.com',
+    }
+
+
+def test_percent_encoded_label():
+    record = parse_uri(f'otpauth://totp/%C3%89quipe%20A%3Aalice%40example.com?secret={SECRET}')
+    assert (record.issuer, record.name) == ('Équipe A', 'alice@example.com')
+
+
+def test_issuer_parameter_overrides_label_prefix():
+    record = parse_uri(f'otpauth://totp/Old:alice?issuer=New%20Corp&secret={SECRET}')
+    assert (record.issuer, record.name) == ('New Corp', 'alice')
+    record = parse_uri(f'otpauth://totp/alice?secret={SECRET}&issuer=ACME')
+    assert (record.issuer, record.name) == ('ACME', 'alice')
+    record = parse_uri(f'otpauth://totp/ACME:alice?secret={SECRET}')
+    assert (record.issuer, record.name) == ('ACME', 'alice')
+
+
+def test_upper_case_scheme_and_type():
+    record = parse_uri(f'  OTPAUTH://TOTP/alice?SECRET={SECRET.lower()}=&DIGITS=8  ')
+    assert (record.type, record.secret, record.digits) == ('totp', SECRET, 8)
+
+
+def test_hotp_requires_counter():
+    assert parse_uri(f'otpauth://hotp/alice?secret={SECRET}&counter=7').counter == 7
+    with pytest.raises(ValueError, match='counter manquant'):
+        parse_uri(f'otpauth://hotp/alice?secret={SECRET}')
+
+
+@pytest.mark.parametrize('uri, message', [
+    ('otpauth://totp/alice?issuer=ACME', 'secret manquant'),
+    ('otpauth://totp/alice?secret=', 'secret manquant'),
+    ('otpauth://totp/alice?secret=JBSWY3DP1', 'Base32'),
+    ('otpauth://steam/alice?secret=JBSWY3DPEHPK3PXP', "type 'steam' non supporté"),
+    ('https://example.com/?secret=JBSWY3DPEHPK3PXP', 'URI TOTP invalide'),
+    ('otpauth://totp/alice?secret=JBSWY3DPEHPK3PXP&digits=six', 'nombres'),
+])
+def test_invalid_uris(uri, message):
+    with pytest.raises(ValueError, match=message):
+        parse_uri(uri)
+
+
+def test_round_trip_through_to_uri():
+    record = parse_uri(f'otpauth://totp/ACME%20Inc:alice@example.com?secret={SECRET}&issuer=ACME%20Inc')
+    assert parse_uri(record.to_uri()).as_dict() == record.as_dict()
+
+
+def test_parse_many_skips_errors():
+    uris = [f'otpauth://totp/alice?secret={SECRET}', 'not a uri']
+    assert [r and r.name for r in parse_many(uris, skip_errors=True)] == ['alice', None]
+    with pytest.raises(ValueError):
+        parse_many(uris)
@@ -0,0 +1,98 @@
+import os
+import struct
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from src import vault
+from src.vault import HEADER_SIZE, Vault, VaultRecord
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+PASSWORD = 'correct horse'
+
+
+def create(tmp_path):
+    # Coût scrypt réduit : seul le format est testé
+    return Vault.create(str(tmp_path / 'coffre.vault'), PASSWORD, n_log2=4)
+
+
+def record(account_id: str, secret: str = SECRET) -> VaultRecord:
+    return VaultRecord(account_id, secret, issuer='Example', name=f'{account_id}@example.com')
+
+
+def test_round_trip(tmp_path):
+    with create(tmp_path) as v:
+        v.put(VaultRecord('alice', SECRET, 'sha256', 8, 60, 'Example', 'alice@example.com', 'hotp', 5))
+    with Vault(str(tmp_path / 'coffre.vault'), PASSWORD) as v:
+        stored = v.get('alice')
+        assert (stored.account_id, stored.secret, stored.algorithm, stored.digits, stored.period,
+                stored.issuer, stored.name, stored.type, stored.counter) \
+            == ('alice', SECRET, 'sha256', 8, 60, 'Example', 'alice@example.com', 'hotp', 5)
+        assert len(v) == 1 and 'alice' in v and 'bob' not in v
+        with pytest.raises(KeyError):
+            v.get('bob')
+
+
+def test_wrong_password(tmp_path):
+    create(tmp_path).close()
+    with pytest.raises(ValueError, match='Mot de passe'):
+        Vault(str(tmp_path / 'coffre.vault'), 'wrong')
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    create(tmp_path).close()
+    path = str(tmp_path / 'coffre.vault')
+    with open(path, 'r+b') as f:
+        f.seek(8)
+        f.write(struct.pack('>H', 1))
+    with pytest.raises(ValueError, match='Version'):
+        Vault(path, PASSWORD)
+
+
+def test_journal_is_replayed_after_reopen(tmp_path):
+    path = str(tmp_path / 'coffre.vault')
+    with create(tmp_path) as v:
+        v.put_many([record('alice'), record('bob'), record('carol')])
+        v.put(record('alice', 'GEZDGNBVGY3TQOJQ'))
+        v.delete('bob')
+        with pytest.raises(KeyError):
+            v.delete('bob')
+    with Vault(path, PASSWORD) as v:
+        assert len(v) == 2
+        assert v.get('alice').secret == 'GEZDGNBVGY3TQOJQ'
+        assert 'bob' not in v
+        assert sorted(r.account_id for r in v.records()) == ['alice', 'carol']
+
+
+def test_journal_is_merged_past_its_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(vault, 'JOURNAL_LIMIT', 4)
+    path = str(tmp_path / 'coffre.vault')
+    with create(tmp_path) as v:
+        for i in range(10):
+            v.put(record(f'user{i}'))
+        v.delete('user3')
+    with Vault(path, PASSWORD) as v:
+        assert len(v) == 9
+        assert 'user3' not in v
+        assert all(v.get(f'user{i}').account_id == f'user{i}' for i in range(10) if i != 3)
+
+
+def test_compact_keeps_live_records_only(tmp_path):
+    path = str(tmp_path / 'coffre.vault')
+    with create(tmp_path) as v:
+        for i in range(20):
+            v.put(record(f'user{i}'))
+        for i in range(10):
+            v.delete(f'user{i}')
+        v.put(record('user15', 'GEZDGNBVGY3TQOJQ'))
+        before = os.path.getsize(path)
+        v.compact()
+        assert os.path.getsize(path) < before
+        assert len(v) == 10
+    with Vault(path, PASSWORD) as v:
+        assert sorted(r.account_id for r in v.records()) == sorted(f'user{i}' for i in range(10, 20))
+        assert v.get('user15').secret == 'GEZDGNBVGY3TQOJQ'
+        v.put(record('user0'))
+        assert len(v) == 11
+    assert os.path.getsize(path) > HEADER_SIZE
@@ -0,0 +1,57 @@
+import pytest
+
+from src.clock import FrozenClock
+from src.totp import TOTPKey
+from src.verify import match_code, verify, window_offsets
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+AT = 1_700_000_000
+
+
+def test_window_offsets_closest_first():
+    assert window_offsets(0) == [0]
+    assert window_offsets(2) == [0, -1, 1, -2, 2]
+
+
+def test_match_code_returns_first_match_after_comparing_all():
+    compared = []
+
+    def candidates():
+        for offset, code in [(0, '111111'), (-1, '222222'), (1, '222222'), (-2, '333333')]:
+            compared.append(offset)
+            yield offset, code
+
+    assert match_code(candidates(), ' 222222 ') == -1
+    assert compared == [0, -1, 1, -2]
+    assert match_code([(0, '111111')], '11111') is None
+
+
+@pytest.mark.parametrize('offset', [-2, -1, 0, 1, 2])
+def test_verify_within_window(offset):
+    key = TOTPKey.from_secret(SECRET)
+    code = key.code_at(key.counter_at(AT) + offset)
+    assert verify(key, code, window=2, at=AT) == offset
+    assert verify(SECRET, code, window=2, at=AT) == offset
+
+
+def test_verify_outside_window():
+    key = TOTPKey.from_secret(SECRET)
+    code = key.code_at(key.counter_at(AT) + 2)
+    assert verify(key, code, window=1, at=AT) is None
+    assert verify(key, key.at(AT), window=0, at=AT) == 0
+
+
+def test_verify_with_parameters_and_clock():
+    key = TOTPKey.from_secret(SECRET, 'sha256', 8, 60)
+    assert verify(SECRET, key.at(AT), algo='sha256', digits=8, period=60, clock=FrozenClock(AT)) == 0
+    assert verify(SECRET, key.at(AT), clock=FrozenClock(AT)) is None
+
+
+def test_verify_never_uses_negative_counters():
+    key = TOTPKey.from_secret(SECRET)
+    assert verify(key, key.code_at(0), window=3, at=10) == 0
+
+
+def test_negative_window_is_rejected():
+    with pytest.raises(ValueError):
+        verify(SECRET, '123456', window=-1, at=AT)
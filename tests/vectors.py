@@ -0,0 +1,23 @@
+"""
+Vecteurs de test des RFC, partagés par les tests et benchmarks/bench_core.py.
+"""
+
+# RFC 6238, annexe B : graines ASCII par algorithme, codes à 8 chiffres (période 30 s)
+RFC6238_SEEDS = {
+    'sha1': b'12345678901234567890',
+    'sha256': b'12345678901234567890123456789012',
+    'sha512': b'1234567890123456789012345678901234567890123456789012345678901234',
+}
+RFC6238_VECTORS = [
+    (59, 'sha1', '94287082'), (59, 'sha256', '46119246'), (59, 'sha512', '90693936'),
+    (1111111109, 'sha1', '07081804'), (1111111109, 'sha256', '68084774'), (1111111109, 'sha512', '25091201'),
+    (1111111111, 'sha1', '14050471'), (1111111111, 'sha256', '67062674'), (1111111111, 'sha512', '99943326'),
+    (1234567890, 'sha1', '89005924'), (1234567890, 'sha256', '91819424'), (1234567890, 'sha512', '93441116'),
+    (2000000000, 'sha1', '69279037'), (2000000000, 'sha256', '90698825'), (2000000000, 'sha512', '38618901'),
+    (20000000000, 'sha1', '65353130'), (20000000000, 'sha256', '77737706'), (20000000000, 'sha512', '47863826'),
+]
+
+# RFC 4226, annexe D : codes HOTP à 6 chiffres pour les compteurs 0 à 9
+RFC4226_SEED = b'12345678901234567890'
+RFC4226_VECTORS = ['755224', '287082', '359152', '969429', '338314',
+                   '254676', '287922', '162583', '399871', '520489']